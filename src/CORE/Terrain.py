@@ -5,16 +5,16 @@ collider creation, and dynamic interaction with entities affected by terrain cha
 
 Key Features:
 - Integration with Panda3D's `GeoMipTerrain` for heightfield terrain rendering.
-- Real-time terrain editing through mouse inputs, including raising and lowering terrain points.
-- Dynamic heightfield collider updates for compatibility with Bullet physics.
+- Real-time terrain editing through a vectorized NumPy brush with falloff kernels that only pushes the edited window.
+- A tiled heightfield collider for Bullet physics where an edit only rebuilds the tiles it touched.
 - Automatic adjustments of entities on terrain changes.
+- A NumPy mirror of the heightmap for scalar and batched height queries.
 - Scheduled tasks for continuous terrain updates and handling terrain modifications.
 
 Dependencies:
 - Panda3D: Used for rendering, handling heightmaps, and texture mapping.
 - Bullet Physics: Provides collision detection and physics simulation.
 - NumPy: Facilitates numerical computations and vector operations.
-- Math: Used for distance and geometric calculations.
 - `CORE.entity`: Manages entities interacting with the terrain.
 
 Classes:
@@ -30,26 +30,48 @@ Example Usage:
 """
 
 
-from panda3d.core import KeyboardButton, GeoMipTerrain, PNMImage, TextureStage, Vec3
+from panda3d.core import KeyboardButton, GeoMipTerrain, PNMImage, Texture, TextureStage, Vec3
 from direct.showbase.DirectObject import DirectObject
 from panda3d.bullet import BulletRigidBodyNode, BulletHeightfieldShape, ZUp
 from direct.task import Task
 import numpy as np
-import math
 
 from CORE.entity import Entity
+from CORE.collision import CollisionGroups
 
 class TerrainController(DirectObject):
-    """the panda Object that handles all terrain management"""
-    def __init__(self,base):
+    """the panda Object that handles all terrain management
+    
+    Attributes:
+        BRUSH_FALLOFFS (tuple): the brush falloff kernels, "constant" edits the whole square evenly,
+            "linear" and "smooth" fade to nothing at the brush radius.
+        TILE_SIZE (int): the width in pixels of a collider tile, a tile holds TILE_SIZE + 1 samples so neighbours share an edge.
+        COLLIDER_Z (float): the z every collider tile is placed at.
+        collider_tiles (dict): (tile x, tile y) -> the NodePath of that tile's collider.
+    """
+    BRUSH_FALLOFFS = ("constant", "linear", "smooth")
+    TILE_SIZE = 128
+    COLLIDER_Z = 265
+    
+    def __init__(self,base,headless=None):
+        """set up the terrain
+
+        Args:
+            base (BaseApp): the base app reference
+            headless (bool, optional): if true only the heightfield is built, no texture, LOD focal point or edit tasks. Defaults to None, the app's `headless`.
+        """
         self.base = base
         self.render = base.render
+        self.headless = base.headless if headless == None else headless
+        self.collider_tiles = {}
         super().__init__()
         
         self.init_terrain()
         
-        self.base.task_mgr.add(self.terrain_update_task, "update")
-        self.base.task_mgr.add(self.handle_terrain_edit, "handleEnvironmentChange")
+        #there is no camera to do LOD against and no mouse to edit with when headless
+        if(not self.headless):
+            self.base.task_mgr.add(self.terrain_update_task, "update")
+            self.base.task_mgr.add(self.handle_terrain_edit, "handleEnvironmentChange")
     
     def init_terrain(self):
         """set up our heightmap terrain stuff"""
@@ -61,79 +83,173 @@ class TerrainController(DirectObject):
         self.heightmap.write("terrain.png")
         self.terrain.set_heightfield("./terrain.png")
         #self.terrain.set_color_map("./test.png")
-        
-        self.grass_terrain_texture = self.base.loader.loadTexture("assets/textures/Grass001_1K-PNG_Color.png")
 
         self.terrain.set_block_size(128)
         self.terrain.set_near(40)
         self.terrain.set_min_level(0)
         #self.terrain.set_bruteforce(True)
         self.terrain.set_far(100)
-        self.terrain.set_focal_point(self.base.camera)
         
         #store root for convenience
         self.terrain_np = self.terrain.getRoot()
-        self.terrain_np.setTexture(TextureStage.getDefault(), self.grass_terrain_texture)
-        self.terrain_np.setTexScale(TextureStage.getDefault(), 1)
+        
+        if(not self.headless):
+            self.grass_terrain_texture = self.base.loader.loadTexture("assets/textures/Grass001_1K-PNG_Color.png")
+            self.terrain.set_focal_point(self.base.camera)
+            self.terrain_np.setTexture(TextureStage.getDefault(), self.grass_terrain_texture)
+            self.terrain_np.setTexScale(TextureStage.getDefault(), 1)
+            
         self.terrain_np.reparent_to(self.render)
         self.terrain_np.setSz(self.base.z_scale)
         
         #create the actual terrain
         self.terrain.generate()
+        self.terrain_dirty = False
+        self.heightmap_unsaved = False
+        
+        #the numpy mirror all height queries read from
+        self.sync_heights()
     
-    def create_heightFieldMap_Collider(self):
-        """create/update our terrain collider"""
-        #not the best solution but im not editing their engine code
+    def sync_heights(self):
+        """rebuild the NumPy mirror of the heightmap, call after the heightmap is edited.
+        self.heights[y, x] is the world height at world (x, y), the image's rows are flipped the same way GeoMipTerrain flips them
+        """
+        #a texture stores its rows bottom to top, which is exactly world y
+        texture = Texture()
+        texture.load(self.heightmap)
+        dtype = np.uint16 if texture.getComponentType() == Texture.T_unsigned_short else np.uint8
+        raw = np.frombuffer(texture.getRamImage(), dtype=dtype).reshape(texture.getYSize(), texture.getXSize(), -1)
+        self.heights = raw[:, :, 0] * np.float32(self.base.z_scale / self.heightmap.getMaxval())
+    
+    def create_heightFieldMap_Collider(self, dirty_rect=None):
+        """create/update our terrain collider.
+        the collider is split into TILE_SIZE tiles, each its own BulletHeightfieldShape, so an edit only rebuilds the tiles it touched
+
+        Args:
+            dirty_rect ((int, int, int, int), optional): the edited (x0, y0, x1, y1) world pixels, end exclusive. Defaults to None, rebuild every tile.
+        """
         #BulletHeightfieldShape does not refresh the collision mesh when the hieght map img updates
-        #so we just kill and rebuild it any time we edit
-        #TODO: make this only update when a user stops holding mouse, right now it just edits after reach brush gradient finishes.
-        if(hasattr(self,"ground")):
-            self.base.world.remove(self.ground)
-            
-        #create container for our thingo
-        self.ground = BulletRigidBodyNode('Ground')
+        #so we kill and rebuild the touched tiles any time we edit
+        max_y, max_x = self.heights.shape
+        if(dirty_rect == None): dirty_rect = (0, 0, max_x, max_y)
+        tiles = self.tiles_in_rect(dirty_rect)
+        for tile in tiles:
+            self.build_collider_tile(*tile)
         
-        #the thingo in question --collider mapped to our height map
-        self.shape = BulletHeightfieldShape(self.heightmap, self.base.z_scale, ZUp)
+        #only bodies resting on a rebuilt tile need to notice the new ground
+        tile_x0 = min(tx for tx, ty in tiles) * self.TILE_SIZE
+        tile_y0 = min(ty for tx, ty in tiles) * self.TILE_SIZE
+        tile_x1 = (max(tx for tx, ty in tiles) + 1) * self.TILE_SIZE
+        tile_y1 = (max(ty for tx, ty in tiles) + 1) * self.TILE_SIZE
+        for critter in Entity.get_entities():
+            if(critter.body_np is None or critter.node is None):
+                continue
+            pos = critter.body_np.get_pos()
+            if(tile_x0 <= pos[0] <= tile_x1 and tile_y0 <= pos[1] <= tile_y1):
+                if(getattr(critter, "at_city", False)):
+                    #critters at home stay asleep, they are just put back on the ground
+                    self.base.set_critter_height(critter.body_np, pos[0], pos[1])
+                    continue
+                node = critter.node
+                #when a node settles IE stops moving --comes to rest, it stops being thunk about by the engine
+                #so we give it a bit of upward force to ensure that the thinker starts thunking again about 
+                #our critter
+                node.setLinearVelocity(Vec3(0, 0, .005))
+                node.active=True
+                node.setAngularVelocity(Vec3(0, 0, 0))
+    
+    def tiles_in_rect(self, rect):
+        """the collider tiles that hold any pixel of a rectangle, neighbouring tiles share their edge pixels
+
+        Args:
+            rect ((int, int, int, int)): (x0, y0, x1, y1) world pixels, end exclusive
+
+        Returns:
+            list: (tile x, tile y) of every tile touched
+        """
+        x0, y0, x1, y1 = rect
+        max_y, max_x = self.heights.shape
+        last_x = (max_x - 2) // self.TILE_SIZE
+        last_y = (max_y - 2) // self.TILE_SIZE
+        #a pixel on a tile edge belongs to the tiles on both sides
+        tx0, tx1 = max((x0 - 1) // self.TILE_SIZE, 0), min((x1 - 1) // self.TILE_SIZE, last_x)
+        ty0, ty1 = max((y0 - 1) // self.TILE_SIZE, 0), min((y1 - 1) // self.TILE_SIZE, last_y)
+        return [(tx, ty) for tx in range(tx0, tx1 + 1) for ty in range(ty0, ty1 + 1)]
+    
+    def build_collider_tile(self, tx, ty):
+        """build (or rebuild) the collider of one tile from the height map
+
+        Args:
+            tx (int): tile x
+            ty (int): tile y
+        """
+        old = self.collider_tiles.pop((tx, ty), None)
+        if(old != None):
+            self.base.world.remove(old.node())
+            old.removeNode()
         
-        #draw
-        self.ground.addShape(self.shape)
-        self.np = self.render.attachNewNode(self.ground)
-        pos = self.get_terrain_center()
-        #TODO: WHY IS THIS NUMBER NEEDED. IDK. but it yeah... it works with this here. >:3
-        pos[2]=265
+        max_y, max_x = self.heights.shape
+        x0, y0 = tx * self.TILE_SIZE, ty * self.TILE_SIZE
+        width = min(self.TILE_SIZE + 1, max_x - x0)
+        height = min(self.TILE_SIZE + 1, max_y - y0)
         
-        #set to our new cool pos.
-        self.np.setPos(pos)
-        self.base.world.attachRigidBody(self.ground)
+        #the image's top row is the highest world y
+        tile_image = PNMImage(width, height, 1, self.heightmap.getMaxval())
+        tile_image.copySubImage(self.heightmap, 0, 0, x0, self.heightmap.getYSize() - (y0 + height), width, height)
         
-        for critter in Entity.get_entities():
-            node = critter.node
-            #when a node settles IE stops moving --comes to rest, it stops being thunk about by the engine
-            #so we give it a bit of upward force to ensure that the thinker starts thunking again about 
-            #our critter
-            node.setLinearVelocity(Vec3(0, 0, .005))
-            
-            #this line might be enough to get it working. but the combo of them seems better? idk should be harmless to have both
-            node.active=True
-            
-            #alternatively just move it up a little bit, but idk it wasnt working. this is a bit odd cus things fall slow if you are editing
-            #but w/e its okay for now, worst case just increese gravity to fix this.
-            
-            node.setAngularVelocity(Vec3(0, 0, 0))
-            #node.body_np.setPos(node.body_np.getPos() + Vec3(0, 0, 0.01))
+        ground = BulletRigidBodyNode(f'Ground-{tx}-{ty}')
+        ground.addShape(BulletHeightfieldShape(tile_image, self.base.z_scale, ZUp))
+        ground.setIntoCollideMask(CollisionGroups.mask(CollisionGroups.TERRAIN))
+        tile_np = self.render.attachNewNode(ground)
+        #a heightfield shape is centered on its middle sample
+        #TODO: WHY IS THIS NUMBER NEEDED. IDK. but it yeah... it works with this here. >:3
+        tile_np.setPos(x0 + (width - 1) / 2, y0 + (height - 1) / 2, self.COLLIDER_Z)
+        self.base.world.attachRigidBody(ground)
+        self.collider_tiles[(tx, ty)] = tile_np
     
     # Add a task to keep updating the terrain
     def terrain_update_task(self,task):
         """ensure the terrain updates to match the edits being made to the height map"""
+        #edits write straight into the heightfield, regenerate once per frame no matter how many edits were made
+        if(self.terrain_dirty):
+            self.terrain.generate()
+            self.terrain_dirty = False
         updating_terrain = self.terrain.update()
         if(updating_terrain): print("terrain update")
         return task.cont
     
     def get_height_at(self, x, y):
-        """Get the height at a given x, y coordinate on the heightfield."""
-        from main import BaseApp
-        return self.terrain.get_elevation(int(x),int(y)) * BaseApp.z_scale
+        """Get the height at a given x, y coordinate on the heightfield, coordinates outside of the map are clamped to its edge."""
+        max_y, max_x = self.heights.shape
+        x = min(max(int(x), 0), max_x - 1)
+        y = min(max(int(y), 0), max_y - 1)
+        return float(self.heights[y, x])
+    
+    def get_heights_at(self, xs, ys, bilinear=False):
+        """Get the heights at arrays of x, y coordinates on the heightfield in one fancy indexing call.
+        coordinates outside of the map are clamped to its edge.
+
+        Args:
+            xs (np.ndarray): x coordinates, any shape
+            ys (np.ndarray): y coordinates, same shape as xs
+            bilinear (bool, optional): interpolate between the 4 nearest pixels instead of truncating to one. Defaults to False.
+
+        Returns:
+            np.ndarray: the heights, same shape as xs
+        """
+        max_y, max_x = self.heights.shape
+        xs = np.clip(np.asarray(xs, dtype=np.float64), 0, max_x - 1)
+        ys = np.clip(np.asarray(ys, dtype=np.float64), 0, max_y - 1)
+        if(not bilinear):
+            return self.heights[ys.astype(np.intp), xs.astype(np.intp)]
+        
+        x0 = np.minimum(xs.astype(np.intp), max_x - 2)
+        y0 = np.minimum(ys.astype(np.intp), max_y - 2)
+        fx = xs - x0
+        fy = ys - y0
+        bottom = self.heights[y0, x0] * (1 - fx) + self.heights[y0, x0 + 1] * fx
+        top = self.heights[y0 + 1, x0] * (1 - fx) + self.heights[y0 + 1, x0 + 1] * fx
+        return bottom * (1 - fy) + top * fy
     
     def ascend_objs_with_terrain(self, point, radius=None, objects=[]):
         """when a terrain point is elevated, check all critters within radius and ascend them with the terrain if applicable"
@@ -158,46 +274,134 @@ class TerrainController(DirectObject):
         
         #define our success function
         def on_click_success(point):
-            self.raise_point(point,power=modifier)
-            self.create_heightFieldMap_Collider()
-            print(Entity.get_entities())
+            dirty_rect = self.raise_point(point,power=modifier)
+            if(dirty_rect == None):
+                return
+            #kinematic entities read the heights directly, there is no collider to rebuild
+            if(not self.base.kinematic):
+                self.create_heightFieldMap_Collider(dirty_rect)
             self.ascend_objs_with_terrain(point,objects=Entity.get_entities())
             
         #cast our ray
         self.base.click_on_map_and_call(on_click_success)
     
-    def raise_point(self, point, max_range=None,power=.1):
-        """the method that handles editing the 2d png height map
+    def raise_point(self, point, max_range=None, power=.1, falloff=None):
+        """the brush that edits the height map, the whole affected window is edited in one vectorized operation
+        and only that window is pushed to the height map image and GeoMipTerrain
 
         Args:
-            point (x,y): tuple, ints. the pixel to edit
-            max_range (int, optional): how many pixels away to effect. Defaults to None.
+            point (x,y): the world point at the center of the brush
+            max_range (int, optional): how many pixels away to effect. Defaults to None, the base's edit radius.
             power (float, optional): how powerful the effect is, min -1 max 1. Defaults to .1.
+            falloff (str, optional): one of BRUSH_FALLOFFS. Defaults to None, the base's edit falloff.
+
+        Returns:
+            (int, int, int, int): the dirty rectangle (x0, y0, x1, y1) in world pixels, end exclusive. None if the brush missed the map
         """
         if(max_range == None): max_range = self.base.edit_radius
-        # Convert the world point to heightmap coordinates
-        print(f"pointx:{point.x}, pointy:{point.y}")
-        center_x = point.x #int(point.x / self.terrain_np.getScale().x * self.heightmap.getXSize())
-        center_y = np.abs(point.y - self.heightmap.getYSize())#int(point.y / self.terrain_np.getScale().y * self.heightmap.getYSize())
-        
-        for x in range(int(center_x-max_range),int(center_x+max_range)):
-            for y in range(int(center_y-max_range),int(center_y+max_range)):
-                if(x>0 and y>0 and x<self.heightmap.getXSize() and y<self.heightmap.getYSize()):
-                    #TODO: fix this fall off, it works in reverse currently...
-                    # Calculate the distance from the center pixel
-                    distance = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                    
-                    # Normalize the distance so it's between 0 and 1
-                    max_distance = math.sqrt((0 - center_x)**2 + (0 - center_y)**2)  # Max distance to any corner
-                    normalized_distance = distance / max_distance
-                    current_height = self.heightmap.getGray(x, y)
-                    new_height = min(1.0, current_height + .1*power)  # Increase height, max 1.0
-                    self.heightmap.setGray(x, y, new_height)
-        
-        # Update the terrain
-        self.terrain.setHeightfield(self.heightmap)
-        #self.terrain.generate()
-        self.heightmap.write("terrain.png")
+        if(falloff == None): falloff = self.base.edit_falloff
+        max_y, max_x = self.heights.shape
+        center_x, center_y = float(point.x), float(point.y)
+        
+        #the window of the map the brush touches
+        x0, x1 = max(int(center_x - max_range), 0), min(int(center_x + max_range), max_x)
+        y0, y1 = max(int(center_y - max_range), 0), min(int(center_y + max_range), max_y)
+        if(x0 >= x1 or y0 >= y1):
+            return None
+        
+        ys, xs = np.ogrid[y0:y1, x0:x1]
+        weights = self.brush_weights(np.hypot(xs - center_x, ys - center_y) / max(max_range, 1), falloff)
+        
+        #edit in gray values so the mirror stays exactly what the image holds
+        maxval = self.heightmap.getMaxval()
+        gray = self.heights[y0:y1, x0:x1] * np.float32(maxval / self.base.z_scale)
+        gray = np.clip(np.rint(gray + .1 * power * weights * maxval), 0, maxval)
+        self.heights[y0:y1, x0:x1] = gray * np.float32(self.base.z_scale / maxval)
+        
+        self.push_heights(gray, x0, y0)
+        return (x0, y0, x1, y1)
+    
+    def brush_weights(self, distances, falloff):
+        """how much of the brush's power each pixel gets
+        
+        Args:
+            distances (np.ndarray): distance of each pixel from the brush center divided by the brush radius
+            falloff (str): one of BRUSH_FALLOFFS
+        
+        Returns:
+            np.ndarray: weights between 0 and 1, same shape as distances
+        """
+        if(falloff not in self.BRUSH_FALLOFFS):
+            raise ValueError(f"unknown brush falloff {falloff}, expected one of {self.BRUSH_FALLOFFS}")
+        if(falloff == "constant"):
+            return np.ones_like(distances)
+        t = np.clip(1 - distances, 0, 1)
+        if(falloff == "linear"):
+            return t
+        return t * t * (3 - 2 * t)
+    
+    def push_heights(self, gray, x0, y0):
+        """copy a window of gray values into the height map image and GeoMipTerrain's heightfield
+        
+        Args:
+            gray (np.ndarray): (h,w) gray values between 0 and the height map's maxval, rows are world y
+            x0 (int): the world x of the window's first column
+            y0 (int): the world y of the window's first row
+        """
+        height, width = gray.shape
+        #a texture stores its rows bottom to top so storing it flips the window into image rows
+        texture = Texture()
+        if(self.heightmap.getMaxval() > 255):
+            texture.setup2dTexture(width, height, Texture.T_unsigned_short, Texture.F_luminance)
+            texture.setRamImage(gray.astype(np.uint16).tobytes())
+        else:
+            texture.setup2dTexture(width, height, Texture.T_unsigned_byte, Texture.F_luminance)
+            texture.setRamImage(gray.astype(np.uint8).tobytes())
+        window = PNMImage()
+        texture.store(window)
+        
+        #the image's top row is the highest world y
+        image_y = self.heightmap.getYSize() - (y0 + height)
+        self.heightmap.copySubImage(window, x0, image_y)
+        #GeoMipTerrain read its heightfield from the png as rgb, a gray window would only fill the blue channel
+        heightfield = self.terrain.heightfield()
+        if(heightfield.getNumChannels() != window.getNumChannels()):
+            window.makeRgb()
+        heightfield.copySubImage(window, x0, image_y)
+        self.terrain_dirty = True
+        self.heightmap_unsaved = True
+    
+    def get_gray_heights(self):
+        """the height map as the gray values the image holds, rows are world y. this is what a checkpoint stores
+
+        Returns:
+            np.ndarray: (h,w) uint16 gray values between 0 and the height map's maxval
+        """
+        gray = np.rint(self.heights * np.float32(self.heightmap.getMaxval() / self.base.z_scale))
+        return gray.astype(np.uint16)
+    
+    def set_gray_heights(self, gray):
+        """replace the whole height map, the rendered terrain and the collider, used to load a checkpoint
+
+        Args:
+            gray (np.ndarray): (h,w) gray values between 0 and the height map's maxval, rows are world y, the same shape as the map
+        """
+        if(gray.shape != self.heights.shape):
+            raise ValueError(f"height map is {self.heights.shape}, cannot load {gray.shape} heights")
+        maxval = self.heightmap.getMaxval()
+        gray = np.clip(gray, 0, maxval)
+        self.heights = gray * np.float32(self.base.z_scale / maxval)
+        self.push_heights(gray, 0, 0)
+        #every pixel changed, regenerate now instead of waiting for the update task a headless app does not have
+        self.terrain.generate()
+        self.terrain_dirty = False
+        if(not self.base.kinematic):
+            self.create_heightFieldMap_Collider()
+    
+    def save_heightmap(self, path="terrain.png"):
+        """write the height map to disk, done once an edit stroke ends instead of every frame"""
+        self.heightmap.write(path)
+        self.heightmap_unsaved = False
         
     def handle_terrain_edit(self, task, modifier=None):
         """the task that handles actually calling the terrain editor method. called every frame
@@ -211,11 +415,18 @@ class TerrainController(DirectObject):
             Task: run every tick
         """
         if(modifier == None): modifier = self.base.edit_power
+        editing = False
         if(self.base.edit_terrain_enabled):
             if(self.base.input.mouse_held):
                 self.edit_terrain(modifier)
+                editing = True
             elif(self.base.input.mouse3_held):
                 self.edit_terrain(modifier*-1)
+                editing = True
+        
+        #the stroke is over, save it once
+        if(not editing and self.heightmap_unsaved):
+            self.save_heightmap()
             
         return Task.cont
         
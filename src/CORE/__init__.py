@@ -3,12 +3,28 @@ This module contains all the core engine_level components and classes.
 
 Camera -- the class that handles all camera control
 
+Clock -- the simulation clock, all simulation timing reads from it instead of wall time
+
+Collision -- the Bullet collision groups of every entity type and contact pair statistics
+
 Entity -- all physics enabled objects in the world are an entity
 
 Input -- the input controller, all user input comes through here
 
+Movement -- the batched movement step, moves every entity with a goal once per tick
+
+Physics -- the fixed step driver of the Bullet world, caps the catch up work of slow frames
+
+Pool -- per entity type free lists of detached bodies, spawn reuses them instead of rebuilding
+
 matplotlib_test -- a simple test file of dynamic non blocking graphs
 
+Registry -- the entity id allocator and the O(1) entity sets every entity list is kept in
+
+Spatial -- a uniform grid spatial hash for nearest and within radius queries over 2d positions
+
+Templates -- the model templates and collision shapes every entity spawn instances from
+
 Terrain -- the class for modular editable terrain
 
 Util -- a simple class of helper function
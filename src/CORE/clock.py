@@ -0,0 +1,91 @@
+"""
+This module provides the `SimClock` class, the one clock every part of the simulation reads time from.
+
+The round manager, entity movement, fitness timing and the physics step all read the simulation
+clock instead of `time.time()` or `globalClock`, so the simulation no longer depends on wall time.
+The clock either follows the frame time of Panda's `globalClock` (real time, what the windowed app uses)
+or advances by a fixed tick length every frame, which makes results independent of fps and lets
+a headless run go as fast as the CPU allows.
+
+Classes:
+- SimClock: the simulation clock, advanced once per frame by a task.
+
+Example Usage:
+    from CORE.clock import SimClock
+
+    clock = SimClock(fixed_dt=1/60)
+    clock.start(base.task_mgr)
+    clock.get_time()  # seconds of simulated time
+"""
+
+
+from direct.showbase.ShowBaseGlobal import globalClock
+from direct.task import Task
+
+
+class SimClock():
+    """
+    The simulation clock.
+
+    Attributes:
+        TASK_SORT (int): the task sort of the tick task, negative so the clock advances before anything reads it.
+        fixed_dt (float): the fixed tick length in seconds, or None to follow the frame time.
+        time (float): seconds of simulated time since the clock was created.
+        dt (float): the length of the last tick in seconds.
+        tick_count (int): how many ticks have run.
+
+    Methods:
+        start(task_mgr): add the task that advances the clock once per frame.
+        tick(): advance the clock by one tick.
+        get_dt(): the length of the last tick in seconds.
+        get_time(): seconds of simulated time.
+        is_fixed(): is the clock using a fixed tick length.
+    """
+    TASK_SORT = -100
+
+    def __init__(self, fixed_dt=None):
+        """create the clock
+
+        Args:
+            fixed_dt (float, optional): the fixed tick length in seconds. Defaults to None, follow globalClock.
+        """
+        self.fixed_dt = fixed_dt
+        self.time = 0.0
+        self.dt = 0.0
+        self.tick_count = 0
+
+    def start(self, task_mgr):
+        """add the task that advances the clock once per frame
+
+        Args:
+            task_mgr (TaskManager): the task manager of the app
+        """
+        task_mgr.add(self.tick_task, "sim-clock-tick", sort=self.TASK_SORT)
+
+    def tick_task(self, task):
+        """advance the clock, run every frame before any other task"""
+        self.tick()
+        return Task.cont
+
+    def tick(self):
+        """advance the clock by one tick
+
+        Returns:
+            float: the length of the tick in seconds
+        """
+        self.dt = self.fixed_dt if self.is_fixed() else globalClock.getDt()
+        self.time += self.dt
+        self.tick_count += 1
+        return self.dt
+
+    def get_dt(self):
+        """the length of the last tick in seconds"""
+        return self.dt
+
+    def get_time(self):
+        """seconds of simulated time since the clock was created"""
+        return self.time
+
+    def is_fixed(self):
+        """is the clock using a fixed tick length"""
+        return self.fixed_dt != None
@@ -0,0 +1,150 @@
+"""
+This module provides the `CollisionGroups` and `ContactStats` classes, the Bullet collision filtering of the
+world and a counter of how much contact work Bullet is doing.
+
+Every rigid body used to be in every collision group, so Bullet found and solved pairs between every
+critter, food, corpse and house that got near each other even though eating, fighting and arriving are
+all decided by distance checks in `Critter`. With the `groups-mask` filter algorithm (set in
+`config/Config.prc`) each body is put in one group and only the group pairs in `CollisionGroups.COLLIDES`
+ever reach the narrowphase: everything rests on the terrain, critters bump into each other and into houses,
+food and corpses touch nothing but the terrain.
+
+Classes:
+- CollisionGroups: the collision group of every entity type and the group pairs that collide.
+- ContactStats: counts broadphase pairs, touching contact pairs and awake bodies of a world per tick.
+
+Example Usage:
+    from CORE.collision import CollisionGroups, ContactStats
+
+    CollisionGroups.setup(world)  # before any body is attached
+    node.setIntoCollideMask(CollisionGroups.mask(CollisionGroups.FOOD))
+
+    stats = ContactStats()
+    stats.sample(world)  # once per tick
+    print(stats.summary())
+"""
+
+from panda3d.core import BitMask32
+
+
+class CollisionGroups():
+    """
+    The collision groups of the world, a body collides with another only if their groups are paired in COLLIDES.
+
+    Attributes:
+        TERRAIN (int): the group of the terrain collider tiles.
+        CRITTER (int): the group of critters.
+        FOOD (int): the group of food.
+        CORPSE (int): the group of corpses.
+        CITY (int): the group of city houses.
+        GROUPS (tuple): every group in use.
+        COLLIDES (tuple): the (group, group) pairs that collide, every other pair is filtered out.
+
+    Methods:
+        mask(group): the collide mask that puts a body in a group.
+        collides(a, b): do two groups collide.
+        setup(world): set the group collision flags of a world.
+    """
+    TERRAIN = 0
+    CRITTER = 1
+    FOOD = 2
+    CORPSE = 3
+    CITY = 4
+
+    GROUPS = (TERRAIN, CRITTER, FOOD, CORPSE, CITY)
+
+    COLLIDES = (
+        (CRITTER, TERRAIN),
+        (FOOD, TERRAIN),
+        (CORPSE, TERRAIN),
+        (CITY, TERRAIN),
+        (CRITTER, CRITTER),
+        (CRITTER, CITY),
+    )
+
+    @staticmethod
+    def mask(group):
+        """the collide mask that puts a body in a group
+
+        Args:
+            group (int): the group
+
+        Returns:
+            BitMask32: the mask, pass it to setIntoCollideMask
+        """
+        return BitMask32.bit(group)
+
+    @classmethod
+    def collides(cls, a, b):
+        """do two groups collide
+
+        Args:
+            a (int): a group
+            b (int): another group, may be the same one
+        """
+        return (a, b) in cls.COLLIDES or (b, a) in cls.COLLIDES
+
+    @classmethod
+    def setup(cls, world):
+        """set the group collision flags of a world, pairs already found by the broadphase are not filtered so call it before attaching bodies
+
+        Args:
+            world (BulletWorld): the world
+        """
+        for a in cls.GROUPS:
+            for b in cls.GROUPS:
+                world.setGroupCollisionFlag(a, b, cls.collides(a, b))
+
+
+class ContactStats():
+    """
+    Counts how much contact work a Bullet world does, sampled once per tick and summarized as per tick averages.
+
+    Attributes:
+        ticks (int): how many ticks were sampled.
+        pairs (int): the sum over the sampled ticks of the pairs that got past the broadphase and filtering.
+        touching (int): the sum of the pairs that had at least one contact point.
+        awake (int): the sum of the rigid bodies that were not asleep.
+        bodies (int): the sum of every rigid body in the world.
+
+    Methods:
+        sample(world): add the counts of one tick.
+        reset(): forget every sample.
+        summary(): the per tick averages as a string.
+    """
+
+    def __init__(self):
+        """create the stats with no samples"""
+        self.reset()
+
+    def reset(self):
+        """forget every sample"""
+        self.ticks = 0
+        self.pairs = 0
+        self.touching = 0
+        self.awake = 0
+        self.bodies = 0
+
+    def sample(self, world):
+        """add the counts of one tick
+
+        Args:
+            world (BulletWorld): the world, sample it after it was stepped
+        """
+        manifolds = world.getManifolds()
+        bodies = world.getRigidBodies()
+        self.ticks += 1
+        self.pairs += len(manifolds)
+        self.touching += sum(1 for manifold in manifolds if manifold.getNumManifoldPoints() > 0)
+        self.awake += sum(1 for body in bodies if body.isActive())
+        self.bodies += len(bodies)
+
+    def summary(self):
+        """the per tick averages
+
+        Returns:
+            str: pairs, touching pairs, awake and total bodies per tick
+        """
+        ticks = max(self.ticks, 1)
+        return (f"contact pairs/tick: {self.pairs/ticks:.1f}, touching/tick: {self.touching/ticks:.1f}, "
+                f"awake bodies/tick: {self.awake/ticks:.1f} of {self.bodies/ticks:.1f} over {self.ticks} ticks")
@@ -13,12 +13,16 @@ Classes:
 Dependencies:
     - Panda3D's `DirectObject`, `Vec3`, and Bullet physics modules.
     - Genetic algorithm utilities from the `GA` package (e.g., `Gene`).
-    - Utility functions from `CORE.util`.
+    - The batched movement step of `CORE.movement`, reached through the base app.
+    - `CORE.pool` for the per type pools of detached bodies that spawn reuses.
+    - `CORE.templates` for the model templates and collision shapes shared by every spawn.
+    - `CORE.registry` for the id allocator and the O(1) sets entities are kept in.
+    - `CORE.collision` for the collision group each entity type's rigid body is put in.
 
 Key Features:
     - Physics-enabled movement and collision detection.
     - Genetic-based behavior customization via `Gene` objects.
-    - Pathfinding and movement tasks.
+    - Goal based movement, moved every tick by the base app's `MovementSystem`.
     - Interaction capabilities, such as eating, fighting, and color changes.
     - Static management of all entities within the simulation world.
 
@@ -35,21 +39,47 @@ Typical Usage Example:
 
 
 from direct.showbase.DirectObject import DirectObject
-from direct.task import Task
 from panda3d.core import Vec3
 from GA.Gene import Gene
+from GA.Genome import DEFAULT_SCHEMA
 import numpy as np
-from direct.showbase.ShowBaseGlobal import globalClock
-from panda3d.bullet import BulletBoxShape,BulletRigidBodyNode
+import math
+from panda3d.bullet import BulletRigidBodyNode
+from CORE.templates import TemplateRegistry
+from CORE.registry import EntityRegistry, EntitySet
+from CORE.collision import CollisionGroups
 import random
 
-from CORE.util import Util
-
 class Entity(DirectObject):
-    """the parent class of anything in the world that can move and interact"""
-    entities = []
+    """the parent class of anything in the world that can move and interact
+    
+    Attributes:
+        registry (EntityRegistry): the id allocator and id -> entity lookup of every spawned entity.
+        entities (EntitySet): every spawned entity, the registry's set.
+        pool (EntityPool): the free bodies of this entity type, None for types that are not pooled.
+        templates (TemplateRegistry): the shared model templates and collision shapes.
+        collision_group (int): the CollisionGroups group of this type's rigid bodies, None collides with everything.
+        model_path (str): the model this entity is drawn with.
+        model (NodePath): the holder of this entity's model instance, None until spawned.
+        node (BulletRigidBodyNode): the rigid body once spawned, always None in kinematic mode.
+        body_np (NodePath): the NodePath the entity is positioned by, the rigid body's or a plain node in kinematic mode.
+        genes (list): the `Gene` objects of this entity, an entity made from a genome matrix row builds them the first time they are read.
+        genome_row ((GenomeMatrix, int)): the matrix row the genes are built from, None once they are built or when the entity was given genes.
+    """
+    #every spawned entity, ids are handed out here and never repeat
+    registry = EntityRegistry()
+    entities = registry.entities
+    
+    #types that come and go every round set their own pool, see CORE.pool
+    pool = None
     
-    def __init__(self, base, model="./assets/models/critter.obj", node=None,id=None,color=None,body_np=None,position=(0,0,0), genes=None):
+    #the model templates and collision shapes every spawn instances from
+    templates = TemplateRegistry()
+    
+    #which bodies this type collides with, see CORE.collision
+    collision_group = None
+    
+    def __init__(self, base, model="./assets/models/critter.obj", node=None,id=None,color=None,body_np=None,position=(0,0,0), genes=None, genome_row=None):
         """the base entity class
 
         Args:
@@ -60,65 +90,72 @@ class Entity(DirectObject):
             color (_type_, optional): the color (0,3,5,2). Defaults to None.
             body_np (_type_, optional): _description_. Defaults to None.
             position (tuple, optional): _description_. Defaults to (0,0,0).
+            genes (list, optional): the `Gene` objects of this entity. Defaults to None, the schema's starting genes.
+            genome_row ((GenomeMatrix, int), optional): take the genes from a row of a genome matrix instead, the `Gene` objects are only built if something reads `genes`. Defaults to None.
+        """
+        self.init_entity(base, model, node, id, color, body_np, genes, genome_row)
+        
+        #state types like Critter keep in population table columns, a fresh row already holds these
+        self.position = position
+        self.spawned=False
+        self.food_eaten = 0
+        self.enemiesEaten = 0
+        self.eaten=False
+        self.times_eaten = 0
+        
+    def init_entity(self, base, model="./assets/models/critter.obj", node=None, id=None, color=None, body_np=None, genes=None, genome_row=None, gene_values=None):
+        """set up every attribute of an entity that is not kept in a population table. __init__ and bulk
+        constructors like `Critter.create_many` both go through here, so a field added here is on every entity
+
+        Args:
+            see __init__
+            gene_values (np.ndarray, optional): the genome row's values already copied out of the matrix. Defaults to None, copy them here.
         """
-        super().__init__()
+        DirectObject.__init__(self)
         self.base=base
         self.id = id
         self.color=color
         self.node=node
         self.body_np=body_np
-        self.position = position
-        self.spawned=False
-        self.model=model
+        self.model_path=model
+        self.model=None #the holder NodePath of the visual model once spawned
         self.speed=100 #default
-        self.children = []
-        self.move_task_ref = None
+        self.children = EntitySet()
         self.can_be_eaten = True
         
         self.currentPath = [] #an array of the current path of vector3 nodes to follow
         self.currentDirection = (0,0,0)
         self.currentGoal = (0,0,0)
         
-        self.food_eaten = 0
-        self.enemiesEaten = 0
-        
-        self.genes = genes if genes is not None else [
-            Gene("Strength", .5, min_value=0.5, max_value=2.0),
-            
-            Gene("Jump Strength", 1.1, min_value=1, max_value=5.0),
-            Gene("Speed", 1.1, min_value=1, max_value=5.0),
-            Gene("Jump Chance", .5, min_value=0, max_value=100),
-            Gene("Random Motion Chance", 1, min_value=0, max_value=100),
-            Gene("Random Motion -X Strength", .1, min_value=.1, max_value=10),
-            Gene("Random Motion +X Strength", .1, min_value=.1, max_value=10),
-            Gene("Random Motion -Y Strength", .1, min_value=.1, max_value=10),
-            Gene("Random Motion +Y Strength", .1, min_value=.1, max_value=10),
-            Gene("Random Motion -Z Strength", .1, min_value=.1, max_value=10),
-            Gene("Random Motion +Z Strength", .1, min_value=.1, max_value=10),
-            
-            Gene("Max Food", .7, min_value=.7, max_value=10), # how much can this critter eat before they must return home
-            Gene("Closest Food First", .5, min_value=0, max_value=1), #how often does this critter prioritize the closest food 
-            Gene("Random Food First", .5, min_value=0, max_value=1), #how often does this critter prioritize the closest food 
-            Gene("Checks Eaten", .5, min_value=0, max_value=1), #how often does this critter check if the food is eaten before deciding to go to it?
-            Gene("Close Threshold", 30, min_value=10, max_value=500), # how far can a food be for this critter to be okay with it
-            Gene("Change Mind Chance", .0001, min_value=0, max_value=.1, mutation_step=.0002), # how often does this critter change its mind on its goal?
-        
-            Gene("Eat Other Tribes Chance", .0001, min_value=0, max_value=1, mutation_step=.001), #how often does this critter try to eat enemies
-        
-            Gene("Cannibalism Chance", .0001, min_value=0, max_value=1, mutation_step=.001), # how often does this critter eat its allies
-            Gene("Cannibalism Wait", 3, min_value=0, max_value=100, mutation_step=3), #on avg how long will they wait before turning to cannibalism
-            Gene("Smart Cannibalism", .1, min_value=0, max_value=1, mutation_step=.01), # less likely to target critters with more food than it can carry
-            
-            
-            Gene("x-nest-offset", 0, min_value=-200, max_value=200, mutation_step=100), # what offset from the nest does this critter like to wait at
-            Gene("y-nest-offset", 0, min_value=-200, max_value=200, mutation_step=100), # what offset from the nest does this critter like to wait at
-        ]  # Default to a strength gene
-        
-        self.apply_all_genes()
-        self.eaten=False
-        self.times_eaten = 0
+        #the compiled gene layout, every gene has a fixed index into self.gene_values
+        self.genome_schema = DEFAULT_SCHEMA
+        if(genome_row != None):
+            #the values are all that is needed to act, 23 Gene objects per entity are only built when asked for
+            matrix, row = genome_row
+            self.genome_schema = matrix.schema
+            self._genes = None
+            self.genome_row = genome_row
+            self.apply_all_genes(gene_values if gene_values is not None else matrix.values[row].copy())
+        else:
+            self.genes = genes if genes is not None else self.genome_schema.create_genes()
+            self.gene_values = None
+            self.apply_all_genes()
         self.max_times_eaten = 1
         
+    @property
+    def genes(self):
+        """the `Gene` objects of this entity, built from the genome matrix row the first time they are read"""
+        if(self._genes is None and self.genome_row is not None):
+            matrix, row = self.genome_row
+            self._genes = matrix.genes(row)
+            self.genome_row = None
+        return self._genes
+    
+    @genes.setter
+    def genes(self, genes):
+        self._genes = genes
+        self.genome_row = None
+        
     def eat(self):
         """simulate a critter eating this food
         
@@ -133,6 +170,8 @@ class Entity(DirectObject):
         self.times_eaten+=1
         if(self.times_eaten >= self.max_times_eaten):
             self.eaten=True
+            #anyone still going for this has to pick something else
+            self.base.critter_system.target_eaten(self)
             self.remove()
             
             
@@ -143,64 +182,60 @@ class Entity(DirectObject):
         """return all entities that have been spawned"""
         return Entity.entities
     
+    @staticmethod
+    def get_entity(id):
+        """return the spawned entity with an id, None if there is none"""
+        return Entity.registry.get(id)
+    
     @staticmethod
     def add_entity(entity):
-        """add a entity to the global array of all entities
+        """add a entity to the registry of all entities
 
         Args:
             entity (Entity): the entity to add
         """
-        Entity.entities.append(entity)
+        Entity.registry.register(entity)
     
     @staticmethod
     def remove_entity(entity):
-        """Remove an entity from the global array of all entities.
+        """Remove an entity from the registry of all entities.
 
         Args:
             entity (Entity): The entity to remove
         """
-        Entity.remove_entity_from_list(entity,Entity.entities)
+        Entity.registry.unregister(entity)
             
     @staticmethod
-    def remove_entity_from_list(entity,list):
-        """Remove an entity from the global array of all entities.
+    def remove_entity_from_list(entity,entities):
+        """Remove an entity from a set of entities, O(1) for an EntitySet.
 
         Args:
             entity (Entity): The entity to remove
+            entities (EntitySet): the set to remove it from, a plain list still works but is O(n)
         """
-        try:
-            list.remove(entity)
-            #print(f"Entity {entity} removed successfully.")
-        except ValueError:
-            print(f"Entity {entity} not found in the list.")
+        if(isinstance(entities, EntitySet)):
+            entities.discard(entity)
+        elif(entity in entities):
+            entities.remove(entity)
     
     @staticmethod        
     def remove_list_of_entities(entities):
-        """loop through a list of entities and remove each
-        
+        """remove every entity in a set of entities and empty the set, each removal is O(1) so this is O(n)
 
         Args:
-            entities (_type_): _description_
+            entities (EntitySet): the entities
         """
-        #TODO: refactor this it is bad
-        i=0
-        list_size = len(entities)
-        while i in range(list_size):
-            entity = entities[i]
+        #each remove takes the entity out of this set, so walk a copy
+        for entity in list(entities):
             entity.remove()
-            
-            if(list_size != len(entities)):
-                list_size=len(entities)
-            else:
-                i+=1
+        entities.clear()
                 
     def reset_move_task(self):
-        """remove the current move task """
-        if(self.move_task_ref != None):
-            self.base.taskMgr.remove(self.move_task_ref)
+        """stop moving, takes this entity out of the movement system """
+        self.base.movement_system.remove(self)
                 
     def move_to(self,vec3):
-        """move from pos to target vec3 over s seconds
+        """move from pos to target vec3, the movement system moves this entity every tick until it gets there
 
         Args:
             vec3 (vec3): vector3
@@ -210,23 +245,15 @@ class Entity(DirectObject):
             pos = vec3.get_pos()
         
         self.currentGoal=Vec3(pos)
-        self.reset_move_task()
-        
-        self.move_task_ref = self.base.task_mgr.add(self.move_task, f"entity{self.id}-move-task-to{vec3}")
+        self.base.movement_system.add(self)
         
     def distance(self,point):
         """get the 2d euclid distance between this and another point or entity"""
         self_pos = self.get_pos()
         other_pos = point
         if(hasattr(point,"get_pos")):
-            other_pos=Vec3(point.get_pos())
-        else:
-            other_pos=Vec3(point)
-        distance = np.linalg.norm(
-            np.array([self_pos.getX(), self_pos.getY()]) -
-            np.array([other_pos.getX(), other_pos.getY()])
-        )
-        return distance
+            other_pos = point.get_pos()
+        return math.hypot(self_pos[0] - other_pos[0], self_pos[1] - other_pos[1])
             
     def get_all_genes_as_str(self):
         string = ""
@@ -255,109 +282,42 @@ class Entity(DirectObject):
             print(f"error in entity.dist_to_point:\n{e}")
             return False
         
-    def move_task(self,task):
-        if(not self.currentGoal or self.dist_to_point(self.currentGoal,20)):
-            #reached goal
-            self.currentGoal=None
-            self.base.set_critter_height(self.body_np, self.get_pos().getX(), self.get_pos().getY())
+    def reached_goal(self):
+        """called by the movement system once this entity reached its goal, settle it onto the terrain"""
+        self.currentGoal=None
+        self.base.set_critter_height(self.body_np, self.get_pos().getX(), self.get_pos().getY())
+        if(self.node != None):
             self.node.setLinearVelocity(Vec3(0, 0, .005))
             self.node.setAngularVelocity(Vec3(0, 0, 0))
-            return Task.done
-            
-        else:
-            #has not reached goal
-            self.move_tick(self.currentGoal)
-            return Task.cont
         
     def get_gene(self,name):
-        """get the value of a gene via the name"""
-        #get the value of the gene, but if we cant find it on this critter but it is requested anyways we will search the gene bank and give this 
-        #critter the min value for that gene
-        default = 0
-        for gene in Gene.genes:
-            if(gene.name == name):
-                default = gene.min_value
-                
-        return getattr(self,name,default)
-        
-    def apply_all_genes(self):
-        """propagate all gene changes to this critter"""
-        for gene in self.genes:
-            gene.apply(self)
+        """get the value of a gene via the name, one dict lookup and one array index"""
+        return self.gene_values.item(self.genome_schema.index[name])
+    
+    def set_gene(self,name,value):
+        """set the value of a gene via the name
+
+        Args:
+            name (str): the name of the gene
+            value (float): the new value
+        """
+        self.gene_values[self.genome_schema.index[name]] = value
         
-    def move_tick(self,goal_point,extra_speed_mod=1,phys=True):
-        from main import BaseApp
-        direction = (goal_point - self.get_pos()).normalized()
-        jump_strength = self.get_gene("Jump Strength")
-        up_vector = Vec3(0,0,1)
-        
-        distance_to_move = self.get_gene("Speed") * self.speed * globalClock.getDt() * extra_speed_mod
-        target_pos = Vec3(Vec3(self.get_pos()) + Vec3(direction*3))
-        should_jump = False
-        
-        #check ahead to see if we need to jump via sampling
-        linspace = np.linspace(.1,10,20)
-        for value in linspace:
-            target_pos = Vec3(self.get_pos()) + Vec3(direction*value)
-            ahead_z_pos = self.base.terrainController.get_height_at(int(target_pos.getX()), int(target_pos.getY())) - self.base.terrainController.get_height_at(int(self.get_pos().getX()), int(self.get_pos().getY()))
-            if ahead_z_pos > 0:
-                should_jump=True
-        
-        
-        z_difference = self.get_pos().getZ() - self.base.terrainController.get_height_at(int(self.get_pos().getX()), int(self.get_pos().getY()))
-        
-        #print(f"aheadz:{ahead_z_pos}")
-        self.node.clear_forces()
-        
-        if(should_jump):
-            #print("jump")
-            #self.node.apply_central_impulse(up_vector*jump_strength)
-            direction+=up_vector*jump_strength
-        elif(z_difference > 30):
-            #print("fall faster")
-            direction+=-up_vector*jump_strength
-            #self.node.apply_central_impulse()
-            
-        #random jumping to ensure no stuck
-        if(random.randint(0,100) < self.get_gene("Jump Chance")):
-            self.body_np.set_pos(self.get_pos()+Vec3(0,0,jump_strength))
-            
+    def apply_all_genes(self, values=None):
+        """propagate all gene changes to this critter, genes this critter does not carry fall back to their min value
+
+        Args:
+            values (np.ndarray, optional): the gene values already packed in schema order. Defaults to None, pack them from the genes.
+        """
+        self.gene_values = values if values is not None else self.genome_schema.values_of(self.genes)
         
-            
-        #cannot fall below 0
-        pos = self.body_np.get_pos()
-        pos[2]=Util.clamp(pos[2],0,999999)
-        self.body_np.set_pos(pos)
-        
-        self.node.active=True
-        
-        #phys based movement or direct move?
-        if(phys):
-            self.node.apply_central_impulse(direction*distance_to_move)
-            #print(f"random motion chance:{self.get_gene('Random Motion Chance')}")
-            if(random.randint(0,100) < self.get_gene("Random Motion Chance")):
-                #move random
-                random_direction = Vec3(
-                    random.uniform(-self.get_gene("Random Motion -X Strength"),self.get_gene("Random Motion +X Strength")),
-                    random.uniform(-self.get_gene("Random Motion -Y Strength"),self.get_gene("Random Motion +Y Strength")),
-                    random.uniform(-self.get_gene("Random Motion -Z Strength"),self.get_gene("Random Motion +Z Strength")),)
-                self.node.setLinearVelocity(random_direction*distance_to_move*75)
-            else:
-                #move towards
-                self.node.setLinearVelocity(direction*distance_to_move*75)
-           
-        else:
-            new_pos = self.get_pos() + (direction*distance_to_move)
-            #print(f"direction:{direction}.new_pos={new_pos}")
-            self.body_np.set_pos(new_pos)
-                
     def add_child(self,child):
         """add a child to the list of children
 
         Args:
             child (Entity): _description_
         """
-        self.children.append(child)
+        self.children.add(child)
     
     def remove_child(self, child):
         """remove a child if one exists from the list of children
@@ -368,7 +328,12 @@ class Entity(DirectObject):
         self.remove_entity_from_list(child,self.children)
         
     def set_id(self,id=None):
-        if(id==None): id = len(Entity.entities)
+        """give this entity an id, by default a new one from the registry that no other entity ever had
+
+        Args:
+            id (int, optional): the id. Defaults to None, a new id.
+        """
+        if(id==None): id = Entity.registry.allocate_id()
         self.id=id
         
     def remove(self):
@@ -381,12 +346,15 @@ class Entity(DirectObject):
         # Remove the entity's physics node from the physics world
         if self.node is not None:
             self.base.world.removeRigidBody(self.node)
-            self.node = None
 
-        # Detach the entity's NodePath from the scene graph
+        # Detach the entity's NodePath from the scene graph, pooled types keep it for the next spawn
         if self.body_np is not None:
-            self.body_np.removeNode()
-            self.body_np = None
+            if self.pool is not None:
+                self.pool.release(self.body_np, self.node, self.model)
+            else:
+                self.body_np.removeNode()
+        self.node = None
+        self.body_np = None
 
         # Clear additional references
         self.spawned = False
@@ -398,8 +366,38 @@ class Entity(DirectObject):
         self.spawned=False
         
     def update(self,x=None,y=None):
-        self.remove()
-        self.spawn(x,y)
+        """move this entity to a new spot for a new round, a spawned entity is moved in place instead of being removed and spawned again
+
+        Args:
+            x (float, optional): the new x. Defaults to None, the current x.
+            y (float, optional): the new y. Defaults to None, the current y.
+        """
+        if(not self.spawned):
+            self.spawn(x,y)
+            return
+        
+        if(x==None): x = self.position[0]
+        if(y==None): y = self.position[1]
+        if(not self.base.valid_x_y(x,y)):
+            return
+        self.reset_move_task()
+        self.currentGoal = None
+        if(self.node != None):
+            self.node.clearForces()
+            self.node.setLinearVelocity(Vec3(0, 0, 0))
+            self.node.setAngularVelocity(Vec3(0, 0, 0))
+        z = self.base.set_critter_height(self.body_np, x, y)
+        self.position = (x, y, z)
+        #let it settle on the new spot, bullet puts it back to sleep once it is at rest
+        if(self.node != None):
+            self.node.active = True
+        
+    def sleep(self):
+        """put the rigid body to sleep, bullet skips it until something touches it or it is given a velocity again"""
+        if(self.node != None):
+            self.node.setLinearVelocity(Vec3(0, 0, 0))
+            self.node.setAngularVelocity(Vec3(0, 0, 0))
+            self.node.setActive(False, True)
         
     def eat_other(self,other):
         """have this critter eat another critter"""
@@ -415,7 +413,8 @@ class Entity(DirectObject):
         Args:
             color (vector4): (r,g,b,a)
         """
-        self.model.setColor(*color)
+        if(self.model is not None):
+            self.model.setColor(*color)
         
     def fight(self, other, random_chance=.01):
         """have this entity and another fight
@@ -456,7 +455,8 @@ class Entity(DirectObject):
         return Vec3(self.position)
     
     def spawn(self, x=None, y=None, color=None):
-        """a method to bring forth a phys enabled entity at chosen pos, height is automatic based on height map
+        """a method to bring forth a phys enabled entity at chosen pos, height is automatic based on height map.
+        in kinematic mode (`BaseApp.kinematic`) the entity gets a plain node and no rigid body
 
         Args:
             x (float): _description_
@@ -476,38 +476,49 @@ class Entity(DirectObject):
         if(self.spawned): return self
         
         if(self.base.valid_x_y(x,y)):
-        
-            # Load the visual model for the critter
-            blob = self.base.loader.loadModel(self.model)
-            blob.setHpr(0, 0, 0)
-            shape = BulletBoxShape(Vec3(0.5, 0.5, 0.5))
-
-            # Create a BulletRigidBodyNode for physics
-            self.set_id()
-            node = BulletRigidBodyNode(f'Entity-{self.id}')
-
-            # uhhh mass?
-            node.setMass(1.0)
-            node.addShape(shape)
-
-            # Create phys ctrl ish, intermediate connected to real phys controller
-            blob_np = self.base.render.attachNewNode(node)
+            if(self.id == None): self.set_id()
+            
+            #reuse a detached body of this type if there is one, otherwise build it
+            pooled = self.pool.acquire() if self.pool is not None else None
+            if(pooled != None):
+                blob_np, node, blob = pooled
+                blob_np.node().setName(f'Entity-{self.id}')
+                if(node != None):
+                    node.clearForces()
+                    node.setLinearVelocity(Vec3(0, 0, 0))
+                    node.setAngularVelocity(Vec3(0, 0, 0))
+                    node.active = True
+                blob_np.setHpr(0, 0, 0)
+                blob_np.reparentTo(self.base.render)
+            elif(self.base.kinematic):
+                #no rigid body, the movement system places the node on the terrain itself
+                node = None
+                blob_np = self.base.render.attachNewNode(f'Entity-{self.id}')
+                blob = Entity.templates.instance(self.base.loader, self.model_path, blob_np)
+            else:
+                # Create a BulletRigidBodyNode for physics, every body of this type shares one shape
+                node = BulletRigidBodyNode(f'Entity-{self.id}')
 
-            # lights??!?! idk
-            blob.flattenLight()
+                # uhhh mass?
+                node.setMass(1.0)
+                node.addShape(Entity.templates.box_shape(type(self).__name__))
+                if(self.collision_group != None):
+                    node.setIntoCollideMask(CollisionGroups.mask(self.collision_group))
 
-            # Set parent to phys ctrl
-            blob.reparentTo(blob_np)
+                # Create phys ctrl ish, intermediate connected to real phys controller
+                blob_np = self.base.render.attachNewNode(node)
 
-            # Attach to the Bullet physics world
-            self.base.world.attachRigidBody(node)
+                # the visual model, an instance of the shared template under a holder we can color
+                blob = Entity.templates.instance(self.base.loader, self.model_path, blob_np)
 
             # Adjust the critter's height based on the terrain
             z = self.base.set_critter_height(blob_np, x, y)
-            blob_np.get_pos
-            
-            #self.critters.append((node,blob_np))
-            blob.set_scale(10)
+
+            # Attach to the Bullet physics world, only once the body is in place. bodies attached at the origin
+            # all overlap there and bullet keeps every one of those pairs until the next step, which made
+            # every later removeRigidBody scan all of them
+            if(node != None):
+                self.base.world.attachRigidBody(node)
 
             # Assign a random color if none is provided
             if color is None:
@@ -521,7 +532,8 @@ class Entity(DirectObject):
             self.position=(x, y, z)
             self.spawned=True
             
-            self.node.setAngularFactor(Vec3(0, 0, 0))
+            if(self.node != None):
+                self.node.setAngularFactor(Vec3(0, 0, 0))
 
             # Create the critter instance and append to the critter list
             Entity.add_entity(self)
@@ -0,0 +1,241 @@
+"""
+This module provides the `MovementSystem` class, which moves every entity that has a goal in one batched step per tick.
+
+Before this every moving entity ran its own Panda task that built its own lookahead, queried the terrain
+point by point and made its own random rolls. The movement system instead gathers the position, goal and
+genes of every moving entity into NumPy arrays and computes directions, the terrain lookahead, jump
+decisions and random motion for all of them in one pass. The results are then pushed to the Bullet nodes
+in a single loop, so the cost of movement grows with the size of the arrays and not with the number of
+Python task callbacks.
+
+In kinematic mode (`BaseApp.kinematic`) there are no Bullet bodies, entities slide straight towards their
+goal at their speed and are snapped to the terrain height every tick, no jumping or falling is simulated.
+
+The app does not start the movement task itself, the critter system (`GA.CritterSystem`) steps it right
+after the critters think so the whole simulation tick is one task.
+
+Classes:
+- MovementSystem: the batched movement step for all moving entities.
+
+Example Usage:
+    from CORE.movement import MovementSystem
+
+    movement_system = MovementSystem(base)
+    movement_system.start(base.task_mgr)
+    movement_system.add(entity)  # entity.currentGoal must be set
+"""
+
+
+import random
+import numpy as np
+from direct.task import Task
+from panda3d.core import Vec3
+
+from GA.Genome import DEFAULT_SCHEMA
+
+
+class MovementSystem():
+    """
+    Moves every entity that has a goal, one vectorized step per tick.
+
+    Attributes:
+        ARRIVAL_DISTANCE (float): how close (2d) an entity must be to its goal to have reached it.
+        LOOKAHEAD (np.ndarray): the distances ahead of an entity sampled to decide if it should jump.
+        FALL_FASTER_HEIGHT (float): how far above the terrain an entity may be before it is pushed down.
+        VELOCITY_SCALE (float): multiplier from distance to move to linear velocity.
+        base (BaseApp): the base app reference.
+        movers (list): the dense list of moving entities.
+        slots (dict): entity -> index in `movers`.
+        phys (bool): move with impulses and velocities (True) or by setting positions directly (False).
+        kinematic (bool): move along the terrain analytically, entities have no rigid body.
+        rng (np.random.Generator): the random generator used for jump and random motion rolls.
+
+    Methods:
+        start(task_mgr): add the task that runs the movement step every frame.
+        add(entity): start moving an entity towards its `currentGoal`.
+        remove(entity): stop moving an entity.
+        is_moving(entity): is an entity being moved.
+        step(): move every entity one tick.
+    """
+    ARRIVAL_DISTANCE = 20
+    LOOKAHEAD = np.linspace(.1, 10, 20)
+    FALL_FASTER_HEIGHT = 30
+    VELOCITY_SCALE = 75
+
+    #gene indices, read once instead of every tick
+    JUMP_STRENGTH = DEFAULT_SCHEMA.index["Jump Strength"]
+    SPEED = DEFAULT_SCHEMA.index["Speed"]
+    JUMP_CHANCE = DEFAULT_SCHEMA.index["Jump Chance"]
+    RANDOM_MOTION_CHANCE = DEFAULT_SCHEMA.index["Random Motion Chance"]
+    RANDOM_MOTION_NEGATIVE = [DEFAULT_SCHEMA.index[f"Random Motion -{axis} Strength"] for axis in "XYZ"]
+    RANDOM_MOTION_POSITIVE = [DEFAULT_SCHEMA.index[f"Random Motion +{axis} Strength"] for axis in "XYZ"]
+
+    def __init__(self, base, phys=True, kinematic=False):
+        """create the movement system
+
+        Args:
+            base (BaseApp): the base app reference
+            phys (bool, optional): move with impulses and velocities or by setting positions. Defaults to True.
+            kinematic (bool, optional): move along the terrain analytically, implies phys is False. Defaults to False.
+        """
+        self.base = base
+        self.kinematic = kinematic
+        self.phys = phys and not kinematic
+        self.movers = []
+        self.slots = {}
+        #seeded from python's random so seeding that seeds movement too
+        self.rng = np.random.default_rng(random.getrandbits(64))
+
+    def start(self, task_mgr):
+        """add the task that runs the movement step every frame
+
+        Args:
+            task_mgr (TaskManager): the task manager of the app
+        """
+        task_mgr.add(self.movement_task, "movement-system")
+
+    def movement_task(self, task):
+        """run the movement step, called every frame"""
+        self.step()
+        return Task.cont
+
+    def add(self, entity):
+        """start moving an entity towards its `currentGoal`, does nothing if it is already moving
+
+        Args:
+            entity (Entity): the entity
+        """
+        if(entity not in self.slots):
+            self.slots[entity] = len(self.movers)
+            self.movers.append(entity)
+
+    def remove(self, entity):
+        """stop moving an entity, does nothing if it is not moving
+
+        Args:
+            entity (Entity): the entity
+        """
+        slot = self.slots.pop(entity, None)
+        if(slot == None):
+            return
+        #swap the last mover into the hole so the list stays dense
+        last = self.movers.pop()
+        if(last is not entity):
+            self.movers[slot] = last
+            self.slots[last] = slot
+
+    def is_moving(self, entity):
+        """is an entity being moved"""
+        return entity in self.slots
+
+    def step(self):
+        """move every entity one tick.
+
+        entities that reached their goal are removed and have `reached_goal` called, every other entity gets
+        the same movement the old per entity move task gave it, computed for all of them at once.
+        """
+        movers = [entity for entity in self.movers if entity.body_np is not None]
+        if(len(movers) == 0):
+            return
+
+        positions = np.array([entity.body_np.get_pos() for entity in movers], dtype=np.float64)
+        goals = np.array([entity.currentGoal if entity.currentGoal is not None else entity.body_np.get_pos() for entity in movers], dtype=np.float64)
+        has_goal = np.array([entity.currentGoal is not None for entity in movers])
+
+        offsets = goals - positions
+        arrived = ~has_goal | (np.hypot(offsets[:, 0], offsets[:, 1]) <= self.ARRIVAL_DISTANCE)
+
+        moving = np.flatnonzero(~arrived)
+        if(len(moving) > 0):
+            self.move(
+                [movers[i] for i in moving],
+                positions[moving],
+                offsets[moving]
+            )
+
+        #callbacks last, they can start new moves or remove other entities
+        for i in np.flatnonzero(arrived):
+            entity = movers[i]
+            if(self.is_moving(entity)):
+                self.remove(entity)
+                entity.reached_goal()
+
+    def move(self, movers, positions, offsets):
+        """compute and apply one tick of movement for entities that have not reached their goal
+
+        Args:
+            movers (list): the entities
+            positions (np.ndarray): (n,3) their positions
+            offsets (np.ndarray): (n,3) goal minus position
+        """
+        n = len(movers)
+        terrain = self.base.terrainController
+        dt = self.base.sim_clock.get_dt()
+        genes = np.stack([entity.gene_values for entity in movers])
+        speeds = np.array([entity.speed for entity in movers], dtype=np.float64)
+
+        if(self.kinematic):
+            self.move_kinematic(movers, positions, offsets, genes[:, self.SPEED] * speeds * dt)
+            return
+
+        norms = np.linalg.norm(offsets, axis=1, keepdims=True)
+        directions = np.divide(offsets, norms, out=np.zeros_like(offsets), where=norms > 0)
+
+        #check ahead to see if we need to jump via sampling
+        ground = terrain.get_heights_at(positions[:, 0].astype(int), positions[:, 1].astype(int))
+        ahead_x = (positions[:, 0:1] + directions[:, 0:1] * self.LOOKAHEAD).astype(int)
+        ahead_y = (positions[:, 1:2] + directions[:, 1:2] * self.LOOKAHEAD).astype(int)
+        ahead = terrain.get_heights_at(ahead_x, ahead_y)
+        should_jump = np.any(ahead - ground[:, None] > 0, axis=1)
+        fall_faster = ~should_jump & (positions[:, 2] - ground > self.FALL_FASTER_HEIGHT)
+
+        jump_strength = genes[:, self.JUMP_STRENGTH]
+        directions[:, 2] += np.where(should_jump, jump_strength, 0) - np.where(fall_faster, jump_strength, 0)
+
+        distance_to_move = genes[:, self.SPEED] * speeds * dt
+
+        #random jumping to ensure no stuck
+        new_positions = positions.copy()
+        random_jump = self.rng.integers(0, 101, n) < genes[:, self.JUMP_CHANCE]
+        new_positions[:, 2] += np.where(random_jump, jump_strength, 0)
+
+        #cannot fall below 0
+        new_positions[:, 2] = np.maximum(new_positions[:, 2], 0)
+
+        #phys based movement or direct move?
+        if(self.phys):
+            impulses = directions * distance_to_move[:, None]
+            random_motion = self.rng.integers(0, 101, n) < genes[:, self.RANDOM_MOTION_CHANCE]
+            random_directions = self.rng.uniform(-genes[:, self.RANDOM_MOTION_NEGATIVE], genes[:, self.RANDOM_MOTION_POSITIVE])
+            velocities = np.where(random_motion[:, None], random_directions, directions) * (distance_to_move * self.VELOCITY_SCALE)[:, None]
+        else:
+            new_positions += directions * distance_to_move[:, None]
+
+        for i, entity in enumerate(movers):
+            entity.body_np.set_pos(*new_positions[i])
+            if(self.phys):
+                node = entity.node
+                node.clear_forces()
+                node.active = True
+                node.apply_central_impulse(Vec3(*impulses[i]))
+                node.setLinearVelocity(Vec3(*velocities[i]))
+
+    def move_kinematic(self, movers, positions, offsets, distance_to_move):
+        """slide entities straight towards their goal and snap them to the terrain, no physics involved
+
+        Args:
+            movers (list): the entities
+            positions (np.ndarray): (n,3) their positions
+            offsets (np.ndarray): (n,3) goal minus position
+            distance_to_move (np.ndarray): (n,) how far each entity moves this tick
+        """
+        terrain = self.base.terrainController
+        flat = offsets[:, :2]
+        norms = np.linalg.norm(flat, axis=1)
+        #never overshoot the goal
+        steps = np.minimum(distance_to_move, norms)
+        scale = np.divide(steps, norms, out=np.zeros_like(norms), where=norms > 0)
+        xy = positions[:, :2] + flat * scale[:, None]
+        z = terrain.get_heights_at(xy[:, 0], xy[:, 1], bilinear=True) + self.base.critter_offset_z
+        for i, entity in enumerate(movers):
+            entity.body_np.set_pos(xy[i, 0], xy[i, 1], z[i])
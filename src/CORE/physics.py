@@ -0,0 +1,121 @@
+"""
+This module provides the `PhysicsStepper` class, the fixed step driver of the Bullet world.
+
+`update_grav` used to hand the raw frame dt to `world.doPhysics`, so a slow frame made Bullet integrate
+one large step and two runs of the same seed did not step the same way. The stepper keeps an accumulator
+of simulated time and advances the world in whole fixed steps only, at most `max_substeps` per frame.
+Time past that cap is dropped instead of carried over, otherwise a frame that was slow because it caught up
+would make the next frame catch up even more (the spiral of death). Every frame's counts are kept so runs
+can report how much stepping they did and how often they fell behind.
+
+Classes:
+- PhysicsStepper: the fixed step accumulator and its stepping counts.
+
+Example Usage:
+    from CORE.physics import PhysicsStepper
+
+    stepper = PhysicsStepper(step=1/60, max_substeps=4)
+    stepper.advance(world, dt)  # once per frame
+    print(stepper.summary())
+"""
+
+
+class PhysicsStepper():
+    """
+    Advances a Bullet world in fixed steps.
+
+    Attributes:
+        EPSILON (float): slack so an accumulator that is a float rounding short of a step still takes it.
+        step (float): the fixed physics step in seconds.
+        max_substeps (int): the most steps taken in one frame, the rest of the frame's time is dropped.
+        accumulator (float): simulated seconds not yet stepped, always less than one step after a frame.
+        frames (int): how many frames advanced the stepper.
+        substeps (int): how many fixed steps were taken.
+        idle_frames (int): frames that took no step because less than a step of time had built up.
+        capped_frames (int): frames that hit max_substeps and dropped time.
+        dropped_time (float): simulated seconds dropped by capped frames.
+        most_substeps (int): the most steps taken in a single frame.
+
+    Methods:
+        advance(world, dt): add a frame's time and take the whole steps it allows.
+        reset_stats(): zero the stepping counts, the accumulator is kept.
+        stats(): the stepping counts as a dict.
+        summary(): the stepping counts as a string.
+    """
+    EPSILON = 1e-9
+
+    def __init__(self, step=1/60, max_substeps=4):
+        """create the stepper
+
+        Args:
+            step (float, optional): the fixed physics step in seconds. Defaults to 1/60.
+            max_substeps (int, optional): the most steps taken in one frame. Defaults to 4.
+        """
+        self.step = step
+        self.max_substeps = max(int(max_substeps), 1)
+        self.accumulator = 0.0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """zero the stepping counts, the accumulator is kept so stepping is not disturbed"""
+        self.frames = 0
+        self.substeps = 0
+        self.idle_frames = 0
+        self.capped_frames = 0
+        self.dropped_time = 0.0
+        self.most_substeps = 0
+
+    def advance(self, world, dt):
+        """add a frame's time and step the world once per whole fixed step, at most max_substeps times
+
+        Args:
+            world (BulletWorld): the world to step
+            dt (float): the frame's simulated time in seconds
+
+        Returns:
+            int: how many steps were taken
+        """
+        self.accumulator += dt
+        count = int((self.accumulator + self.EPSILON) / self.step)
+        if(count > self.max_substeps):
+            #drop what we cannot afford, carrying it over would only make the next frame slower
+            dropped = self.accumulator - self.max_substeps * self.step
+            self.capped_frames += 1
+            self.dropped_time += dropped
+            self.accumulator -= dropped
+            count = self.max_substeps
+        #one bullet substep per call, bullet's own accumulator always lands exactly on the step
+        for _ in range(count):
+            world.doPhysics(self.step, 1, self.step)
+        self.accumulator = max(self.accumulator - count * self.step, 0.0)
+
+        self.frames += 1
+        self.substeps += count
+        if(count == 0): self.idle_frames += 1
+        self.most_substeps = max(self.most_substeps, count)
+        return count
+
+    def stats(self):
+        """the stepping counts
+
+        Returns:
+            dict: frames, substeps, idle_frames, capped_frames, dropped_time and most_substeps
+        """
+        return {
+            "frames": self.frames,
+            "substeps": self.substeps,
+            "idle_frames": self.idle_frames,
+            "capped_frames": self.capped_frames,
+            "dropped_time": self.dropped_time,
+            "most_substeps": self.most_substeps,
+        }
+
+    def summary(self):
+        """the stepping counts as a string
+
+        Returns:
+            str: substeps per frame, capped frames and dropped time
+        """
+        frames = max(self.frames, 1)
+        return (f"physics substeps/frame: {self.substeps/frames:.2f} (max {self.most_substeps}), "
+                f"idle frames: {self.idle_frames}, capped frames: {self.capped_frames}, dropped: {self.dropped_time:.3f}s")
@@ -0,0 +1,71 @@
+"""
+This module provides the `EntityPool` class, a free list of detached entity bodies for one entity type.
+
+Spawning an entity loads its model, builds a `BulletRigidBodyNode` and attaches both to the scene graph
+and physics world. Every round turnover used to remove every food, corpse and critter and spawn fresh ones,
+so each round rebuilt all of that. With a pool, removing an entity only detaches its body NodePath and takes
+its rigid body out of the physics world, and the next spawn of that type resets and re-attaches it.
+
+Classes:
+- EntityPool: the free list of detached bodies of one entity type.
+
+Example Usage:
+    from CORE.pool import EntityPool
+
+    class Food(Entity):
+        pool = EntityPool()  # Entity.spawn and Entity.remove use it from now on
+"""
+
+
+class EntityPool():
+    """
+    A free list of detached entity bodies.
+
+    Attributes:
+        bodies (list): the free (body NodePath, BulletRigidBodyNode, model NodePath) bodies.
+        created (int): how many bodies were built because the pool was empty.
+        reused (int): how many spawns took a body from the pool.
+
+    Methods:
+        __len__(): how many free bodies are in the pool.
+        acquire(): take a free body, None if the pool is empty.
+        release(body_np, node, model): put a detached body back.
+        clear(): forget every free body.
+    """
+
+    def __init__(self):
+        """create an empty pool"""
+        self.bodies = []
+        self.created = 0
+        self.reused = 0
+
+    def __len__(self):
+        """how many free bodies are in the pool"""
+        return len(self.bodies)
+
+    def acquire(self):
+        """take a free body, the caller re-attaches it to the scene graph and physics world
+
+        Returns:
+            (NodePath, BulletRigidBodyNode, NodePath): the body, or None if the pool is empty and the caller must build one
+        """
+        if(len(self.bodies) == 0):
+            self.created += 1
+            return None
+        self.reused += 1
+        return self.bodies.pop()
+
+    def release(self, body_np, node, model):
+        """put a body back, the caller has already taken its node out of the physics world
+
+        Args:
+            body_np (NodePath): the body NodePath, detached from the scene graph here
+            node (BulletRigidBodyNode): the rigid body of the body NodePath, None in kinematic mode
+            model (NodePath): the visual model parented under the body NodePath
+        """
+        body_np.detachNode()
+        self.bodies.append((body_np, node, model))
+
+    def clear(self):
+        """forget every free body"""
+        self.bodies.clear()
@@ -0,0 +1,202 @@
+"""
+This module provides the `EntitySet` and `EntityRegistry` classes, O(1) bookkeeping for every entity in the world.
+
+Entities used to live in plain lists. Removing one was a `list.remove` scan, clearing a whole list removed its
+entities one scan at a time and ids were `len(Entity.entities)` so they repeated once anything was removed.
+An `EntitySet` is a dense list plus an item -> index dict, removal swaps the last item into the hole so adding,
+removing and membership are all O(1) and clearing is one pass. The `EntityRegistry` hands out ids that never
+repeat and keeps an id -> entity dict of every spawned entity.
+
+Classes:
+- EntitySet: an insertion ordered set with O(1) add, remove and index access, usable with `random.shuffle`.
+- EntityRegistry: the monotonic id allocator and id -> entity lookup of spawned entities.
+
+Example Usage:
+    from CORE.registry import EntitySet, EntityRegistry
+
+    foods = EntitySet()
+    foods.add(food)
+    foods.remove(food)
+
+    registry = EntityRegistry()
+    food.id = registry.allocate_id()
+    registry.register(food)
+    registry.get(food.id)  # food
+"""
+
+
+class EntitySet():
+    """
+    A dense list of items plus an item -> index dict.
+
+    Attributes:
+        items (list): the items, dense. removal moves the last item into the removed item's slot.
+        index (dict): item -> its index in `items`.
+
+    Methods:
+        add(item): add an item, does nothing if it is already in the set.
+        append(item): same as add, so the set can stand in for the list it replaced.
+        remove(item): remove an item, does nothing if it is not in the set.
+        discard(item): same as remove.
+        clear(): remove every item.
+        sort(key=None, reverse=False): sort the items in place.
+    """
+
+    def __init__(self, items=()):
+        """create a set
+
+        Args:
+            items (iterable, optional): the starting items, duplicates are dropped. Defaults to ().
+        """
+        self.items = []
+        self.index = {}
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        """how many items are in the set"""
+        return len(self.items)
+
+    def __contains__(self, item):
+        """is an item in the set"""
+        return item in self.index
+
+    def __iter__(self):
+        """iterate the items in their current order"""
+        return iter(self.items)
+
+    def __getitem__(self, i):
+        """the item at an index, a slice gives a list"""
+        return self.items[i]
+
+    def __setitem__(self, i, item):
+        """put an item at an index, used by `random.shuffle` which only ever swaps items already in the set"""
+        self.items[i] = item
+        self.index[item] = i
+
+    def __repr__(self):
+        return f"EntitySet({self.items})"
+
+    def add(self, item):
+        """add an item, does nothing if it is already in the set
+
+        Args:
+            item (object): the item, must be hashable
+        """
+        if(item not in self.index):
+            self.index[item] = len(self.items)
+            self.items.append(item)
+
+    append = add
+
+    def remove(self, item):
+        """remove an item, does nothing if it is not in the set
+
+        Args:
+            item (object): the item
+
+        Returns:
+            bool: was the item in the set
+        """
+        i = self.index.pop(item, None)
+        if(i == None):
+            return False
+        #swap the last item into the hole so the list stays dense
+        last = self.items.pop()
+        if(last is not item):
+            self.items[i] = last
+            self.index[last] = i
+        return True
+
+    discard = remove
+
+    def clear(self):
+        """remove every item"""
+        self.items = []
+        self.index = {}
+
+    def sort(self, key=None, reverse=False):
+        """sort the items in place
+
+        Args:
+            key (function, optional): same as list.sort. Defaults to None.
+            reverse (bool, optional): same as list.sort. Defaults to False.
+        """
+        self.items.sort(key=key, reverse=reverse)
+        self.index = {item: i for i, item in enumerate(self.items)}
+
+
+class EntityRegistry():
+    """
+    The id allocator and id -> entity lookup of spawned entities.
+
+    Attributes:
+        next_id (int): the next id to hand out, ids are never reused.
+        entities (EntitySet): every registered entity.
+        by_id (dict): id -> registered entity.
+
+    Methods:
+        allocate_id(): hand out a new id.
+        register(entity): add a spawned entity.
+        unregister(entity): remove an entity.
+        get(id): the registered entity with an id.
+        clear(): unregister every entity, ids keep counting up.
+    """
+
+    def __init__(self):
+        """create an empty registry"""
+        self.next_id = 0
+        self.entities = EntitySet()
+        self.by_id = {}
+
+    def __len__(self):
+        """how many entities are registered"""
+        return len(self.entities)
+
+    def allocate_id(self):
+        """hand out a new id
+
+        Returns:
+            int: the id, never handed out before
+        """
+        id = self.next_id
+        self.next_id += 1
+        return id
+
+    def register(self, entity):
+        """add a spawned entity, it must already have its id
+
+        Args:
+            entity (Entity): the entity
+        """
+        self.entities.add(entity)
+        self.by_id[entity.id] = entity
+
+    def unregister(self, entity):
+        """remove an entity, does nothing if it is not registered
+
+        Args:
+            entity (Entity): the entity
+
+        Returns:
+            bool: was the entity registered
+        """
+        if(self.by_id.get(entity.id) is entity):
+            del self.by_id[entity.id]
+        return self.entities.remove(entity)
+
+    def get(self, id):
+        """the registered entity with an id
+
+        Args:
+            id (int): the id
+
+        Returns:
+            Entity: the entity, None if no registered entity has that id
+        """
+        return self.by_id.get(id)
+
+    def clear(self):
+        """unregister every entity, ids keep counting up"""
+        self.entities.clear()
+        self.by_id = {}
@@ -0,0 +1,187 @@
+"""
+This module provides the `SpatialGrid` class, a uniform grid spatial hash over 2d positions.
+
+Items are bucketed into square cells by their (x, y) position, so finding the nearest item or every item
+within a radius only looks at the few cells around the query point instead of scanning every item.
+Food keeps one of these (`Food.grid`) updated on spawn and remove so critters can find food in near
+constant time no matter how much food is on the map.
+
+Classes:
+- SpatialGrid: a uniform grid over 2d positions answering nearest and within radius queries.
+
+Example Usage:
+    from CORE.spatial import SpatialGrid
+
+    grid = SpatialGrid(cell_size=64)
+    grid.insert(food, 100, 200)
+    grid.nearest(110, 190)  # (food, distance)
+    grid.within(110, 190, 30)  # [food]
+"""
+
+import math
+
+
+class SpatialGrid():
+    """
+    A uniform grid over 2d positions.
+
+    Attributes:
+        cell_size (float): the width and height of a cell in world units.
+        cells (dict): (cell x, cell y) -> dict of item -> (x, y), cells are removed once empty.
+        positions (dict): item -> (x, y).
+        bounds (list): [min cell x, max cell x, min cell y, max cell y] of every cell used since the last clear.
+
+    Methods:
+        __len__(): how many items are in the grid.
+        __contains__(item): is an item in the grid.
+        insert(item, x, y): add an item, or move it if it is already in the grid.
+        remove(item): remove an item, does nothing if it is not in the grid.
+        clear(): remove every item.
+        nearest(x, y, max_distance=math.inf): the nearest item and its distance.
+        within(x, y, radius): every item within a radius.
+    """
+
+    def __init__(self, cell_size=64):
+        """create an empty grid
+
+        Args:
+            cell_size (float, optional): the width and height of a cell in world units. Defaults to 64.
+        """
+        self.cell_size = cell_size
+        self.clear()
+
+    def __len__(self):
+        """how many items are in the grid"""
+        return len(self.positions)
+
+    def __contains__(self, item):
+        """is an item in the grid"""
+        return item in self.positions
+
+    def cell_of(self, x, y):
+        """the cell a position falls into
+
+        Returns:
+            (int, int): the cell
+        """
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def insert(self, item, x, y):
+        """add an item at (x, y), or move it there if it is already in the grid
+
+        Args:
+            item (object): the item, must be hashable
+            x (float): x position
+            y (float): y position
+        """
+        self.remove(item)
+        cell = self.cell_of(x, y)
+        self.cells.setdefault(cell, {})[item] = (x, y)
+        self.positions[item] = (x, y)
+        self.bounds[0] = min(self.bounds[0], cell[0])
+        self.bounds[1] = max(self.bounds[1], cell[0])
+        self.bounds[2] = min(self.bounds[2], cell[1])
+        self.bounds[3] = max(self.bounds[3], cell[1])
+
+    def remove(self, item):
+        """remove an item, does nothing if it is not in the grid
+
+        Args:
+            item (object): the item
+        """
+        position = self.positions.pop(item, None)
+        if(position == None):
+            return
+        cell = self.cell_of(*position)
+        bucket = self.cells[cell]
+        del bucket[item]
+        if(len(bucket) == 0):
+            del self.cells[cell]
+
+    def clear(self):
+        """remove every item"""
+        self.cells = {}
+        self.positions = {}
+        self.bounds = [math.inf, -math.inf, math.inf, -math.inf]
+
+    def ring(self, cx, cy, radius):
+        """yield the occupied cells on the square ring `radius` cells away from (cx, cy)"""
+        if(radius == 0):
+            cells = [(cx, cy)]
+        else:
+            cells = []
+            for x in range(cx - radius, cx + radius + 1):
+                cells.append((x, cy - radius))
+                cells.append((x, cy + radius))
+            for y in range(cy - radius + 1, cy + radius):
+                cells.append((cx - radius, y))
+                cells.append((cx + radius, y))
+        for cell in cells:
+            bucket = self.cells.get(cell)
+            if(bucket):
+                yield bucket
+
+    def nearest(self, x, y, max_distance=math.inf):
+        """the nearest item to (x, y), searching rings of cells outwards until nothing closer can exist
+
+        Args:
+            x (float): x position
+            y (float): y position
+            max_distance (float, optional): ignore items further than this. Defaults to math.inf.
+
+        Returns:
+            (object, float): the nearest item and its distance, (None, math.inf) if nothing was found
+        """
+        best = None
+        best_distance = math.inf
+        if(len(self.positions) == 0):
+            return (best, best_distance)
+
+        cx, cy = self.cell_of(x, y)
+        #past this ring there are no occupied cells
+        last_ring = max(cx - self.bounds[0], self.bounds[1] - cx, cy - self.bounds[2], self.bounds[3] - cy, 0)
+        if(max_distance != math.inf):
+            last_ring = min(last_ring, math.ceil(max_distance / self.cell_size))
+
+        for radius in range(last_ring + 1):
+            for bucket in self.ring(cx, cy, radius):
+                for item, (ix, iy) in bucket.items():
+                    distance = math.hypot(ix - x, iy - y)
+                    if(distance < best_distance):
+                        best = item
+                        best_distance = distance
+            #anything in a further ring is at least this far away
+            if(best_distance <= radius * self.cell_size):
+                break
+
+        if(best_distance > max_distance):
+            return (None, math.inf)
+        return (best, best_distance)
+
+    def within(self, x, y, radius):
+        """every item within `radius` of (x, y)
+
+        Args:
+            x (float): x position
+            y (float): y position
+            radius (float): the radius
+
+        Returns:
+            list: the items, in no particular order
+        """
+        found = []
+        if(len(self.positions) == 0):
+            return found
+        x_lo, y_lo = self.cell_of(x - radius, y - radius)
+        x_hi, y_hi = self.cell_of(x + radius, y + radius)
+        #never walk cells outside of what has been used
+        x_lo, x_hi = max(x_lo, self.bounds[0]), min(x_hi, self.bounds[1])
+        y_lo, y_hi = max(y_lo, self.bounds[2]), min(y_hi, self.bounds[3])
+        for cell_x in range(x_lo, x_hi + 1):
+            for cell_y in range(y_lo, y_hi + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if(bucket):
+                    for item, (ix, iy) in bucket.items():
+                        if(math.hypot(ix - x, iy - y) <= radius):
+                            found.append(item)
+        return found
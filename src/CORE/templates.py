@@ -0,0 +1,104 @@
+"""
+This module provides the `TemplateRegistry` class, the shared model templates and collision shapes entities spawn from.
+
+Every spawn used to load its model file, flatten it, scale it and build a new `BulletBoxShape` for it, even
+though all critters, foods and corpses share a handful of meshes and one box size. The registry loads,
+scales and flattens each model once into a template, and every spawn instances that template under its own
+holder node, so colour can still be set per entity on the holder. Collision shapes are built once per key
+and shared by every rigid body of that type.
+
+Classes:
+- TemplateRegistry: the cache of model templates and collision shapes.
+
+Example Usage:
+    from CORE.templates import TemplateRegistry
+
+    templates = TemplateRegistry()
+    holder = templates.instance(base.loader, "models/cube.obj", body_np)
+    holder.setColor(1, 0, 0, 1)
+    node.addShape(templates.box_shape("Food"))
+"""
+
+from panda3d.core import NodePath, Vec3
+from panda3d.bullet import BulletBoxShape
+
+
+class TemplateRegistry():
+    """
+    The cache of model templates and collision shapes.
+
+    Attributes:
+        MODEL_SCALE (float): the scale every template is baked at.
+        models (dict): model path -> the template NodePath, never attached to the scene graph.
+        shapes (dict): key -> the shared collision shape.
+
+    Methods:
+        model(loader, path): the template of a model, loaded the first time it is asked for.
+        instance(loader, path, parent): instance a model under a new holder node.
+        box_shape(key, half_extents): the shared box shape of a key.
+        clear(): forget every template and shape.
+    """
+    MODEL_SCALE = 10
+
+    def __init__(self):
+        """create an empty registry"""
+        self.models = {}
+        self.shapes = {}
+
+    def model(self, loader, path):
+        """the template of a model, loaded, scaled and flattened the first time it is asked for
+
+        Args:
+            loader (Loader): the loader of the app
+            path (str): the model path
+
+        Returns:
+            NodePath: the template, instance it instead of attaching it
+        """
+        template = self.models.get(path)
+        if(template is None):
+            template = NodePath(f"template-{path}")
+            model = loader.loadModel(path)
+            model.setHpr(0, 0, 0)
+            model.set_scale(self.MODEL_SCALE)
+            model.reparentTo(template)
+            #bake the scale into the vertices once so instances carry no transform
+            template.flattenLight()
+            self.models[path] = template
+        return template
+
+    def instance(self, loader, path, parent):
+        """instance a model under a new holder node, the holder takes this instance's colour
+
+        Args:
+            loader (Loader): the loader of the app
+            path (str): the model path
+            parent (NodePath): where to attach the holder
+
+        Returns:
+            NodePath: the holder
+        """
+        holder = parent.attachNewNode("model")
+        self.model(loader, path).instanceTo(holder)
+        return holder
+
+    def box_shape(self, key, half_extents=Vec3(0.5, 0.5, 0.5)):
+        """the box shape every body of a key shares, built the first time it is asked for
+
+        Args:
+            key (str): what shares the shape, the entity type name
+            half_extents (Vec3, optional): the half size of the box, only used when the shape is built. Defaults to Vec3(0.5, 0.5, 0.5).
+
+        Returns:
+            BulletBoxShape: the shape
+        """
+        shape = self.shapes.get(key)
+        if(shape is None):
+            shape = BulletBoxShape(half_extents)
+            self.shapes[key] = shape
+        return shape
+
+    def clear(self):
+        """forget every template and shape"""
+        self.models.clear()
+        self.shapes.clear()
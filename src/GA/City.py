@@ -18,6 +18,8 @@ Example Usage:
 
 from GA.Gene import Gene
 from CORE.entity import Entity
+from CORE.collision import CollisionGroups
+from CORE.registry import EntitySet
 import random
 
 class City(Entity):
@@ -29,7 +31,8 @@ class City(Entity):
     for city management, including spawning, getting bounds, removing, and setting the city color.
 
     Attributes:
-        cities (list): A list holding all active `City` objects in the simulation.
+        cities (EntitySet): A set holding all active `City` objects in the simulation.
+        collision_group (int): The collision group of city houses, they collide with the terrain and critters.
         city_bounds_radius (float): The radius within which the city can influence the surrounding area.
 
     Methods:
@@ -41,7 +44,10 @@ class City(Entity):
         __str__(): Returns a string representation of the city for debugging.
     """
     
-    cities = []
+    cities = EntitySet()
+    
+    #houses collide with the terrain and critters, see CORE.collision
+    collision_group = CollisionGroups.CITY
 
     def __init__(self,
                  base,
@@ -99,7 +105,7 @@ class City(Entity):
 
         if(self.base.valid_x_y(x,y)):
             city = super().spawn(x, y, color)
-            City.cities.append(city)
+            City.cities.add(city)
             return city
 
     def get_bounds(self):
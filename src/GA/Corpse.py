@@ -16,6 +16,9 @@ Example Usage:
 
 from GA.Gene import Gene
 from CORE.entity import Entity
+from CORE.collision import CollisionGroups
+from CORE.registry import EntitySet
+from CORE.pool import EntityPool
 import random
 
 class Corpse(Entity):
@@ -28,7 +31,9 @@ class Corpse(Entity):
     list of corpses.
 
     Attributes:
-        corpses (list): A list holding all active `Corpse` objects in the simulation.
+        corpses (EntitySet): A set holding all active `Corpse` objects in the simulation.
+        pool (EntityPool): The detached bodies of removed corpses, reused by the next spawn.
+        collision_group (int): The collision group of corpses, they collide with the terrain only.
 
     Methods:
         remove_all_corpse(): Removes all corpses from the simulation.
@@ -37,7 +42,13 @@ class Corpse(Entity):
         __str__(): Returns a string representation of the corpse for debugging.
     """
     
-    corpses = []
+    corpses = EntitySet()
+    
+    #removed bodies wait here for the next spawn instead of being rebuilt every round
+    pool = EntityPool()
+    
+    #corpses collide with the terrain only, see CORE.collision
+    collision_group = CollisionGroups.CORPSE
 
     def __init__(self,
                  base,
@@ -92,7 +103,7 @@ class Corpse(Entity):
 
         if(self.base.valid_x_y(x,y)):
             corpse = super().spawn(x, y, color)
-            Corpse.corpses.append(corpse)
+            Corpse.corpses.add(corpse)
             corpse.body_np.set_hpr(0,90,0)
             return corpse
 
@@ -19,12 +19,15 @@ Example Usage:
 
 from GA.Gene import Gene
 from CORE.entity import Entity
-from direct.task import Task
+from CORE.collision import CollisionGroups
+from CORE.registry import EntitySet
+from CORE.pool import EntityPool
 from panda3d.core import Vec3
 from GA.Corpse import Corpse
 import random
 from GA.City import City
 from GA.Food import Food
+from GA.Population import Population, population_column
 import numpy as np
 
 class Critter(Entity):
@@ -39,15 +42,21 @@ class Critter(Entity):
     food, and whether it returns to the city. It can move to new locations, fight other critters, and
     spawn new critters.
 
+    The per round state of a critter (fitness, food eaten, at city, position...) is not stored on the
+    object, it lives in this critter's row of `Critter.population` and the attributes below are views over it.
+
     Attributes:
-        critters (list): A list holding all active `Critter` objects in the simulation.
+        critters (EntitySet): A set holding all active `Critter` objects in the simulation.
+        pool (EntityPool): The detached bodies of removed critters, reused by the next spawn.
+        collision_group (int): The collision group of critters, they collide with the terrain, other critters and houses.
+        population (Population): The struct of arrays table holding the state of every critter.
+        row (int): This critter's row in `Critter.population`.
         city (City): The city to which this critter belongs.
         strength (float): The critter's ability to interact with the environment.
         color (tuple): RGBA color for the critter's visual appearance.
         fitness (float): The critter's current fitness score.
         got_food_this_round (bool): Whether the critter has eaten food in the current round.
         current_food_goal (Food): The food item the critter is currently targeting.
-        seek_food_task (Task): A task for seeking food during the simulation.
         time_to_reach_first_food (float): Time taken to reach the first food in the simulation.
         out_for_a_fight (bool): Whether the critter is seeking a fight (i.e., targeting an enemy).
         at_city (bool): Whether the critter is currently at the city.
@@ -55,6 +64,8 @@ class Critter(Entity):
         out_for_cannibalism (bool): Whether the critter is engaging in cannibalistic behavior.
 
     Methods:
+        init_critter(city, strength, color): Sets up the critter attributes not kept in the population table.
+        create_many(base, city, genomes, positions): Creates one unspawned critter per row of a genome matrix.
         evaluate(): Evaluates the critter's fitness based on its actions during the round.
         target_food(food): Sets the critter to target and move towards a piece of food.
         target_chosen_food(): Targets the food the critter has chosen to go after.
@@ -66,25 +77,47 @@ class Critter(Entity):
         consume_food(food): Eats a piece of food if it is not already eaten.
         is_full(): Determines whether the critter has eaten all it can eat.
         is_last_survivor(): Checks if the critter is the last survivor in the city.
-        seek_food(): Initiates a task to seek food.
-        task_seek_food(task): The task method to continuously search for food.
+        seek_food(): Starts seeking food, `think` is then run every tick by the critter system.
+        think(): Searches for food, run every tick by the critter system while seeking.
         consume_target_food_if_nearby(): Consumes the target food if it's nearby.
         consume_nearby_food(): Consumes one piece of food that is nearby.
         reset(): Resets the critter's state for the next simulation round.
-        move_task(task): Moves the critter to a location and performs actions at the destination.
+        reached_goal(): Performs actions at the destination once the critter reached it.
         remove_all_critters(): Removes all critters from the simulation.
         return_to_city(): Returns the critter to the home city.
         spawn(x, y, color): Spawns a new critter at the specified location with a given color.
-        remove(): Removes the critter from the simulation and resets tasks.
+        remove(): Removes the critter from the simulation and resets tasks, its row is released once it is no longer a child of its city.
+        release_row(): Gives the critter's population row back.
         get_rand_color(): Randomly selects a color for the critter if none is provided.
         move(new_x, new_y): Updates the critter's position.
         adjust_fitness(amount): Adjusts the critter's fitness score.
         __str__(): Returns a string representation of the critter for debugging.
     """
-    critters = []
+    critters = EntitySet()
+    
+    #removed bodies wait here for the next spawn instead of being rebuilt every round
+    pool = EntityPool()
+    
+    #critters collide with the terrain, other critters and houses, see CORE.collision
+    collision_group = CollisionGroups.CRITTER
+    
+    population = Population()
+    
+    #views over this critter's row of the population table
+    fitness = population_column("fitness", float)
+    food_eaten = population_column("food_eaten", float)
+    enemiesEaten = population_column("enemies_eaten", float)
+    got_food_this_round = population_column("got_food_this_round", bool)
+    time_to_reach_first_food = population_column("time_to_reach_first_food", float)
+    at_city = population_column("at_city", bool)
+    returning_to_city = population_column("returning_to_city", bool)
+    eaten = population_column("eaten", bool)
+    times_eaten = population_column("times_eaten", int)
+    spawned = population_column("spawned", bool)
+    position = population_column("position", tuple)
     
     """Class representing a critter in the simulation."""
-    def __init__(self, base, city, position=(0, 0, 0), strength=1.0, color=None, genes=None):
+    def __init__(self, base, city, position=(0, 0, 0), strength=1.0, color=None, genes=None, genome_row=None):
         """
         Initialize a new critter with a given position, strength, color, and genes.
 
@@ -93,40 +126,104 @@ class Critter(Entity):
             strength (float): Ability to interact with the environment.
             color (tuple): RGBA color representing the critter visually.
             genes (list or dict): List or dictionary of `Gene` objects representing the critter's genetic makeup.
+            genome_row ((GenomeMatrix, int), optional): take the genes from a row of a genome matrix instead, see `Entity`. Defaults to None.
         """
+        #claim our row before anything writes state, it is given back by release_row
+        self.row = Critter.population.allocate()
 
         super().__init__(
             base=base,
             color=color,
             position=position,
             model="models/critter.obj",
-            genes=genes
+            genes=genes,
+            genome_row=genome_row
             )
+        self.init_critter(city, strength, color)
 
+        self.fitness = 0  # Initialize fitness score
+        self.got_food_this_round = False
+        self.time_to_reach_first_food = np.inf
+        self.at_city=False
+        self.returning_to_city=False
+        
+    def init_critter(self, city, strength=1.0, color=None):
+        """set up every attribute of a critter that is not kept in the population table, shared by __init__ and `create_many`
+
+        Args:
+            city (City): the city this critter belongs to
+            strength (float, optional): ability to interact with the environment. Defaults to 1.0.
+            color (tuple, optional): RGBA color of the critter. Defaults to None, a random critter color.
+        """
         self.city = city
         self.strength = strength
         self.color = color
         self.get_rand_color() #update if none
-        
-
-        self.fitness = 0  # Initialize fitness score
-        self.got_food_this_round = False
-        self.base=base
         self.current_food_goal = None
-        self.seek_food_task=None
-        self.time_to_reach_first_food = np.inf
         
         #wether this critter is targeting an enemy
         self.out_for_a_fight = False
-        
-        self.at_city=False
-        self.returning_to_city=False
         self.out_for_cannibalism=False
         
+    def release_row(self):
+        """give this critter's population row back once nothing will read it again, that is when it is neither spawned
+        nor a child of its city. safe to call more than once"""
+        row = self.__dict__.get("row")
+        if(row != None):
+            self.row = None
+            Critter.population.release(row)
+        
+    def __del__(self):
+        """only a safety net, the row is normally given back by release_row when the critter is removed or replaced"""
+        self.release_row()
+        
+    @classmethod
+    def create_many(cls, base, city, genomes, positions):
+        """create one critter of a city per row of a genome matrix, they are not spawned. this is how reproduction
+        and checkpoint loading make whole populations: the population rows are claimed together and the positions
+        written in one go, the rest goes through the same `init_entity` and `init_critter` as __init__ and no `Gene`
+        objects are built until something reads a critter's genes
+
+        Args:
+            base (BaseApp): the base app
+            city (City): the city the critters belong to
+            genomes (GenomeMatrix): one row per critter
+            positions (np.ndarray): (N, 3) the position of every critter
+
+        Returns:
+            list: the critters, in the matrix's row order
+        """
+        from main import BaseApp
+        
+        count = len(genomes)
+        rows = cls.population.allocate_many(count)
+        #fresh rows already hold the defaults __init__ would write, only what differs per critter is written
+        cls.population.columns["position"][rows] = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        #one block for every critter's gene values, each critter holds a row of it
+        values = genomes.values.copy()
+        colors = random.choices(BaseApp.CRITTER_COLORS, k=count)
+        
+        critters = []
+        for i, row in enumerate(rows.tolist()):
+            critter = cls.__new__(cls)
+            critter.row = row
+            critter.init_entity(base, "models/critter.obj", genome_row=(genomes, i), gene_values=values[i])
+            critter.init_critter(city, color=colors[i])
+            critters.append(critter)
+        return critters
+        
+    def apply_all_genes(self, values=None):
+        """propagate all gene changes to this critter, including the columns of the population table that mirror genes
+
+        Args:
+            values (np.ndarray, optional): the gene values already packed in schema order. Defaults to None, pack them from the genes.
+        """
+        super().apply_all_genes(values)
+        self.population.columns["max_food"][self.row] = self.get_gene("Max Food")
+        
     def reset_seek_task(self):
-        """remove the current seek food task """
-        if(self.seek_food_task != None):
-            self.base.taskMgr.remove(self.seek_food_task)
+        """stop this critter from seeking food"""
+        self.base.critter_system.remove(self)
     
     def evaluate(self):
         """the fitness of the creature is defined as
@@ -158,6 +255,8 @@ class Critter(Entity):
                 self.return_to_city()
             else:
                 self.current_food_goal = food
+                #replan right away if someone else eats it first
+                self.base.critter_system.watch(self, food)
                 self.move_to(pos)
         
     def target_chosen_food(self):
@@ -178,23 +277,16 @@ class Critter(Entity):
             self.target_food(target)
         
     def closest_food_in_threshold(self):
-        """find the closest food within the gene closeness threshold
+        """find a food within the gene closeness threshold, any of them may be picked
         if one is not found go to the closest one
 
         Returns:
-            _type_: _description_
+            Food: the food or None if there is no food
         """
-        closestFood = None
-        food_dist = np.inf
-        for food in Food.foods:
-            dist = self.distance(food)
-            if(dist<self.get_gene("Close Threshold")):
-                return food
-            else:
-                if(dist < food_dist):
-                    closestFood = food
-                    food_dist = dist
-        return closestFood
+        close_foods = self.base.food_query.within(self, self.get_gene("Close Threshold"))
+        if(len(close_foods) > 0):
+            return random.choice(close_foods)
+        return self.find_closest_food()
         
     def find_food(self,depth=0):
         """
@@ -253,8 +345,7 @@ class Critter(Entity):
                 
         elif(self.get_gene("Random Food First") > random.random() and len(Food.foods) > 0):
             #random first
-            random.shuffle(Food.foods)
-            food = Food.foods[0]
+            food = random.choice(Food.foods)
         elif(food == None and len(Food.foods) > 0):
             self.out_for_a_fight = False
             food = self.closest_food_in_threshold()
@@ -277,15 +368,7 @@ class Critter(Entity):
         """
             find the closeset food to this critter and return its Food obj
         """
-        closest = None
-        closest_dist = np.inf
-        random.shuffle(Food.foods)
-        for food in Food.foods:
-            dist = self.distance(food)
-            if(dist<closest_dist):
-                closest=food
-                closest_dist=dist
-        return closest
+        return self.base.food_query.nearest(self)
         
     def target_nearest_food(self):
         """find and target the closest food"""
@@ -318,15 +401,19 @@ class Critter(Entity):
         return self.food_eaten >= self.get_gene("Max Food")
     
     def is_last_survivor(self):
-        """is this the last critter not at the city or alive"""
-        sum(not child.eaten and not child.at_city for child in self.city.children) <= 1
+        """is this the last critter not at the city or alive, always None so the check in `think` never fires"""
+        return None
     
     def seek_food(self):
-        self.reset_seek_task()
-        self.seek_food_task = self.base.task_mgr.add(self.task_seek_food, f"entity{self.id}-move-task-to-food")
+        """start seeking food, the critter system calls `think` every tick until it is done"""
+        self.base.critter_system.add(self)
         
-    def task_seek_food(self, task):
-        """a task to seek out the nearest food and eat it till this critter cannot eat/carry any more"""
+    def think(self):
+        """seek out the nearest food and eat it till this critter cannot eat/carry any more, called every tick by the critter system
+
+        Returns:
+            bool: keep thinking next tick
+        """
         if(getattr(self.current_food_goal,"at_city",False)):
             self.current_food_goal=None
             self.reset_move_task()
@@ -335,7 +422,7 @@ class Critter(Entity):
             #if there is nothing to do return
             if(len(Food.foods) > 0 and self.is_last_survivor()):
                 self.return_to_city()
-                return
+                return False
             
             #otherwise do things
             if(self.current_food_goal != None):
@@ -353,7 +440,7 @@ class Critter(Entity):
         else:
             self.return_to_city()
             
-        return Task.cont
+        return True
         
     def consume_target_food_if_nearby(self):
         """consume the target food if nearby it, if no target do nothing
@@ -378,11 +465,10 @@ class Critter(Entity):
         """
         found_food_near = False
         if(self.food_eaten < self.get_gene("Max Food")):
-            for food in Food.foods:
-                if(self.dist_to_point(food.get_pos()),20):
-                    found_food_near=True
-                    self.consume_food(food)
-                    break
+            nearby = self.base.food_query.within(self, 20)
+            if(len(nearby) > 0):
+                found_food_near=True
+                self.consume_food(nearby[0])
         return found_food_near
         
     def reset(self):
@@ -399,25 +485,19 @@ class Critter(Entity):
         self.at_city=False
         self.returning_to_city=False
         
-    def move_task(self, task):
-        """a task to move the critter to a location overidden to eat food at the end of the path
-
-        Args:
-            task (_type_): _description_
-
-        Returns:
-            _type_: _description_
-        """
-        response = super().move_task(task)
-        if(response == Task.done and self.returning_to_city):
+    def reached_goal(self):
+        """called by the movement system once the critter reached its goal, overidden to eat food at the end of the path"""
+        super().reached_goal()
+        #arriving is worth deciding again right away instead of waiting for this critter's bucket
+        self.base.critter_system.request_replan(self)
+        if(self.returning_to_city):
             self.at_city = True
-        elif(response == Task.done and self.out_for_a_fight):
+            #nothing moves a critter at home until the next round, let bullet stop simulating it
+            self.sleep()
+        elif(self.out_for_a_fight):
             self.fight(self.current_food_goal)
-        elif(response == Task.done and not self.returning_to_city):
+        else:
             self.consume_target_food_if_nearby()
-
-        
-        return response
         
     @staticmethod
     def remove_all_critters():
@@ -442,18 +522,23 @@ class Critter(Entity):
         """
         if(self.base.valid_x_y(x,y)):
             critter = super().spawn(x, y, self.city.color)
-            Critter.critters.append(critter)
+            self.population.columns["city_id"][self.row] = self.city.id
+            Critter.critters.add(critter)
             self.city.add_child(critter)
             return critter
     
     def remove(self):
         Entity.remove_entity_from_list(self,Critter.critters)
         self.reset_seek_task()
-        return super().remove()
+        removed = super().remove()
+        #a critter the next generation replaced is never spawned again
+        if(self not in self.city.children):
+            self.release_row()
+        return removed
         
     def get_rand_color(self):
-        from main import BaseApp
         if self.color is None:
+            from main import BaseApp
             self.color = random.choice(BaseApp.CRITTER_COLORS)
         
 
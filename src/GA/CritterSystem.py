@@ -0,0 +1,177 @@
+"""
+This module defines the `CritterSystem` class, the one task that runs the decision making of every critter.
+
+Before this every critter added its own seek food task and every goal change removed and re-added a
+move task, each with a freshly formatted name. With thousands of critters the task manager did more work
+than the critters did. The critter system keeps the thinking critters in plain containers and runs one Panda task
+that calls `Critter.think` on each of them and then steps the movement system, so changing a goal is only
+a data update on the critter and on the movement system's arrays.
+
+Deciding is far more expensive than moving (`find_food` shuffles city and food lists), so critters are
+spread over `bucket_count` buckets and each tick only one bucket thinks, every critter re-plans once every
+`bucket_count` ticks. Urgent events do not wait for the bucket: a critter whose target was eaten or that
+reached its goal is re-planned on the next tick. Movement still runs for every entity every tick.
+
+Classes:
+    CritterSystem: the single per tick driver of critter decisions and movement.
+
+Example Usage:
+    from GA.CritterSystem import CritterSystem
+
+    critter_system = CritterSystem(base, bucket_count=4)
+    critter_system.start(base.task_mgr)
+    critter_system.add(critter)  # critter.think() now runs every 4th tick
+    critter_system.request_replan(critter)  # and on the next tick
+"""
+
+from direct.task import Task
+
+
+class CritterSystem():
+    """
+    Runs `think` on one bucket of critters plus every critter with an urgent replan, then the movement step, once per tick.
+
+    Attributes:
+        base (BaseApp): the base app reference, its movement system is stepped after the critters think.
+        bucket_count (int): how many buckets critters are spread over, a critter thinks once every bucket_count ticks.
+        buckets (list): one dict per bucket used as an insertion ordered set of its critters.
+        slots (dict): critter -> the index of its bucket.
+        urgent (dict): insertion ordered set of critters to re-plan on the next tick no matter their bucket.
+        watchers (dict): target -> insertion ordered set of critters going for it.
+        watching (dict): critter -> the target it is going for.
+        tick (int): how many ticks the system has run.
+
+    Methods:
+        start(task_mgr): add the task that runs the critter system every frame.
+        add(critter): start running a critter's `think`.
+        remove(critter): stop running a critter's `think`.
+        is_thinking(critter): is a critter's `think` being run.
+        set_bucket_count(bucket_count): spread the critters over a new number of buckets.
+        request_replan(critter): have a critter think on the next tick.
+        watch(critter, target): re-plan a critter when its target is eaten.
+        target_eaten(target): re-plan every critter going for a target that was eaten.
+        step(): let the due critters think, then move every entity one tick.
+    """
+
+    def __init__(self, base, bucket_count=1):
+        """create the critter system
+
+        Args:
+            base (BaseApp): the base app reference
+            bucket_count (int, optional): how many buckets critters are spread over. Defaults to 1, every critter thinks every tick.
+        """
+        self.base = base
+        self.slots = {}
+        self.urgent = {}
+        self.watchers = {}
+        self.watching = {}
+        self.tick = 0
+        self.buckets = []
+        self.set_bucket_count(bucket_count)
+
+    def start(self, task_mgr):
+        """add the task that runs the critter system every frame
+
+        Args:
+            task_mgr (TaskManager): the task manager of the app
+        """
+        task_mgr.add(self.critter_system_task, "critter-system")
+
+    def critter_system_task(self, task):
+        """run the critter system, called every frame"""
+        self.step()
+        return Task.cont
+
+    def add(self, critter):
+        """start running a critter's `think`, it goes in the emptiest bucket and thinks on the next tick. does nothing if it already is
+
+        Args:
+            critter (Critter): the critter
+        """
+        if(critter not in self.slots):
+            bucket = min(range(self.bucket_count), key=lambda i: len(self.buckets[i]))
+            self.buckets[bucket][critter] = None
+            self.slots[critter] = bucket
+            self.urgent[critter] = None
+
+    def remove(self, critter):
+        """stop running a critter's `think`, does nothing if it is not thinking
+
+        Args:
+            critter (Critter): the critter
+        """
+        bucket = self.slots.pop(critter, None)
+        if(bucket == None):
+            return
+        del self.buckets[bucket][critter]
+        self.urgent.pop(critter, None)
+        self.watch(critter, None)
+
+    def is_thinking(self, critter):
+        """is a critter's `think` being run"""
+        return critter in self.slots
+
+    def set_bucket_count(self, bucket_count):
+        """spread the critters over a new number of buckets
+
+        Args:
+            bucket_count (int): how many buckets, at least 1
+        """
+        critters = list(self.slots)
+        self.bucket_count = max(int(bucket_count), 1)
+        self.buckets = [{} for _ in range(self.bucket_count)]
+        for i, critter in enumerate(critters):
+            self.buckets[i % self.bucket_count][critter] = None
+            self.slots[critter] = i % self.bucket_count
+
+    def request_replan(self, critter):
+        """have a critter think on the next tick instead of waiting for its bucket
+
+        Args:
+            critter (Critter): the critter, ignored if it is not thinking
+        """
+        if(critter in self.slots):
+            self.urgent[critter] = None
+
+    def watch(self, critter, target):
+        """re-plan a critter as soon as its target is eaten, replaces whatever it watched before
+
+        Args:
+            critter (Critter): the critter
+            target (Entity): the target, None to stop watching
+        """
+        old = self.watching.pop(critter, None)
+        if(old is not None):
+            watchers = self.watchers.get(old)
+            if(watchers != None):
+                watchers.pop(critter, None)
+                if(len(watchers) == 0):
+                    del self.watchers[old]
+        if(target is not None):
+            self.watching[critter] = target
+            self.watchers.setdefault(target, {})[critter] = None
+
+    def target_eaten(self, target):
+        """re-plan every critter going for a target that was eaten
+
+        Args:
+            target (Entity): the eaten target
+        """
+        for critter in self.watchers.pop(target, {}):
+            self.watching.pop(critter, None)
+            self.request_replan(critter)
+
+    def step(self):
+        """let this tick's bucket and every urgent critter think, then move every entity one tick.
+
+        a critter whose `think` returns False stops thinking. thinking can remove other critters
+        (a fight eats one) so a critter removed earlier in the same tick is skipped.
+        """
+        due = list(self.buckets[self.tick % self.bucket_count])
+        due += [critter for critter in self.urgent if self.slots.get(critter) != self.tick % self.bucket_count]
+        self.urgent = {}
+        self.tick += 1
+        for critter in due:
+            if(critter in self.slots and not critter.think()):
+                self.remove(critter)
+        self.base.movement_system.step()
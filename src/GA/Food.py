@@ -13,6 +13,10 @@ Classes:
 
 from GA.Gene import Gene
 from CORE.entity import Entity
+from CORE.collision import CollisionGroups
+from CORE.registry import EntitySet
+from CORE.pool import EntityPool
+from CORE.spatial import SpatialGrid
 import random
 
 class Food(Entity):
@@ -25,7 +29,11 @@ class Food(Entity):
     randomly assigned color.
 
     Attributes:
-        foods (list): A class-level list holding all food entities in the simulation.
+        foods (EntitySet): A class-level set holding all food entities in the simulation.
+        pool (EntityPool): The detached bodies of removed food, reused by the next spawn.
+        collision_group (int): The collision group of food, they collide with the terrain only.
+        grid (SpatialGrid): A class-level spatial index over the position of every food, kept in sync by spawn and remove.
+        version (int): Bumped every time food is added, lets cached queries over the food know they are stale.
 
     Methods:
         __init__(base, position=(0, 0, 0), strength=1.0, color=None, genes=None): 
@@ -42,7 +50,19 @@ class Food(Entity):
         __str__(): Returns a string representation of the food for debugging purposes.
     """
     
-    foods = []
+    foods = EntitySet()
+    
+    #removed bodies wait here for the next spawn instead of being rebuilt every round
+    pool = EntityPool()
+    
+    #food collide with the terrain only, see CORE.collision
+    collision_group = CollisionGroups.FOOD
+    
+    #spatial index over every spawned food for nearest and within radius queries
+    grid = SpatialGrid(cell_size=64)
+    
+    #bumped when food is added, eaten food does not bump it since cached queries filter it out
+    version = 0
 
     def __init__(self, base, position=(0, 0, 0), strength=1.0, color=None, genes=None):
         """
@@ -70,11 +90,15 @@ class Food(Entity):
         
     def spawn(self, x=None, y=None, color=None):
         food = super().spawn(x, y, color)
-        Food.foods.append(food)
+        Food.foods.add(food)
+        if(food.spawned):
+            Food.grid.insert(food, food.position[0], food.position[1])
+            Food.version += 1
         return food
 
     def remove(self):
         Entity.remove_entity_from_list(self,Food.foods)
+        Food.grid.remove(self)
         return super().remove()
         
     def get_rand_color(self):
@@ -0,0 +1,103 @@
+"""
+This module defines the `FoodQuery` class, a per tick cache of "where is food" answers for the critters that ask.
+
+Many critters ask for food in the same frame (`find_food`, `target_nearest_food`, `consume_nearby_food`),
+and one critter often asks the same question more than once while it thinks. Only the critters the critter
+system lets think this tick ask at all, so each question is answered on demand through `Food.grid` for the
+critter that asked and kept until the tick ends. Nothing is computed for critters that do not ask.
+
+Cached answers are dropped when the tick changes or food is added. Eaten food is filtered out of the cached
+answers instead of invalidating them, so a frame where many foods are eaten does not recompute anything.
+
+Classes:
+    FoodQuery: the per tick cached nearest and within radius food query service.
+
+Example Usage:
+    food_query = FoodQuery(base)
+    food_query.nearest(critter)  # Food or None
+    food_query.within(critter, 30)  # [Food] closest first
+"""
+
+import math
+
+from GA.Food import Food
+
+
+class FoodQuery():
+    """
+    Per tick cached nearest and within radius food answers for the critters that ask.
+
+    Attributes:
+        base (BaseApp): the base app reference, its sim clock decides when answers go stale.
+        food_version (int): the `Food.version` the cached answers were computed against.
+        tick (int): the sim clock tick the cached answers were computed on.
+        nearest_answers (dict): critter -> its nearest food this tick.
+        within_answers (dict): (critter, radius) -> (food, distance) of every food within the radius this tick, closest first.
+
+    Methods:
+        refresh(): drop the cached answers if food was added or the tick changed.
+        nearest(critter): the nearest food to a critter.
+        within(critter, radius): every food within a radius of a critter.
+    """
+
+    def __init__(self, base):
+        """create the query service
+
+        Args:
+            base (BaseApp): the base app reference
+        """
+        self.base = base
+        self.food_version = -1
+        self.tick = -1
+        self.nearest_answers = {}
+        self.within_answers = {}
+
+    def refresh(self):
+        """drop the cached answers if food was added or this is a new tick"""
+        tick = self.base.sim_clock.tick_count
+        if(self.tick != tick or self.food_version != Food.version):
+            self.nearest_answers = {}
+            self.within_answers = {}
+            self.tick = tick
+            self.food_version = Food.version
+
+    def nearest(self, critter):
+        """the nearest food to a critter, asked again if the cached answer was eaten this tick
+
+        Args:
+            critter (Critter): the critter
+
+        Returns:
+            Food: the food or None if there is no food
+        """
+        self.refresh()
+        food = self.nearest_answers.get(critter)
+        if(food is None or food not in Food.grid):
+            pos = critter.get_pos()
+            food = Food.grid.nearest(pos.getX(), pos.getY())[0]
+            self.nearest_answers[critter] = food
+        return food
+
+    def within(self, critter, radius):
+        """every food within a radius of a critter
+
+        Args:
+            critter (Critter): the critter
+            radius (float): the radius
+
+        Returns:
+            list: the foods, closest first
+        """
+        self.refresh()
+        key = (critter, radius)
+        found = self.within_answers.get(key)
+        if(found is None):
+            pos = critter.get_pos()
+            x, y = pos.getX(), pos.getY()
+            found = []
+            for food in Food.grid.within(x, y, radius):
+                fx, fy = Food.grid.positions[food]
+                found.append((food, math.hypot(fx - x, fy - y)))
+            found.sort(key=lambda pair: pair[1])
+            self.within_answers[key] = found
+        return [food for food, distance in found if food in Food.grid]
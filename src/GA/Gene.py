@@ -1,47 +1,141 @@
 """
-This module defines the Gene class, which represents a genetic component of a critter's makeup. 
+This module defines the Gene class, which represents a genetic component of a critter's makeup.
 
-The Gene class is used to model genetic material that can mutate, cross over with other genes, 
-and affect the traits of critters. Genes can be numeric or categorical, and they have properties 
+The Gene class is used to model genetic material that can mutate, cross over with other genes,
+and affect the traits of critters. Genes can be numeric or categorical, and they have properties
 such as mutation rate, dominance, and bounds for valid values.
 
-The Gene class supports genetic operations like mutation, crossover, and decay, 
+The Gene class supports genetic operations like mutation, crossover, and decay,
 and keeps track of lineage through generations of genes.
 
+Everything that never changes between critters (name, bounds, options) lives in one shared, immutable
+`GeneDefinition` per gene name, kept in an O(1) name -> definition registry. A `Gene` is only the per
+critter record on top of it (value, mutation rate and step, dominance, generation) and uses `__slots__`,
+so a critter's 23 genes carry no dicts, no copied bounds and no lineage lists.
+
 Classes:
+    GeneDefinition: The shared, immutable description of one gene.
     Gene: Represents a single gene in a critter's genetic makeup.
 
 """
 
 import random
 
+
+class GeneDefinition:
+    """
+    The shared, immutable description of one gene, every `Gene` with the same name points at the same definition.
+
+    Attributes:
+        registry (dict): A class-level name -> definition lookup of every gene ever defined.
+        name (str): The name of the gene (e.g., "Strength").
+        value (int, float, or str): The starting value of the gene.
+        min_value (int or float, optional): The minimum value for numeric genes.
+        max_value (int or float, optional): The maximum value for numeric genes.
+        mutation_rate (float): The starting probability of mutation (0 to 1).
+        mutation_step (float): The starting step size for numeric mutations.
+        options (tuple): Allowed values for categorical genes.
+        dominance (int): The starting priority during crossover.
+
+    Methods:
+        define(name, value, ...): Get the definition of a name, creating it the first time the name is seen.
+        get(name): The definition of a name, None if it was never defined.
+    """
+    __slots__ = ("name", "value", "min_value", "max_value", "mutation_rate", "mutation_step", "options", "dominance")
+
+    registry = {}
+
+    def __init__(self, name, value, min_value=None, max_value=None, mutation_rate=0.5, mutation_step=0.1,
+                 options=None, dominance=1):
+        """
+        Create a definition, use `define` so every name has only one.
+
+        Args:
+            name (str): The name of the gene.
+            value (int, float, or str): The starting value of the gene.
+            min_value (int or float, optional): Minimum value for the gene (if numeric).
+            max_value (int or float, optional): Maximum value for the gene (if numeric).
+            mutation_rate (float): The starting probability of mutation (0 to 1).
+            mutation_step (float): The starting step size for numeric mutations.
+            options (list, optional): Allowed values for categorical genes (if applicable).
+            dominance (int, optional): The starting priority for crossover.
+        """
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "min_value", min_value)
+        object.__setattr__(self, "max_value", max_value)
+        object.__setattr__(self, "mutation_rate", mutation_rate)
+        object.__setattr__(self, "mutation_step", mutation_step)
+        object.__setattr__(self, "options", tuple(options or ()))
+        object.__setattr__(self, "dominance", dominance)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"GeneDefinition is immutable, cannot set {name}")
+
+    @classmethod
+    def define(cls, name, value, min_value=None, max_value=None, mutation_rate=0.5, mutation_step=0.1,
+               options=None, dominance=1):
+        """Get the definition of a name, creating it the first time the name is seen. later calls return the first definition,
+        the starting value, mutation rate, mutation step and dominance of a later call are only per gene starting values and are not checked.
+
+        Args:
+            name (str): The name of the gene. the rest are only used when the definition is created, see __init__.
+
+        Raises:
+            ValueError: if the name is already defined with different bounds or options.
+
+        Returns:
+            GeneDefinition: The definition of the name.
+        """
+        definition = cls.registry.get(name)
+        if(definition is None):
+            definition = cls(name, value, min_value, max_value, mutation_rate, mutation_step, options, dominance)
+            cls.registry[name] = definition
+        elif(definition.min_value != min_value or definition.max_value != max_value or definition.options != tuple(options or ())):
+            raise ValueError(
+                f"gene {name} is already defined with Min={definition.min_value}, Max={definition.max_value}, "
+                f"Options={definition.options}, cannot redefine it with Min={min_value}, Max={max_value}, Options={options}"
+            )
+        return definition
+
+    @classmethod
+    def get(cls, name):
+        """The definition of a name, None if it was never defined."""
+        return cls.registry.get(name)
+
+    def __repr__(self):
+        return f"GeneDefinition(Name={self.name}, Min={self.min_value}, Max={self.max_value})"
+
+
 class Gene:
     """
     Class representing a single gene in a critter's genetic makeup.
 
     Genes are the fundamental unit of inheritance for critters. Each gene has a value, which can be
     numeric (int or float) or categorical (string). The gene also includes properties like mutation rate,
-    step size for mutations, and dominance in crossover scenarios. Genes can be mutated, crossed over with 
-    other genes, and decay over time. 
+    step size for mutations, and dominance in crossover scenarios. Genes can be mutated, crossed over with
+    other genes, and decay over time.
 
     Attributes:
-        genes (list): A class-level list that stores all the genes created.
-        name (str): The name of the gene (e.g., "Strength").
+        definition (GeneDefinition): The shared description of this gene (name, bounds, options).
+        name (str): The name of the gene (e.g., "Strength"), from the definition.
         value (int, float, or str): The current value of the gene.
-        min_value (int or float, optional): The minimum value for numeric genes.
-        max_value (int or float, optional): The maximum value for numeric genes.
+        min_value (int or float, optional): The minimum value for numeric genes, from the definition.
+        max_value (int or float, optional): The maximum value for numeric genes, from the definition.
         mutation_rate (float): Probability of mutation (0 to 1).
         mutation_step (float): Step size for numeric mutations.
-        options (list, optional): Allowed values for categorical genes.
+        options (tuple): Allowed values for categorical genes, from the definition.
         dominance (int): The gene's priority during crossover (higher value dominates).
         generation (int): The generation number in which this gene was created.
-        parent_ids (list): List of parent gene names for lineage tracking.
+        parent_ids (list): List of parent gene names for lineage tracking, crossover only pairs genes of the same name.
         active (bool): Whether the gene is active and can mutate.
 
     Methods:
-        __init__(name, value, min_value=None, max_value=None, mutation_rate=0.5, mutation_step=0.1, options=None, 
+        __init__(name, value, min_value=None, max_value=None, mutation_rate=0.5, mutation_step=0.1, options=None,
                  dominance=1, generation=0, parent_ids=None): Initializes a new gene.
-        
+
+        of(definition, value, mutation_rate, mutation_step, dominance, generation): Creates a gene of a definition without any lookup.
+
         apply(critter): Applies the gene's value to a critter's attribute.
 
         mutate(): Mutates the gene's value based on its mutation rate and step size.
@@ -52,53 +146,100 @@ class Gene:
 
         __str__(): Returns a string representation of the gene.
     """
-    genes = []
+    __slots__ = ("definition", "value", "mutation_rate", "mutation_step", "dominance", "generation", "active")
 
     def __init__(self, name, value, min_value=None, max_value=None, mutation_rate=0.5, mutation_step=0.1,
                  options=None, dominance=1, generation=0, parent_ids=None):
         """
         Initialize a new gene with its properties.
-        
+
         Args:
             name (str): The name of the gene (something like "Strength").
             value (int, float, or str): The initial value of the gene.
-            min_value (int or float, optional): Minimum value for the gene (if numeric).
-            max_value (int or float, optional): Maximum value for the gene (if numeric).
+            min_value (int or float, optional): Minimum value for the gene (if numeric), must match the first gene of the name.
+            max_value (int or float, optional): Maximum value for the gene (if numeric), must match the first gene of the name.
             mutation_rate (float): Probability of mutation (0 to 1).
             mutation_step (float): Step size for numeric mutations.
-            options (list, optional): Allowed values for categorical genes (if applicable).
+            options (list, optional): Allowed values for categorical genes (if applicable), must match the first gene of the name.
             dominance (int, optional): Priority for crossover (higher value dominates).
             generation (int, optional): Generation in which this gene was created.
-            parent_ids (list, optional): List of parent gene names for lineage tracking.
+            parent_ids (list, optional): Kept for compatibility, lineage is derived from the generation.
+
+        Raises:
+            ValueError: if a gene of the same name was created with different bounds or options.
         """
-        self.name = name
+        #one dict lookup, the first gene of a name defines it
+        self.definition = GeneDefinition.define(name, value, min_value, max_value, mutation_rate, mutation_step, options, dominance)
         self.value = value
-        self.min_value = min_value
-        self.max_value = max_value
         self.mutation_rate = mutation_rate
         self.mutation_step = mutation_step
-        self.options = options or []  # For categorical genes
         self.dominance = dominance
         self.generation = generation
-        self.parent_ids = parent_ids or []
         self.active = True  # By default, the gene is active
-        
-        #if it does not already exist in genes
-        if(not any(gene.name == self.name for gene in Gene.genes)):
-            Gene.genes.append(self)
-        
+
+    @classmethod
+    def of(cls, definition, value, mutation_rate, mutation_step, dominance=1, generation=0):
+        """Create a gene of a definition without any lookup, the fast path for building many genomes.
+
+        Args:
+            definition (GeneDefinition): The shared description of the gene.
+            value (int, float, or str): The value of the gene.
+            mutation_rate (float): Probability of mutation (0 to 1).
+            mutation_step (float): Step size for numeric mutations.
+            dominance (int, optional): Priority for crossover. Defaults to 1.
+            generation (int, optional): Generation in which this gene was created. Defaults to 0.
+
+        Returns:
+            Gene: The gene.
+        """
+        gene = cls.__new__(cls)
+        gene.definition = definition
+        gene.value = value
+        #most genes keep the starting rate and step, share the definition's float instead of holding an equal copy
+        gene.mutation_rate = definition.mutation_rate if mutation_rate == definition.mutation_rate else mutation_rate
+        gene.mutation_step = definition.mutation_step if mutation_step == definition.mutation_step else mutation_step
+        gene.dominance = dominance
+        gene.generation = generation
+        gene.active = True
+        return gene
+
+    @property
+    def name(self):
+        """The name of the gene, from the shared definition."""
+        return self.definition.name
+
+    @property
+    def min_value(self):
+        """The minimum value of the gene, from the shared definition."""
+        return self.definition.min_value
+
+    @property
+    def max_value(self):
+        """The maximum value of the gene, from the shared definition."""
+        return self.definition.max_value
+
+    @property
+    def options(self):
+        """The allowed values of a categorical gene, from the shared definition."""
+        return self.definition.options
+
+    @property
+    def parent_ids(self):
+        """The names of the parent genes, a crossed over gene always has two parents of its own name."""
+        return [self.name, self.name] if self.generation > 0 else []
+
     def apply(self,critter):
-        """this is used to apply the changes to a critter's stats 
+        """this is used to apply the changes to a critter's stats
 
         Args:
-            critter (_type_): _description_
+            critter (Entity): _description_
         """
-        setattr(critter,self.name,self.value)
+        critter.set_gene(self.name,self.value)
 
     def mutate(self):
         """
         Mutate the gene's value based on its mutation rate and step size.
-        
+
         Numeric genes are incremented/decremented within their bounds.
         Categorical genes are randomly changed within their options.
         """
@@ -119,35 +260,32 @@ class Gene:
     def crossover(self, other):
         """
         Perform crossover with another gene to create an offspring gene.
-        
+
         Args:
             other (Gene): The other parent gene.
-        
+
         Returns:
             Gene: A new gene combining properties from both parents.
         """
         if not isinstance(other, Gene):
             raise ValueError("Crossover requires another Gene instance.")
-        
+
         # Value inheritance based on dominance
         new_value = self.value if self.dominance >= other.dominance else other.value
-        
-        return Gene(
-            name=self.name,
-            value=new_value,
-            min_value=self.min_value,
-            max_value=self.max_value,
+
+        return Gene.of(
+            self.definition,
+            new_value,
             mutation_rate=(self.mutation_rate + other.mutation_rate) / 2,
             mutation_step=(self.mutation_step + other.mutation_step) / 2,
             dominance=max(self.dominance, other.dominance),
             generation=max(self.generation, other.generation) + 1,
-            parent_ids=[self.name, other.name]
         )
 
     def decay(self, rate=0.01):
         """
         Simulate gene decay by gradually decreasing its value.
-        
+
         Args:
             rate (float): The rate of decay (default is 0.01).
         """
@@ -158,4 +296,4 @@ class Gene:
         """Return a string of the gene."""
         return (f"Gene(Name={self.name}, Value={self.value}, Min={self.min_value}, Max={self.max_value}, "
                 f"MutationRate={self.mutation_rate}, MutationStep={self.mutation_step}, "
-                f"Dominance={self.dominance}, Generation={self.generation})")
\ No newline at end of file
+                f"Dominance={self.dominance}, Generation={self.generation})")
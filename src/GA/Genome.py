@@ -0,0 +1,134 @@
+"""
+This module defines the `GenomeSchema` class, the compiled layout of a critter's genes.
+
+A schema gives every gene a fixed index, so an entity can hold its gene values in one compact float
+array and read a gene with a single array index instead of scanning the global gene bank and doing a
+`getattr` with the gene's name. The default schema is built once from `DEFAULT_GENES`, the genes every
+entity is created with.
+
+Classes:
+    GenomeSchema: the fixed index and bounds of every gene in a genome.
+
+Attributes:
+    DEFAULT_GENES (list): the template `Gene` of every gene an entity is created with.
+    DEFAULT_SCHEMA (GenomeSchema): the schema compiled from `DEFAULT_GENES`.
+
+Example Usage:
+    from GA.Genome import DEFAULT_SCHEMA
+
+    values = DEFAULT_SCHEMA.create_values()
+    values[DEFAULT_SCHEMA.index["Speed"]]
+"""
+
+import numpy as np
+
+from GA.Gene import Gene
+
+
+class GenomeSchema:
+    """
+    The compiled layout of a genome, every gene gets a fixed index into a float array.
+
+    Attributes:
+        templates (list): the template `Gene` of every gene, in index order.
+        definitions (list): the shared `GeneDefinition` of every gene, in index order.
+        names (list): the name of every gene, in index order.
+        index (dict): gene name -> index.
+        defaults (np.ndarray): the starting value of every gene.
+        min_values (np.ndarray): the minimum value of every gene.
+        max_values (np.ndarray): the maximum value of every gene.
+
+    Methods:
+        __len__(): how many genes are in the schema.
+        create_genes(): create a fresh list of `Gene` objects with the starting values.
+        create_values(): create a fresh value array with the starting values.
+        values_of(genes, out=None): pack a list of `Gene` objects into a value array.
+    """
+
+    def __init__(self, templates):
+        """compile a schema
+
+        Args:
+            templates (list): the template `Gene` of every gene, their order decides the index.
+        """
+        self.templates = list(templates)
+        self.definitions = [gene.definition for gene in self.templates]
+        self.names = [gene.name for gene in self.templates]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.defaults = np.array([gene.value for gene in self.templates], dtype=np.float64)
+        self.min_values = np.array([gene.min_value for gene in self.templates], dtype=np.float64)
+        self.max_values = np.array([gene.max_value for gene in self.templates], dtype=np.float64)
+
+    def __len__(self):
+        """how many genes are in the schema"""
+        return len(self.templates)
+
+    def create_genes(self):
+        """create a fresh list of `Gene` objects with the starting values
+
+        Returns:
+            list: one `Gene` per gene in the schema
+        """
+        return [
+            Gene.of(gene.definition, gene.value, gene.mutation_rate, gene.mutation_step)
+            for gene in self.templates
+        ]
+
+    def create_values(self):
+        """create a fresh value array with the starting values
+
+        Returns:
+            np.ndarray: float array of length `len(self)`
+        """
+        return self.defaults.copy()
+
+    def values_of(self, genes, out=None):
+        """pack a list of `Gene` objects into a value array, genes missing from the list keep their min value
+
+        Args:
+            genes (list): the genes
+            out (np.ndarray, optional): the array to write into. Defaults to None, a new array.
+
+        Returns:
+            np.ndarray: the value array
+        """
+        if(out is None):
+            out = self.min_values.copy()
+        for gene in genes:
+            out[self.index[gene.name]] = gene.value
+        return out
+
+
+DEFAULT_GENES = [
+    Gene("Strength", .5, min_value=0.5, max_value=2.0),
+
+    Gene("Jump Strength", 1.1, min_value=1, max_value=5.0),
+    Gene("Speed", 1.1, min_value=1, max_value=5.0),
+    Gene("Jump Chance", .5, min_value=0, max_value=100),
+    Gene("Random Motion Chance", 1, min_value=0, max_value=100),
+    Gene("Random Motion -X Strength", .1, min_value=.1, max_value=10),
+    Gene("Random Motion +X Strength", .1, min_value=.1, max_value=10),
+    Gene("Random Motion -Y Strength", .1, min_value=.1, max_value=10),
+    Gene("Random Motion +Y Strength", .1, min_value=.1, max_value=10),
+    Gene("Random Motion -Z Strength", .1, min_value=.1, max_value=10),
+    Gene("Random Motion +Z Strength", .1, min_value=.1, max_value=10),
+
+    Gene("Max Food", .7, min_value=.7, max_value=10), # how much can this critter eat before they must return home
+    Gene("Closest Food First", .5, min_value=0, max_value=1), #how often does this critter prioritize the closest food
+    Gene("Random Food First", .5, min_value=0, max_value=1), #how often does this critter prioritize the closest food
+    Gene("Checks Eaten", .5, min_value=0, max_value=1), #how often does this critter check if the food is eaten before deciding to go to it?
+    Gene("Close Threshold", 30, min_value=10, max_value=500), # how far can a food be for this critter to be okay with it
+    Gene("Change Mind Chance", .0001, min_value=0, max_value=.1, mutation_step=.0002), # how often does this critter change its mind on its goal?
+
+    Gene("Eat Other Tribes Chance", .0001, min_value=0, max_value=1, mutation_step=.001), #how often does this critter try to eat enemies
+
+    Gene("Cannibalism Chance", .0001, min_value=0, max_value=1, mutation_step=.001), # how often does this critter eat its allies
+    Gene("Cannibalism Wait", 3, min_value=0, max_value=100, mutation_step=3), #on avg how long will they wait before turning to cannibalism
+    Gene("Smart Cannibalism", .1, min_value=0, max_value=1, mutation_step=.01), # less likely to target critters with more food than it can carry
+
+
+    Gene("x-nest-offset", 0, min_value=-200, max_value=200, mutation_step=100), # what offset from the nest does this critter like to wait at
+    Gene("y-nest-offset", 0, min_value=-200, max_value=200, mutation_step=100), # what offset from the nest does this critter like to wait at
+]
+
+DEFAULT_SCHEMA = GenomeSchema(DEFAULT_GENES)
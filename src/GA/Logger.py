@@ -1,48 +1,152 @@
 """
-This module defines the Logger class, which provides functionality for logging messages to a string 
-and saving them to a file. The Logger is used to track and store logs of operations, events, or errors 
-that occur during the execution of a program.
+This module defines the `MetricsLogger` class, a streaming sink of per round, per city metrics.
 
-The Logger class allows messages to be added to an internal log string, retrieves the complete log, 
-and saves the log to a file. If a file already exists, the log is appended to the file.
+The old `Logger` grew one python string with `+=` for the whole run and only wrote it out on `save()`, so
+its memory grew with every message. `MetricsLogger` instead appends one fixed schema row per city per round
+to a gzip compressed CSV file. Rows wait in a buffer of at most `buffer_rows` rows and are then written to
+the open gzip stream, so memory stays the same however many generations run. A row is a handful of
+vectorized reductions over arrays the round already has, so logging costs next to nothing.
+
+Every row holds:
+    - the round, the city and its population, how many were eaten, how many made it home and how many children it gets.
+    - the food the city's critters brought home.
+    - the minimum, quartiles, maximum and mean of the fitness.
+    - the mean and variance of every gene of the schema.
+    - how long the simulation and evaluation phases of the round took in simulated seconds.
+
+Appending to an existing file keeps it one valid gzip file (gzip files may hold many members back to back)
+and the header is only written when the file is new. A run resumed from a checkpoint can append to the file
+of the run that saved it: checkpoints keep the city ids, so the `city` column of one city is the same before
+and after the load.
 
 Classes:
-    Logger: A class for handling any and all logging that might need to be done.
+    MetricsLogger: the bounded buffer CSV-gz writer of per round, per city rows.
 
+Example Usage:
+    from GA.Logger import MetricsLogger
+
+    metrics = MetricsLogger("metrics.csv.gz", gene_names=DEFAULT_SCHEMA.names)
+    metrics.record_city(round_count, city.id, fitness, gene_values, food, offspring, eaten, home, phase_seconds)
+    metrics.close()
 """
 
+import atexit
+import csv
+import gzip
+import os
+
+import numpy as np
+
+
+class MetricsLogger():
+    """
+    Appends one fixed schema row per city per round to a gzip compressed CSV file through a bounded buffer.
+
+    Attributes:
+        FITNESS_QUANTILES (tuple): the fitness quantiles every row holds, 0 is the minimum and 1 the maximum.
+        PHASES (tuple): the phases whose durations every row holds.
+        path (str): the file rows are appended to.
+        gene_names (list): the genes whose mean and variance every row holds, in column order.
+        columns (list): the header, every row has exactly these columns.
+        buffer_rows (int): the most rows held before they are written.
+        buffer (list): rows waiting to be written.
+        rows_written (int): how many rows have been written so far.
+
+    Methods:
+        record_city(round_count, city_id, fitness, gene_values, food, offspring, eaten, home, phase_seconds): add the row of one city for one round.
+        append(row): buffer a row given in column order.
+        flush(): write the buffered rows.
+        close(): write the buffered rows and close the file, safe to call more than once.
+    """
+    FITNESS_QUANTILES = (0, .25, .5, .75, 1)
+    PHASES = ("Simulation", "Evaluation")
 
-class Logger():
-    """the class for handling any and all logging that might need to be done"""
-    
-    def __init__(self, name, output_file):
-        """setup the logger
+    def __init__(self, path, gene_names, buffer_rows=256):
+        """open the file for appending, writing the header if the file is new
 
         Args:
-            name (_type_): _description_
-            output_file (_type_): _description_
+            path (str): the file, .csv.gz by convention
+            gene_names (list): the genes whose mean and variance every row holds
+            buffer_rows (int, optional): the most rows held before they are written. Defaults to 256.
         """
-        self.name = name
-        self.output_file = output_file
-        self.log_string = ""
-        
-    def log(self, str):
-        """add a msg to the log"""
-        self.log_string+=str
-        
-    def get_log(self):
-        """get the string log"""
-        return f"--{self.name} Start--\n"+self.log_string+"\n--{self.name} End--"
-    
-    def save(self,output_file=None):
-        """save the log to file appending if file exists already
+        self.path = path
+        self.gene_names = list(gene_names)
+        self.columns = (
+            ["round", "city", "population", "eaten", "home", "offspring", "food"]
+            + [f"fitness p{int(q * 100)}" for q in self.FITNESS_QUANTILES]
+            + ["fitness mean"]
+            + [f"{name} {stat}" for name in self.gene_names for stat in ("mean", "var")]
+            + [f"{phase.lower()} seconds" for phase in self.PHASES]
+        )
+        self.buffer_rows = max(int(buffer_rows), 1)
+        self.buffer = []
+        self.rows_written = 0
+
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = gzip.open(path, "at", newline="")
+        self.writer = csv.writer(self.file)
+        if(is_new):
+            self.writer.writerow(self.columns)
+        #rows still in the buffer are lost if the file is never closed
+        atexit.register(self.close)
+
+    def record_city(self, round_count, city_id, fitness, gene_values, food, offspring, eaten, home, phase_seconds):
+        """add the row of one city for one round
+
+        Args:
+            round_count (int): the round
+            city_id (int): the id of the city, kept across checkpoint loads
+            fitness (np.ndarray): (N,) the fitness of every critter of the city this round
+            gene_values (np.ndarray): (N, genes) the gene values of every critter, columns in gene_names order
+            food (float): the food the city's critters brought home
+            offspring (int): how many children the city gets for the next round
+            eaten (int): how many of the city's critters were eaten
+            home (int): how many of the city's critters made it home
+            phase_seconds (dict): phase name -> how long it took in simulated seconds, missing phases are left empty
+        """
+        fitness = np.asarray(fitness, dtype=np.float64)
+        gene_values = np.asarray(gene_values, dtype=np.float64).reshape(len(fitness), len(self.gene_names))
+        if(len(fitness) > 0):
+            #nearest rank quantiles, interpolating between two infinite fitnesses would give nan
+            ranks = np.rint(np.array(self.FITNESS_QUANTILES) * (len(fitness) - 1)).astype(np.intp)
+            quantiles = np.sort(fitness)[ranks].tolist()
+            mean = [float(np.mean(fitness))]
+            genes = np.column_stack((gene_values.mean(axis=0), gene_values.var(axis=0))).ravel().tolist()
+        else:
+            quantiles = [""] * len(self.FITNESS_QUANTILES)
+            mean = [""]
+            genes = [""] * (2 * len(self.gene_names))
+        row = (
+            [int(round_count), int(city_id), len(fitness), int(eaten), int(home), int(offspring), float(food)]
+            + quantiles + mean + genes
+            + [phase_seconds.get(phase, "") for phase in self.PHASES]
+        )
+        self.append(row)
+
+    def append(self, row):
+        """buffer a row in column order, writing the buffer once it is full
 
         Args:
-            output_file (string, optional): path to save to if different than self. Defaults to self.output_file.
+            row (list): one value per column
         """
-        if(output_file == None): output_file = self.output_file
-        with open(output_file, "a+") as file:
-            file.write(self.get_log())
-    
-    
-    
\ No newline at end of file
+        if(self.file == None):
+            raise ValueError(f"metrics file {self.path} is closed")
+        self.buffer.append(row)
+        if(len(self.buffer) >= self.buffer_rows):
+            self.flush()
+
+    def flush(self):
+        """write the buffered rows to the gzip stream"""
+        if(self.file == None or len(self.buffer) == 0):
+            return
+        self.writer.writerows(self.buffer)
+        self.rows_written += len(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        """write the buffered rows and close the file, safe to call more than once"""
+        if(self.file == None):
+            return
+        self.flush()
+        self.file.close()
+        self.file = None
@@ -1,13 +1,257 @@
-"""not used"""
+"""
+This module defines the `Population` class, a struct of arrays store for the state of every critter.
+
+Each critter owns one row of the table and each piece of state (fitness, food eaten, at city, position...)
+is a typed NumPy column, so checks over the whole population (is this the last survivor of a city,
+what is everyone's fitness) are single vectorized operations instead of loops over `Critter` objects.
+A `Critter` is a thin view over its row, see `population_column`.
+
+The spawned, eaten and at city columns are also counted as they are written: `alive_count` and
+`home_count` change on the spawn, eat, arrive home and remove events, so asking whether every living
+critter is home is a comparison of two ints and the round manager can ask it every tick.
+
+Classes:
+    Population: the NumPy backed table of critter state.
+
+Functions:
+    population_column(name, cast): build a property that reads and writes one column of an object's row.
+
+Example Usage:
+    from GA.Population import Population
+
+    population = Population()
+    row = population.allocate()
+    population.columns["food_eaten"][row] = 2
+    population.release(row)
+"""
+
+import math
+
+import numpy as np
+
+
+def population_column(name, cast):
+    """build a property that reads and writes the `name` column of `self.row` in `self.population`
+
+    Args:
+        name (str): the column name
+        cast (type): the python type values are returned as
+
+    Returns:
+        property: the property
+    """
+    def get_value(self):
+        return cast(self.population.columns[name][self.row])
+
+    def set_value(self, value):
+        self.population.columns[name][self.row] = value
+
+    def set_counted_value(self, value):
+        self.population.set_counted(self.row, name, value)
+
+    if(name in Population.COUNTED_COLUMNS):
+        return property(get_value, set_counted_value, doc=f"the {name} column of this critter's population row, kept in the population counts")
+
+    return property(get_value, set_value, doc=f"the {name} column of this critter's population row")
+
 
 class Population:
-    """Class representing a collection of different critters"""
-    
-    def __init__(self):
-        self.pop = []
-        
-    def get_population(self):
-        return self.pop
-
-    def add_to_population(self,element):
-        self.pop.append(element)
\ No newline at end of file
+    """
+    A struct of arrays table of critter state with one row per critter.
+
+    Rows are handed out by `allocate` and given back by `release`, released rows are reused before
+    the table grows. The table doubles in size whenever it runs out of rows.
+
+    Attributes:
+        COLUMNS (dict): column name -> (dtype, default value).
+        COUNTED_COLUMNS (tuple): the columns `alive_count` and `home_count` are kept from, write them with `set_counted`.
+        INITIAL_CAPACITY (int): how many rows the table starts with.
+        columns (dict): column name -> NumPy array, `position` is (capacity, 3) all others are 1d.
+        capacity (int): how many rows the table can hold before it must grow.
+        alive_count (int): how many rows are spawned and not eaten.
+        home_count (int): how many rows are spawned, not eaten and at their city.
+
+    Methods:
+        allocate(): claim a row and reset it to the default values.
+        allocate_many(count): claim many rows at once.
+        release(row): give a row back.
+        set_counted(row, name, value): write a counted column and update the counts.
+        spawned_mask(city_id=None): a mask of the rows of spawned critters, optionally of one city.
+        all_home_or_eaten(): have all spawned critters returned home or been eaten, O(1) from the counts.
+        all_home(): are all spawned critters at their city.
+        city_sum(column, city_id, at_city_only=False): the sum of a column over the spawned critters of a city.
+        evaluate(phase_time_limit_seconds): compute the fitness of every spawned critter at once.
+    """
+    COLUMNS = {
+        "in_use": (np.bool_, False),
+        "spawned": (np.bool_, False),
+        "city_id": (np.int64, -1),
+        "fitness": (np.float64, 0),
+        "food_eaten": (np.float64, 0),
+        "enemies_eaten": (np.float64, 0),
+        "max_food": (np.float64, 0),
+        "got_food_this_round": (np.bool_, False),
+        "time_to_reach_first_food": (np.float64, np.inf),
+        "at_city": (np.bool_, False),
+        "returning_to_city": (np.bool_, False),
+        "eaten": (np.bool_, False),
+        "times_eaten": (np.int32, 0),
+        "position": (np.float64, 0),
+    }
+
+    COUNTED_COLUMNS = ("spawned", "eaten", "at_city")
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, capacity=None):
+        """create an empty table
+
+        Args:
+            capacity (int, optional): how many rows to start with. Defaults to INITIAL_CAPACITY.
+        """
+        self.capacity = capacity or self.INITIAL_CAPACITY
+        self.columns = {}
+        for name, (dtype, default) in self.COLUMNS.items():
+            shape = (self.capacity, 3) if name == "position" else (self.capacity,)
+            self.columns[name] = np.full(shape, default, dtype=dtype)
+        self.free_rows = list(range(self.capacity - 1, -1, -1))
+        self.alive_count = 0
+        self.home_count = 0
+
+    def __len__(self):
+        """how many rows are in use"""
+        return self.capacity - len(self.free_rows)
+
+    def grow(self):
+        """double the capacity of every column"""
+        old_capacity = self.capacity
+        self.capacity *= 2
+        for name, (dtype, default) in self.COLUMNS.items():
+            old = self.columns[name]
+            shape = (self.capacity, 3) if name == "position" else (self.capacity,)
+            self.columns[name] = np.full(shape, default, dtype=dtype)
+            self.columns[name][:old_capacity] = old
+        self.free_rows = list(range(self.capacity - 1, old_capacity - 1, -1)) + self.free_rows
+
+    def allocate(self):
+        """claim a row and reset it to the default values
+
+        Returns:
+            int: the row
+        """
+        if(len(self.free_rows) == 0):
+            self.grow()
+        row = self.free_rows.pop()
+        for name, (dtype, default) in self.COLUMNS.items():
+            self.columns[name][row] = default
+        self.columns["in_use"][row] = True
+        return row
+
+    def allocate_many(self, count):
+        """claim many rows at once and reset them to the default values, one vectorized write per column
+
+        Args:
+            count (int): how many rows to claim
+
+        Returns:
+            np.ndarray: the rows, in the order allocate would have handed them out
+        """
+        while(len(self.free_rows) < count):
+            self.grow()
+        rows = np.array(self.free_rows[len(self.free_rows) - count:][::-1], dtype=np.intp)
+        del self.free_rows[len(self.free_rows) - count:]
+        for name, (dtype, default) in self.COLUMNS.items():
+            self.columns[name][rows] = default
+        self.columns["in_use"][rows] = True
+        return rows
+
+    def release(self, row):
+        """give a row back so it can be reused
+
+        Args:
+            row (int): the row
+        """
+        self.columns["in_use"][row] = False
+        self.set_counted(row, "spawned", False)
+        self.free_rows.append(row)
+
+    def row_counts(self, row):
+        """what a row adds to the counts
+
+        Args:
+            row (int): the row
+
+        Returns:
+            (int, int): 1 or 0 for alive and for home
+        """
+        c = self.columns
+        alive = bool(c["spawned"][row]) and not bool(c["eaten"][row])
+        home = alive and bool(c["at_city"][row])
+        return int(alive), int(home)
+
+    def set_counted(self, row, name, value):
+        """write one of the counted columns of a row and update `alive_count` and `home_count`
+
+        Args:
+            row (int): the row
+            name (str): the column, one of COUNTED_COLUMNS
+            value (bool): the new value
+        """
+        column = self.columns[name]
+        if(column[row] == value):
+            return
+        alive, home = self.row_counts(row)
+        column[row] = value
+        new_alive, new_home = self.row_counts(row)
+        self.alive_count += new_alive - alive
+        self.home_count += new_home - home
+
+    def spawned_mask(self, city_id=None):
+        """a mask of the rows of spawned critters
+
+        Args:
+            city_id (int, optional): only rows of critters from this city. Defaults to None, all cities.
+
+        Returns:
+            np.ndarray: boolean mask over all rows
+        """
+        mask = self.columns["spawned"].copy()
+        if(city_id != None):
+            mask &= self.columns["city_id"] == city_id
+        return mask
+
+    def all_home_or_eaten(self):
+        """have all spawned critters either returned home or been eaten, every living critter is home"""
+        return self.home_count == self.alive_count
+
+    def all_home(self):
+        """are all spawned critters at their city"""
+        return bool(np.all(self.columns["at_city"][self.columns["spawned"]]))
+
+    def city_sum(self, column, city_id, at_city_only=False):
+        """the sum of a column over the spawned critters of a city
+
+        Args:
+            column (str): the column to sum
+            city_id (int): the id of the city
+            at_city_only (bool, optional): only count critters that are at the city and not eaten. Defaults to False.
+        """
+        mask = self.spawned_mask(city_id)
+        if(at_city_only):
+            mask &= self.columns["at_city"] & ~self.columns["eaten"]
+        #fsum does not depend on the order of the rows, a world loaded from a checkpoint holds its critters in other rows
+        return math.fsum(self.columns[column][mask].tolist())
+
+    def evaluate(self, phase_time_limit_seconds):
+        """compute the fitness of every spawned critter at once, see `Critter.evaluate` for the definition
+
+        Args:
+            phase_time_limit_seconds (float): the time limit of a phase
+        """
+        mask = self.columns["spawned"]
+        c = self.columns
+        fit = c["got_food_this_round"][mask].astype(np.float64)
+        fit += c["food_eaten"][mask] / c["max_food"][mask]
+        fit += c["enemies_eaten"][mask]
+        fit += c["time_to_reach_first_food"][mask] / phase_time_limit_seconds
+        c["fitness"][mask] = np.where(c["at_city"][mask], fit, 0)
@@ -0,0 +1,354 @@
+"""
+This module defines the `GenomeMatrix` and `ReproductionEngine` classes, selection, crossover and mutation
+done over whole populations at once.
+
+Reproduction used to pair parents in a `while` loop that only ended once the city's food ran out (and never
+ended when a city had fewer than two parents), and every child cost one `Gene.crossover` and one
+`Gene.mutate` per gene. The engine instead packs a city's genomes into an (N x genes) matrix per gene
+field and works out the number of children up front, so selection is one sort, pairing is one index
+computation and crossover, mutation and clamping are one array operation each over every child.
+
+The operators keep the semantics of `Gene`: a child takes the value of the more dominant parent (the
+first on a tie), averages the parents' mutation rates and steps, keeps the larger dominance and is one
+generation past the older parent. Each value then mutates with its mutation rate by up to its mutation
+step and is clamped to the gene's bounds.
+
+Classes:
+    GenomeMatrix: the gene fields of many genomes, one (N x genes) array per field.
+    ReproductionEngine: vectorized selection, pairing, crossover, mutation and clamping.
+
+Example Usage:
+    from GA.Genome import DEFAULT_SCHEMA
+    from GA.Reproduction import GenomeMatrix, ReproductionEngine
+
+    engine = ReproductionEngine(DEFAULT_SCHEMA)
+    parents = GenomeMatrix.from_genomes(DEFAULT_SCHEMA, [critter.genes for critter in critters])
+    children, first, second = engine.breed(parents, fitness, count=100000)
+    children.genes(0)  # the Gene list of the first child
+"""
+
+import math
+import random
+import numpy as np
+
+from GA.Gene import Gene
+
+
+class GenomeMatrix:
+    """
+    The gene fields of many genomes, row i is genome i and column j is gene j of the schema.
+
+    Attributes:
+        FIELDS (tuple): the Gene attribute every array holds.
+        schema (GenomeSchema): the gene layout of the columns.
+        values (np.ndarray): (N, genes) gene values.
+        mutation_rates (np.ndarray): (N, genes) chance of a value mutating.
+        mutation_steps (np.ndarray): (N, genes) the most a mutation moves a value.
+        dominance (np.ndarray): (N, genes) crossover priority.
+        generation (np.ndarray): (N, genes) the generation a gene was made in.
+
+    Methods:
+        blank(schema, count): a matrix of genomes with every gene at its template.
+        from_genomes(schema, genomes): pack lists of `Gene` objects into a matrix.
+        from_entities(schema, entities): pack the genomes of entities, copying matrix backed ones by row.
+        take(rows): a new matrix of some rows, rows may repeat.
+        genes(row): unpack one row into a list of `Gene` objects.
+    """
+    FIELDS = ("values", "mutation_rates", "mutation_steps", "dominance", "generation")
+
+    def __init__(self, schema, values, mutation_rates, mutation_steps, dominance, generation):
+        """wrap the arrays of a matrix, every array is (N, len(schema))
+
+        Args:
+            schema (GenomeSchema): the gene layout of the columns
+            values (np.ndarray): the gene values
+            mutation_rates (np.ndarray): the mutation rates
+            mutation_steps (np.ndarray): the mutation steps
+            dominance (np.ndarray): the dominance
+            generation (np.ndarray): the generations
+        """
+        self.schema = schema
+        self.values = values
+        self.mutation_rates = mutation_rates
+        self.mutation_steps = mutation_steps
+        self.dominance = dominance
+        self.generation = generation
+
+    def __len__(self):
+        """how many genomes are in the matrix"""
+        return len(self.values)
+
+    @classmethod
+    def blank(cls, schema, count):
+        """a matrix of genomes that carry no genes, every gene has the schema template's rates and dominance and its min value
+
+        Args:
+            schema (GenomeSchema): the gene layout
+            count (int): how many genomes
+
+        Returns:
+            GenomeMatrix: the matrix
+        """
+        templates = schema.templates
+        return cls(
+            schema,
+            np.tile(schema.min_values, (count, 1)),
+            np.tile(np.array([gene.mutation_rate for gene in templates], dtype=np.float64), (count, 1)),
+            np.tile(np.array([gene.mutation_step for gene in templates], dtype=np.float64), (count, 1)),
+            np.tile(np.array([gene.dominance for gene in templates], dtype=np.int64), (count, 1)),
+            np.zeros((count, len(schema)), dtype=np.int64),
+        )
+
+    @classmethod
+    def from_genomes(cls, schema, genomes):
+        """pack lists of `Gene` objects into a matrix, genes a genome does not carry take the schema's template
+
+        Args:
+            schema (GenomeSchema): the gene layout
+            genomes (list): one list of `Gene` objects per genome
+
+        Returns:
+            GenomeMatrix: the matrix
+        """
+        matrix = cls.blank(schema, len(genomes))
+        values, mutation_rates, mutation_steps = matrix.values, matrix.mutation_rates, matrix.mutation_steps
+        dominance, generation = matrix.dominance, matrix.generation
+        for row, genes in enumerate(genomes):
+            for gene in genes:
+                column = schema.index[gene.name]
+                values[row, column] = gene.value
+                mutation_rates[row, column] = gene.mutation_rate
+                mutation_steps[row, column] = gene.mutation_step
+                dominance[row, column] = gene.dominance
+                generation[row, column] = gene.generation
+        return matrix
+
+    @classmethod
+    def from_entities(cls, schema, entities):
+        """pack the genomes of entities into a matrix. an entity whose genes were never built still points at
+        its row of another matrix (see `Entity.genome_row`), those rows are copied over one matrix at a time
+        and only the other entities go through their `Gene` objects
+
+        Args:
+            schema (GenomeSchema): the gene layout
+            entities (list): the entities
+
+        Returns:
+            GenomeMatrix: one row per entity, in order
+        """
+        #source matrix id -> (source, target rows, source rows)
+        backed = {}
+        loose = []
+        for i, genome_row in enumerate([entity.genome_row for entity in entities]):
+            if(genome_row is None or genome_row[0].schema is not schema):
+                loose.append(i)
+                continue
+            group = backed.get(id(genome_row[0]))
+            if(group is None):
+                group = backed[id(genome_row[0])] = (genome_row[0], [], [])
+            group[1].append(i)
+            group[2].append(genome_row[1])
+
+        matrix = cls.blank(schema, len(entities))
+        for source, targets, rows in backed.values():
+            for field in cls.FIELDS:
+                getattr(matrix, field)[targets] = getattr(source, field)[rows]
+        if(len(loose) > 0):
+            genes = cls.from_genomes(schema, [entities[i].genes for i in loose])
+            for field in cls.FIELDS:
+                getattr(matrix, field)[loose] = getattr(genes, field)
+        return matrix
+
+    def take(self, rows):
+        """a new matrix of some rows
+
+        Args:
+            rows (np.ndarray): the rows to take, may repeat
+
+        Returns:
+            GenomeMatrix: one row per entry of rows
+        """
+        return GenomeMatrix(self.schema, *(getattr(self, field)[rows] for field in self.FIELDS))
+
+    def genes(self, row):
+        """unpack one row into a list of `Gene` objects in schema order
+
+        Args:
+            row (int): the row
+
+        Returns:
+            list: one `Gene` per gene of the schema
+        """
+        return list(map(
+            Gene.of,
+            self.schema.definitions,
+            self.values[row].tolist(),
+            self.mutation_rates[row].tolist(),
+            self.mutation_steps[row].tolist(),
+            self.dominance[row].tolist(),
+            self.generation[row].tolist(),
+        ))
+
+
+class ReproductionEngine:
+    """
+    Vectorized selection, pairing, crossover, mutation and clamping over a `GenomeMatrix`.
+
+    Attributes:
+        schema (GenomeSchema): the gene layout, its bounds are used for clamping.
+        rng (np.random.Generator): the random generator of every mutation roll.
+
+    Methods:
+        offspring_count(food): how many children a city's food pays for.
+        select(fitness): the indices of the parents, the fittest half, fittest first.
+        pair(parent_count, count): the parent pairs and the pair of every child.
+        crossover(parents, first, second): the child of every parent pair, before mutation.
+        mutate(children): mutate every value of the children in place.
+        clamp(children): clamp every value of the children to the gene bounds in place.
+        breed_pairs(parents, first, second, assignment=None): crossover, mutate and clamp in one call.
+        breed(parents, fitness, count): select, pair and breed `count` children.
+    """
+
+    def __init__(self, schema, rng=None):
+        """create the engine
+
+        Args:
+            schema (GenomeSchema): the gene layout
+            rng (np.random.Generator, optional): the random generator. Defaults to one seeded from python's random, so seeding that seeds reproduction too.
+        """
+        self.schema = schema
+        self.rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+
+    @staticmethod
+    def offspring_count(food):
+        """how many children a city's food pays for, one per started unit of food
+
+        Args:
+            food (float): the food the city's critters brought home
+
+        Returns:
+            int: the number of children, 0 if there is no food
+        """
+        if(not food > 0 or math.isinf(food)):
+            return 0
+        return int(math.ceil(food))
+
+    def select(self, fitness):
+        """the indices of the parents, the fittest half (at least one), fittest first. ties keep their order
+
+        Args:
+            fitness (np.ndarray): (N,) the fitness of every genome, nan counts as the worst
+
+        Returns:
+            np.ndarray: the selected indices
+        """
+        fitness = np.nan_to_num(np.asarray(fitness, dtype=np.float64), nan=-np.inf)
+        if(len(fitness) == 0):
+            return np.zeros(0, dtype=np.intp)
+        order = np.argsort(-fitness, kind="stable")
+        return order[:max(len(fitness) // 2, 1)]
+
+    def pair(self, parent_count, count):
+        """the parent pairs and which pair every child comes from. parents pair up in order (0 with 1, 2 with 3...)
+        and the pairs take turns until every child has parents. an odd last parent sits out, a lone parent pairs with itself
+
+        Args:
+            parent_count (int): how many parents there are
+            count (int): how many children to pair for
+
+        Returns:
+            (np.ndarray, np.ndarray, np.ndarray): the first and second parent of every pair and the pair of every child
+        """
+        if(parent_count == 0 or count <= 0):
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty, empty
+        if(parent_count == 1):
+            lone = np.zeros(1, dtype=np.intp)
+            return lone, lone, np.zeros(count, dtype=np.intp)
+        pairs = np.arange(parent_count // 2)
+        return 2 * pairs, 2 * pairs + 1, np.arange(count) % len(pairs)
+
+    def crossover(self, parents, first, second):
+        """the child of every parent pair, before mutation. crossover has no randomness so every child of a
+        pair starts as the same row
+
+        Args:
+            parents (GenomeMatrix): the parents
+            first (np.ndarray): the first parent row of every pair
+            second (np.ndarray): the second parent row of every pair
+
+        Returns:
+            GenomeMatrix: one row per pair
+        """
+        first_wins = parents.dominance[first] >= parents.dominance[second]
+        return GenomeMatrix(
+            self.schema,
+            np.where(first_wins, parents.values[first], parents.values[second]),
+            (parents.mutation_rates[first] + parents.mutation_rates[second]) / 2,
+            (parents.mutation_steps[first] + parents.mutation_steps[second]) / 2,
+            np.maximum(parents.dominance[first], parents.dominance[second]),
+            np.maximum(parents.generation[first], parents.generation[second]) + 1,
+        )
+
+    def mutate(self, children):
+        """mutate every value of the children in place, each mutates with its own rate by up to its own step
+
+        Args:
+            children (GenomeMatrix): the children
+        """
+        #one roll per value: below the rate it mutates, and roll / rate is then itself uniform in [0, 1).
+        #every step is done in place on the rolls, this runs over millions of values
+        rolls = self.rng.random(children.values.shape)
+        keeps = rolls >= children.mutation_rates
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(rolls, children.mutation_rates, out=rolls)
+        rolls *= 2
+        rolls -= 1
+        rolls *= children.mutation_steps
+        np.putmask(rolls, keeps, 0)
+        children.values += rolls
+
+    def clamp(self, children):
+        """clamp every value of the children to the gene bounds in place, a missing bound does not clamp
+
+        Args:
+            children (GenomeMatrix): the children
+        """
+        #fmax and fmin ignore the nan of a missing bound
+        np.fmax(children.values, self.schema.min_values, out=children.values)
+        np.fmin(children.values, self.schema.max_values, out=children.values)
+
+    def breed_pairs(self, parents, first, second, assignment=None):
+        """crossover, mutate and clamp
+
+        Args:
+            parents (GenomeMatrix): the parents
+            first (np.ndarray): the first parent row of every pair
+            second (np.ndarray): the second parent row of every pair
+            assignment (np.ndarray, optional): the pair of every child. Defaults to None, one child per pair.
+
+        Returns:
+            GenomeMatrix: one row per child
+        """
+        children = self.crossover(parents, first, second)
+        if(assignment is not None):
+            children = children.take(assignment)
+        self.mutate(children)
+        self.clamp(children)
+        return children
+
+    def breed(self, parents, fitness, count):
+        """select the fittest half of the parents and breed `count` children from them, no loop depends on food or luck so this always ends
+
+        Args:
+            parents (GenomeMatrix): every genome that may be a parent
+            fitness (np.ndarray): (N,) the fitness of every genome
+            count (int): how many children to breed
+
+        Returns:
+            (GenomeMatrix, np.ndarray, np.ndarray): the children and the first and second parent of every child as rows of `parents`
+        """
+        selected = self.select(fitness)
+        first, second, assignment = self.pair(len(selected), count)
+        first, second = selected[first], selected[second]
+        return self.breed_pairs(parents, first, second, assignment), first[assignment], second[assignment]
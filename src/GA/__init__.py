@@ -8,14 +8,22 @@ physics enabled it is an entity.
 Genes -- all entities have genes, genes effect various things and can be added and removed. 
 genes evolve, crossover and mutate durring the reproduction phase
 
+Genome -- the compiled gene layout, every gene has a fixed index into an entity's gene value array
+
 City -- a place where critters spawn from and nest
 
 Corpse -- the dead remains of a critter
 
+CritterSystem -- the one task that runs every critter's decisions and then the movement step
+
 Food -- what critter's eat
 
-Logger -- TODO: implement this
+FoodQuery -- per tick cached nearest and within radius food answers for the critters that ask
+
+Logger -- the per round, per city metrics rows appended to a gzip compressed CSV through a bounded buffer
+
+Population -- the struct of arrays table holding the per round state of every critter, critters are views over its rows
 
-Population -- unused, was meant to serve similar purpose as city, but city took over that role
+Reproduction -- vectorized selection, crossover and mutation over a matrix of every parent's genes
     
 """
\ No newline at end of file
@@ -3,10 +3,14 @@ Module for managing the lifecycle of a simulation round, including different pha
 
 This module contains the `RoundManager` class, which is responsible for controlling the flow of a round in the simulation. It transitions through various phases and triggers actions associated with each phase. The `RoundManager` ensures that the simulation progresses according to predefined conditions, such as time limits and the state of food and critters in the environment.
 
+Nothing here scans the critters or food. The population table counts alive and home critters as they spawn,
+get eaten, arrive home and are removed, and the food set knows its own size, so every phase check is O(1) and
+`BaseApp.handle_ga_loop` asks them every tick. A phase ends on the tick its condition becomes true.
+
 Dependencies:
     - `GA.Food`: For accessing the food objects present in the simulation.
     - `GA.Critter`: For managing the critters and their statuses (e.g., whether they are alive or home).
-    - `time`: For tracking the time spent in each phase of the simulation.
+    - `CORE.clock`: The simulation clock of the base app, used for tracking the time spent in each phase of the simulation.
 
 Classes:
     - `RoundManager`: Manages the round lifecycle and transitions between simulation phases.
@@ -14,8 +18,6 @@ Classes:
 from GA.Food import Food
 from GA.Critter import Critter
 
-import time
-
 
 class RoundManager:
     """
@@ -26,11 +28,17 @@ class RoundManager:
         population_cap (int): The maximum number of critters allowed in the simulation.
         current_phase_index (int): Index of the current phase (0 - Initialization, 1 - Simulation, 2 - Evaluation, 3 - Reproduction).
         round_count (int): The number of complete rounds (epochs) that have been executed.
-        phase_start_time (float): The timestamp when the current phase started.
+        phase_start_time (float): The simulation time when the current phase started.
         phase_time_limit_seconds (int): The time limit (in seconds) for each phase before transitioning to the next.
+        phase_durations (dict): Phase name -> the simulated seconds the last run of that phase took.
+        TASK_SORT (int): The task sort of the phase check, positive so it runs after critters think, move and eat in the same frame.
 
     Methods:
         __init__(base_app, population_cap=100): Initializes a new round manager with a reference to the main app and optional population cap.
+        start(task_mgr, loop): Adds the task that checks the phase every tick.
+        food_remaining(): How much food is left on the map.
+        alive_count(): How many spawned critters have not been eaten.
+        home_count(): How many living critters are at their city.
         is_no_more_food(): Checks if there is any food remaining on the map.
         all_alive_critters_are_home(): Checks if all critters have either returned home or been eaten.
         get_phase_time(): Returns the elapsed time since the current phase started.
@@ -47,6 +55,8 @@ class RoundManager:
 
     PHASES = ["Initialization", "Simulation", "Evaluation", "Reproduction"]
 
+    TASK_SORT = 50
+
     def __init__(self, base_app, population_cap=100):
         """
         Initialize the round manager.
@@ -59,26 +69,46 @@ class RoundManager:
         self.current_phase_index = 0 # the current phase index 0-3
         self.round_count=0 #how many epoachs of all the phases have run
         self.population_cap = population_cap
-        self.phase_start_time = time.time()
+        self.phase_start_time = self.base_app.sim_clock.get_time()
         self.phase_time_limit_seconds = 30
+        self.phase_durations = {} #phase name -> simulated seconds the last run of that phase took
         
+    def start(self, task_mgr, loop):
+        """add the task that checks for phase changes every tick, after the critters have thought and moved
+
+        Args:
+            task_mgr (TaskManager): the task manager of the app
+            loop (function): the task function, `BaseApp.handle_ga_loop`
+        """
+        task_mgr.add(loop, "handle_main_loop", sort=self.TASK_SORT)
+
+    def food_remaining(self):
+        """how much food is left on the map, the food set drops food as it is eaten or removed"""
+        return len(Food.foods)
+
+    def alive_count(self):
+        """how many spawned critters have not been eaten"""
+        return Critter.population.alive_count
+
+    def home_count(self):
+        """how many living critters are at their city"""
+        return Critter.population.home_count
+
     def is_no_more_food(self):
         """is there any food left on the map
 
         Returns:
-            _type_: _description_
+            bool: true if every food has been eaten or removed
         """
-        return len(Food.foods)==0
+        return self.food_remaining()==0
     
     def all_alive_critters_are_home(self):
         """if all critters taht were not eated already returned home"""
-        val = all(critter.at_city or critter.eaten for critter in Critter.critters)
-        #print(f"all eaten or home: {val}")
-        return val
+        return self.home_count() == self.alive_count()
     
     def get_phase_time(self):
-        """get the amount of time in seconds since the start oof this round"""
-        return time.time() - self.phase_start_time
+        """get the amount of simulated time in seconds since the start oof this round"""
+        return self.base_app.sim_clock.get_time() - self.phase_start_time
     
     def is_phase_over_the_time_limit(self):
         return self.get_phase_time() > self.phase_time_limit_seconds
@@ -90,7 +120,7 @@ class RoundManager:
         return (self.is_no_more_food() or self.is_phase_over_the_time_limit() or self.all_alive_critters_are_home()) and self.current_phase_index == 1
     
     def is_all_critters_at_home(self):
-        return all(critter.at_city for critter in Critter.critters)
+        return Critter.population.all_home()
     
     def is_evaluation_phase_done(self):
         """is the evaluation phase over
@@ -113,12 +143,13 @@ class RoundManager:
 
     def next_phase(self):
         """Advance to the next phase in the cycle."""
+        self.phase_durations[self.get_current_phase()] = self.get_phase_time()
         self.current_phase_index = (self.current_phase_index + 1) % len(self.PHASES)
         self.trigger_phase_start()
 
     def trigger_phase_start(self):
         """Trigger the start of the current phase."""
-        self.phase_start_time = time.time()
+        self.phase_start_time = self.base_app.sim_clock.get_time()
         phase = self.get_current_phase()
         print(f"Starting Phase: {phase}")
         if phase == "Initialization":
@@ -0,0 +1,493 @@
+"""
+World checkpoints, save a running world to one compressed `.npz` file and load it back into an app.
+
+A checkpoint is taken at a round boundary, by the next round's initialization once it has removed the
+critters, food and corpses of the finished round and before it spawns anything. The finished round's
+critters still act on the tick between reproduction and initialization, so that is the first point where
+the world is only what outlives a round: the terrain heights, the cities and their houses, the children
+every city will spawn and the round manager's counters, so that is all a checkpoint holds. Loading one
+finishes that initialization. The random state of python's `random`, of the reproduction engine and of the
+movement system is saved too, and so are the city ids, the entity registry's next id and the physics step
+accumulator, so a world loaded from a checkpoint goes on exactly like the run that saved it, with the same ids.
+
+Everything is a plain NumPy array, nothing is pickled: the genomes of every child are the columns of a
+`GenomeMatrix` (one (N x genes) array per field), the cities and children are one row each, and the
+children are rebuilt with `Critter.create_many`, so loading a 50k critter world is a few array reads
+and no per gene objects.
+
+`Autosaver` writes checkpoints on a background thread. The main thread only copies the world's arrays at
+the end of a round, compressing, writing and fsyncing happen on the worker while the next round runs.
+zlib and file writes release the GIL, so the simulation keeps its pace while a snapshot lands on disk.
+
+Classes:
+    - `WorldCheckpoint`: the arrays of a saved world, capture them from an app, write, read and restore them.
+    - `Autosaver`: writes checkpoints on a worker thread, atomically, and keeps only the newest few.
+
+Example Usage:
+    from checkpoint import WorldCheckpoint
+
+    WorldCheckpoint.capture(app).write("world.npz")  # at a round boundary
+    WorldCheckpoint.read("world.npz").restore(app)
+
+    autosaver = Autosaver("autosaves", keep=5)
+    autosaver.round_finished(app)  # at every round boundary
+    WorldCheckpoint.read(Autosaver.latest("autosaves")).restore(app)
+"""
+
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+from GA.City import City
+from GA.Corpse import Corpse
+from GA.Critter import Critter
+from GA.Food import Food
+from GA.Genome import DEFAULT_SCHEMA
+from GA.Reproduction import GenomeMatrix
+from CORE.entity import Entity
+from CORE.registry import EntitySet
+
+
+class WorldCheckpoint():
+    """
+    The arrays of a saved world.
+
+    Attributes:
+        VERSION (int): the layout version written into every checkpoint, a checkpoint of another version is refused.
+        GENOME_FIELDS (dict): checkpoint array name -> the `GenomeMatrix` field it holds.
+        arrays (dict): array name -> np.ndarray, exactly what is in the file.
+
+    Methods:
+        at_round_boundary(app): can the app's world be captured now.
+        capture(app): copy the state of an app's world into a checkpoint.
+        write(file): save the checkpoint as a compressed .npz.
+        read(file): load a checkpoint written by write.
+        genomes(): the saved genomes in the layout of the current schema.
+        restore(app): replace the app's world with the checkpoint's.
+    """
+    VERSION = 2
+
+    GENOME_FIELDS = {
+        "genome_values": "values",
+        "genome_mutation_rates": "mutation_rates",
+        "genome_mutation_steps": "mutation_steps",
+        "genome_dominance": "dominance",
+        "genome_generation": "generation",
+    }
+
+    def __init__(self, arrays):
+        """wrap the arrays of a checkpoint, use capture or read to make one
+
+        Args:
+            arrays (dict): array name -> np.ndarray
+        """
+        self.arrays = arrays
+
+    @staticmethod
+    def at_round_boundary(app):
+        """can the app's world be captured now, true before the first round and during a round's initialization before anything is spawned
+
+        Args:
+            app (BaseApp): the app
+
+        Returns:
+            bool: true at a round boundary
+        """
+        manager = app.round_manager
+        return not app.simulation_started or (manager.get_current_phase() == "Initialization" and len(Critter.critters) == 0)
+
+    @classmethod
+    def capture(cls, app):
+        """copy the state of an app's world, every array is a copy so the world may go on while it is written
+
+        Args:
+            app (BaseApp): the app, at a round boundary
+
+        Returns:
+            WorldCheckpoint: the checkpoint
+        """
+        if(not cls.at_round_boundary(app)):
+            raise RuntimeError(f"checkpoints are taken between rounds, the round is in its {app.round_manager.get_current_phase()} phase")
+
+        cities = list(City.cities)
+        children = [child for city in cities for child in city.children]
+        genomes = GenomeMatrix.from_entities(DEFAULT_SCHEMA, children)
+        manager = app.round_manager
+
+        arrays = {
+            "version": np.array(cls.VERSION),
+            "round_count": np.array(manager.round_count),
+            "current_phase_index": np.array(manager.current_phase_index),
+            "phase_time_limit_seconds": np.array(manager.phase_time_limit_seconds, dtype=np.float64),
+            "simulation_started": np.array(app.simulation_started),
+            "sim_time": np.array(app.sim_clock.time, dtype=np.float64),
+            "sim_tick_count": np.array(app.sim_clock.tick_count),
+            "think_tick": np.array(app.critter_system.tick),
+            "physics_accumulator": np.array(app.physics.accumulator, dtype=np.float64),
+            "heights": app.terrainController.get_gray_heights(),
+            "city_positions": np.array([tuple(city.get_pos()) for city in cities], dtype=np.float64).reshape(-1, 3),
+            "city_colors": np.array([city.color for city in cities], dtype=np.float64).reshape(-1, 4),
+            "city_radius": np.array([city.city_bounds_radius for city in cities], dtype=np.float64),
+            "city_initialized": np.array([city.has_been_initialized for city in cities], dtype=np.bool_),
+            "city_ids": np.array([city.id for city in cities], dtype=np.int64),
+            #a house that came to rest is asleep, one woken up again would jitter where the saved one did not
+            "city_active": np.array([city.node == None or city.node.is_active() for city in cities], dtype=np.bool_),
+            "city_deactivation_time": np.array([0 if city.node == None else city.node.get_deactivation_time() for city in cities], dtype=np.float64),
+            "next_id": np.array(Entity.registry.next_id),
+            "child_city": np.repeat(np.arange(len(cities)), [len(city.children) for city in cities]),
+            "child_positions": Critter.population.columns["position"][[child.row for child in children]].reshape(-1, 3),
+            "gene_names": np.array(DEFAULT_SCHEMA.names),
+            #json so nothing has to be pickled, the numpy state holds 128 bit ints
+            "random_state": np.array(json.dumps({
+                "python": random.getstate(),
+                "reproduction": app.reproduction.rng.bit_generator.state,
+                "movement": app.movement_system.rng.bit_generator.state,
+            })),
+        }
+        for name, field in cls.GENOME_FIELDS.items():
+            arrays[name] = getattr(genomes, field)
+        return cls(arrays)
+
+    def write(self, file):
+        """save the checkpoint as a compressed .npz
+
+        Args:
+            file (str or file): the path or an open binary file. a path is written as is, numpy does not add .npz to it
+        """
+        if(isinstance(file, str)):
+            with open(file, "wb") as f:
+                np.savez_compressed(f, **self.arrays)
+        else:
+            np.savez_compressed(file, **self.arrays)
+
+    @classmethod
+    def read(cls, file):
+        """load a checkpoint written by write
+
+        Args:
+            file (str or file): the path or an open binary file
+
+        Returns:
+            WorldCheckpoint: the checkpoint
+        """
+        with np.load(file, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        version = int(arrays.get("version", -1))
+        if(version != cls.VERSION):
+            raise ValueError(f"checkpoint version {version} cannot be loaded, expected version {cls.VERSION}")
+        return cls(arrays)
+
+    def genomes(self):
+        """the saved genomes in the layout of the current schema, genes the checkpoint does not have keep their template
+
+        Returns:
+            GenomeMatrix: one row per child
+        """
+        names = self.arrays["gene_names"].tolist()
+        if(names == DEFAULT_SCHEMA.names):
+            return GenomeMatrix(DEFAULT_SCHEMA, *(self.arrays[name] for name in self.GENOME_FIELDS))
+        unknown = [name for name in names if name not in DEFAULT_SCHEMA.index]
+        if(len(unknown) > 0):
+            raise ValueError(f"checkpoint has genes the schema does not know: {unknown}")
+        columns = [DEFAULT_SCHEMA.index[name] for name in names]
+        matrix = GenomeMatrix.blank(DEFAULT_SCHEMA, len(self.arrays["child_city"]))
+        for name, field in self.GENOME_FIELDS.items():
+            getattr(matrix, field)[:, columns] = self.arrays[name]
+        return matrix
+
+    def restore(self, app):
+        """replace the app's world with the checkpoint's, every critter, food, corpse and city is removed first.
+        a world saved during a round's initialization finishes it, the app continues with that round's simulation
+
+        Args:
+            app (BaseApp): the app
+        """
+        a = self.arrays
+        genomes = self.genomes()
+
+        Critter.remove_all_critters()
+        Food.remove_all_food()
+        Corpse.remove_all_corpse()
+        for critter in app.replaced_critters:
+            critter.release_row()
+        app.replaced_critters.clear()
+        for city in City.cities:
+            for child in city.children:
+                child.release_row()
+            city.children = EntitySet()
+        City.remove_all_cities()
+
+        app.terrainController.set_gray_heights(a["heights"])
+
+        child_city = a["child_city"]
+        for i, (position, color) in enumerate(zip(a["city_positions"].tolist(), a["city_colors"].tolist())):
+            city = City(app, position=tuple(position), color=tuple(color), city_bounds_radius=float(a["city_radius"][i]))
+            #the saved id, not a new one, so anything keyed by city id carries on across the load
+            city.set_id(int(a["city_ids"][i]))
+            city = city.spawn(position[0], position[1], tuple(color))
+            if(city == None):
+                raise ValueError(f"checkpoint city {i} at {position} is outside of the map")
+            #houses are rigid bodies that settle onto the terrain, put them where they had come to rest instead of dropping them again
+            city.body_np.set_pos(*position)
+            city.position = tuple(position)
+            if(city.node != None):
+                city.node.set_deactivation_time(float(a["city_deactivation_time"][i]))
+                if(not a["city_active"][i]):
+                    city.node.set_active(False, True)
+            city.has_been_initialized = bool(a["city_initialized"][i])
+            rows = np.flatnonzero(child_city == i)
+            city.children = EntitySet(Critter.create_many(app, city, genomes.take(rows), a["child_positions"][rows]))
+
+        #every entity was removed above, ids go on from where the saved world was
+        Entity.registry.next_id = int(a["next_id"])
+
+        manager = app.round_manager
+        manager.round_count = int(a["round_count"])
+        manager.current_phase_index = int(a["current_phase_index"])
+        manager.phase_time_limit_seconds = float(a["phase_time_limit_seconds"])
+        app.simulation_started = bool(a["simulation_started"])
+        app.sim_clock.time = float(a["sim_time"])
+        app.sim_clock.tick_count = int(a["sim_tick_count"])
+        #which bucket thinks first depends on it
+        app.critter_system.tick = int(a["think_tick"])
+        app.physics.accumulator = float(a["physics_accumulator"])
+        manager.phase_start_time = app.sim_clock.get_time()
+
+        #last, building the world above draws random numbers too
+        state = json.loads(str(a["random_state"]))
+        version, internal, gauss = state["python"]
+        random.setstate((version, tuple(internal), gauss))
+        app.reproduction.rng.bit_generator.state = state["reproduction"]
+        app.movement_system.rng.bit_generator.state = state["movement"]
+
+        #the saved run was in the middle of initialization, finish it the same way
+        if(app.simulation_started):
+            app.populate_round()
+            manager.next_phase()
+
+
+class Autosaver():
+    """
+    Writes checkpoints on a background thread so the simulation never waits on compression or the disk.
+
+    `round_finished` runs on the main thread at the end of a round. It only captures the world, which copies
+    its arrays, and queues the copy. The worker thread then compresses it, writes it to a temporary file, fsyncs
+    it and renames it into place, so a crash leaves either the old autosave or the new one and never half of one.
+    Only the newest `keep` autosaves are kept. If the worker is still busy with `max_pending` checkpoints,
+    the round is skipped instead of queuing more copies of the world.
+
+    Attributes:
+        directory (str): where autosaves are written.
+        prefix (str): the file name of an autosave is `<prefix>-<round>.npz`.
+        keep (int): how many autosaves are kept, older ones are deleted.
+        every (int): autosave once every this many rounds.
+        max_pending (int): how many captured checkpoints may wait for the worker.
+        saved (int): how many autosaves were written.
+        skipped (int): how many rounds were not saved because the worker was behind.
+        failed (int): how many autosaves could not be written.
+        last_error (Exception): the error of the last failed autosave, None if none failed.
+        last_capture_seconds (float): main thread seconds spent on the last capture.
+        last_write_seconds (float): worker seconds spent writing the last autosave.
+
+    Methods:
+        round_finished(app): capture and queue a checkpoint if this round is due one.
+        submit(checkpoint, round_count): queue a captured checkpoint to be written.
+        path_of(round_count): the file an autosave of a round is written to.
+        autosaves(): the paths of every autosave on disk, oldest first.
+        list_autosaves(directory, prefix="autosave"): the paths of every autosave in a directory, oldest first.
+        latest(directory, prefix="autosave"): the path of the newest autosave in a directory.
+        close(): write everything queued and stop the worker.
+        summary(): the autosave counts as a string.
+    """
+
+    def __init__(self, directory, keep=5, every=1, prefix="autosave", max_pending=1):
+        """create the autosaver and start its worker thread
+
+        Args:
+            directory (str): where autosaves are written, created if missing
+            keep (int, optional): how many autosaves are kept. Defaults to 5.
+            every (int, optional): autosave once every this many rounds. Defaults to 1.
+            prefix (str, optional): the file name prefix of autosaves. Defaults to "autosave".
+            max_pending (int, optional): how many captured checkpoints may wait for the worker. Defaults to 1.
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.keep = max(int(keep), 1)
+        self.every = max(int(every), 1)
+        self.max_pending = max(int(max_pending), 1)
+        self.saved = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_error = None
+        self.last_capture_seconds = 0.0
+        self.last_write_seconds = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+        self.queue = queue.Queue(maxsize=self.max_pending)
+        self.worker = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.worker.start()
+        #a daemon thread is killed at exit, write what is queued first
+        atexit.register(self.close)
+
+    def round_finished(self, app):
+        """capture and queue a checkpoint if this round is due one, call at a round boundary on the main thread
+
+        Args:
+            app (BaseApp): the app
+
+        Returns:
+            bool: true if a checkpoint was queued
+        """
+        round_count = app.round_manager.round_count
+        if(round_count % self.every != 0):
+            return False
+        #check before capturing, a full queue means the copy would be thrown away
+        if(self.queue.full()):
+            self.skipped += 1
+            return False
+        start = time.perf_counter()
+        checkpoint = WorldCheckpoint.capture(app)
+        self.last_capture_seconds = time.perf_counter() - start
+        return self.submit(checkpoint, round_count)
+
+    def submit(self, checkpoint, round_count):
+        """queue a captured checkpoint to be written, never blocks
+
+        Args:
+            checkpoint (WorldCheckpoint): the checkpoint, nothing may change its arrays afterwards
+            round_count (int): the round it was captured after, names the file
+
+        Returns:
+            bool: true if it was queued, false if the worker is behind and it was skipped
+        """
+        if(not self.worker.is_alive()):
+            raise RuntimeError("the autosaver is closed")
+        try:
+            self.queue.put_nowait((checkpoint, round_count))
+            return True
+        except queue.Full:
+            self.skipped += 1
+            return False
+
+    def path_of(self, round_count):
+        """the file an autosave of a round is written to
+
+        Args:
+            round_count (int): the round
+
+        Returns:
+            str: the path
+        """
+        return os.path.join(self.directory, f"{self.prefix}-{round_count:08d}.npz")
+
+    def autosaves(self):
+        """the paths of every autosave on disk, oldest first. the round is zero padded so names sort by round
+
+        Returns:
+            list: the paths
+        """
+        return self.list_autosaves(self.directory, self.prefix)
+
+    @staticmethod
+    def list_autosaves(directory, prefix="autosave"):
+        """the paths of every autosave with a prefix in a directory, oldest first
+
+        Args:
+            directory (str): the directory
+            prefix (str, optional): the file name prefix. Defaults to "autosave".
+
+        Returns:
+            list: the paths
+        """
+        if(not os.path.isdir(directory)):
+            return []
+        names = [name for name in os.listdir(directory) if name.startswith(prefix + "-") and name.endswith(".npz")]
+        return [os.path.join(directory, name) for name in sorted(names)]
+
+    @staticmethod
+    def latest(directory, prefix="autosave"):
+        """the path of the newest autosave in a directory
+
+        Args:
+            directory (str): the directory
+            prefix (str, optional): the file name prefix. Defaults to "autosave".
+
+        Returns:
+            str: the path, None if there are no autosaves
+        """
+        autosaves = Autosaver.list_autosaves(directory, prefix)
+        return autosaves[-1] if len(autosaves) > 0 else None
+
+    def run(self):
+        """the worker thread, writes queued checkpoints until it gets None"""
+        while(True):
+            item = self.queue.get()
+            if(item == None):
+                self.queue.task_done()
+                return
+            #unpacked before the try so the error message can always name the round
+            checkpoint, round_count = item
+            try:
+                start = time.perf_counter()
+                self.write(checkpoint, self.path_of(round_count))
+                self.rotate()
+                self.last_write_seconds = time.perf_counter() - start
+                self.saved += 1
+            except Exception as e:
+                #a full disk must not take the simulation down, the next round tries again
+                self.failed += 1
+                self.last_error = e
+                print(f"autosave of round {round_count} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    def write(self, checkpoint, path):
+        """write a checkpoint so that the path only ever holds a whole file
+
+        Args:
+            checkpoint (WorldCheckpoint): the checkpoint
+            path (str): where it ends up
+        """
+        temp = path + ".tmp"
+        try:
+            with open(temp, "wb") as f:
+                checkpoint.write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, path)
+        finally:
+            if(os.path.exists(temp)):
+                os.remove(temp)
+        #the rename is only durable once the directory is synced, windows cannot open a directory to do so
+        if(hasattr(os, "O_DIRECTORY")):
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def rotate(self):
+        """delete all but the newest `keep` autosaves"""
+        for path in self.autosaves()[:-self.keep]:
+            os.remove(path)
+
+    def close(self):
+        """write everything queued and stop the worker, safe to call more than once"""
+        if(self.worker.is_alive()):
+            self.queue.put(None)
+            self.worker.join()
+
+    def summary(self):
+        """the autosave counts as a string
+
+        Returns:
+            str: saved, skipped and failed counts and the last capture and write times
+        """
+        return (f"autosaves saved: {self.saved}, skipped: {self.skipped}, failed: {self.failed}, "
+                f"last capture: {self.last_capture_seconds*1000:.1f}ms (main thread), last write: {self.last_write_seconds*1000:.1f}ms (worker)")
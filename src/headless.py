@@ -0,0 +1,220 @@
+"""
+A windowless runner for the simulation. this contains HeadlessApp which drives the full
+round lifecycle (initialization, simulation, evaluation, reproduction) without opening a
+window, creating any GUI widgets or rendering anything.
+
+It builds the same Bullet world, `TerrainController` heightfield, cities, `Food` and `Critter`
+entities as `main.BaseApp`, it just skips the skybox, lights, UI, camera controller and charts.
+This lets thousands of generations run on machines with no display.
+
+Classes:
+    - `HeadlessApp`: a `BaseApp` that runs with no window and drives `RoundManager` itself.
+
+Usage:
+    python ./headless.py --rounds 100 --cities 2 --population 10
+    python ./headless.py --rounds 100 --population 500 --kinematic
+    python ./headless.py --rounds 100 --checkpoint world.npz --checkpoint-every 10
+    python ./headless.py --rounds 100 --resume world.npz --checkpoint world.npz
+    python ./headless.py --rounds 1000 --autosave autosaves --autosave-keep 5
+    python ./headless.py --rounds 1000 --resume autosaves --autosave autosaves
+    python ./headless.py --rounds 1000 --metrics metrics.csv.gz
+"""
+
+import argparse
+import os
+import random
+import gc
+
+from panda3d.core import loadPrcFileData
+#must be set before ShowBase is created, we never want a window or a sound device
+loadPrcFileData("", "window-type none\naudio-library-name null")
+
+from direct.showbase.ShowBase import ShowBase
+
+from main import BaseApp
+from RoundManager import RoundManager
+from CORE.Terrain import TerrainController
+from CORE.collision import ContactStats
+from checkpoint import Autosaver
+from GA.Genome import DEFAULT_SCHEMA
+from GA.Logger import MetricsLogger
+
+
+class HeadlessApp(BaseApp):
+    """
+    A `BaseApp` with no window, GUI or rendering that runs rounds back to back.
+
+    Attributes:
+        headless (bool): always true, shared code such as `TerrainController` reads it to skip anything visual.
+        city_margin (float): how far from the edge of the map cities may spawn.
+        fixed_dt (float): the fixed simulation tick length in seconds.
+        contact_stats (ContactStats): per tick Bullet contact counts, printed every round with the physics stepping counts, None when not collected.
+
+    Methods:
+        __init__(city_count=2, population_size=None, fixed_dt=None, bucket_count=None, kinematic=False, physics_step=None, max_substeps=None): builds the world and spawns the cities.
+        spawn_cities(count): spawn cities at random positions that are far enough from the edge of the map.
+        run_rounds(rounds): step the task manager until `rounds` full rounds have completed.
+        run_to_round_boundary(): step the task manager until the next round's initialization, where the finished round's checkpoint is taken.
+    """
+    headless = True
+    
+    #how far from the edge of the map cities may spawn, bigger than the default city bounds radius
+    city_margin = 60
+    
+    #headless runs use a fixed tick so results do not depend on how fast the machine is
+    fixed_dt = 1/60
+    
+    #set to a ContactStats to print Bullet's contact pair counts every round
+    contact_stats = None
+
+    def __init__(self, city_count=2, population_size=None, fixed_dt=None, bucket_count=None, kinematic=False, physics_step=None, max_substeps=None):
+        """set up everything the simulation needs and nothing it does not
+
+        Args:
+            city_count (int, optional): how many cities to spawn. Defaults to 2.
+            population_size (int, optional): how many critters each city starts with. Defaults to BaseApp.initial_population_size.
+            fixed_dt (float, optional): the fixed simulation tick length in seconds. Defaults to HeadlessApp.fixed_dt.
+            bucket_count (int, optional): how many buckets critter decisions are spread over. Defaults to BaseApp.think_bucket_count.
+            kinematic (bool, optional): run without rigid bodies or physics steps, see BaseApp.kinematic. Defaults to False.
+            physics_step (float, optional): the fixed physics step in seconds. Defaults to BaseApp.physics_step.
+            max_substeps (int, optional): the most physics steps per frame. Defaults to BaseApp.physics_max_substeps.
+        """
+        ShowBase.__init__(self, windowType="none")
+
+        if(population_size != None): self.initial_population_size = population_size
+        if(fixed_dt != None): self.fixed_dt = fixed_dt
+        if(bucket_count != None): self.think_bucket_count = bucket_count
+        self.kinematic = kinematic
+        if(physics_step != None): self.physics_step = physics_step
+        if(max_substeps != None): self.physics_max_substeps = max_substeps
+
+        #the clock all simulation timing reads from
+        self.init_clock()
+
+        self.round_manager = RoundManager(self)
+
+        #setup our terrain, only the heightfield is needed
+        self.terrainController = TerrainController(self)
+
+        #set up bullet grav and phys engine
+        self.init_gravity()
+
+        #critters think and every entity with a goal moves, one task for all of them
+        self.init_movement()
+
+        #per tick cached food answers for the critters that think
+        self.init_food_query()
+
+        #vectorized selection, crossover and mutation
+        self.init_reproduction()
+
+        # List to keep track of food in the world
+        self.food_items = []
+
+        # List to track all critters
+        self.critters = []
+
+        #the generation reproduction replaced, their population rows are given back when the next round starts
+        self.replaced_critters = []
+
+        #everything loaded so far, cities aside, lives as long as the app, keep the collector from rescanning it every time
+        #a new generation of critters is built
+        gc.freeze()
+
+        self.spawn_cities(city_count)
+
+        #phase changes are checked every tick, right after the critters act
+        self.round_manager.start(self.task_mgr, self.handle_ga_loop)
+
+    def spawn_cities(self, count):
+        """spawn cities at random positions, keeping their bounds inside of the map
+
+        Args:
+            count (int): how many cities to spawn
+        """
+        for _ in range(count):
+            x = random.uniform(self.city_margin, self.terrainController.heightmap.getXSize() - self.city_margin)
+            y = random.uniform(self.city_margin, self.terrainController.heightmap.getYSize() - self.city_margin)
+            self.spawn_city(x, y)
+
+    def run_rounds(self, rounds):
+        """run the simulation until `rounds` full rounds have completed.
+        the phase checks run every frame after the critters act, nothing waits on wall time so rounds go as fast as the CPU allows
+
+        Args:
+            rounds (int): how many rounds to run
+
+        Returns:
+            int: the round count of the round manager
+        """
+        self.simulation_enabled = True
+        target = self.round_manager.round_count + rounds
+        while(self.round_manager.round_count < target):
+            round_count = self.round_manager.round_count
+            self.task_mgr.step()
+            if(self.contact_stats != None):
+                self.contact_stats.sample(self.world)
+                if(self.round_manager.round_count != round_count):
+                    print(f"round {round_count} {self.contact_stats.summary()}, {self.physics.summary()}")
+                    self.contact_stats.reset()
+                    self.physics.reset_stats()
+        return self.round_manager.round_count
+
+    def run_to_round_boundary(self):
+        """step the task manager until the round after a finished one has been initialized. run_rounds stops right
+        after reproduction so the finished round's critters can still be read, but its checkpoint is only taken
+        by the next initialization
+        """
+        while(self.simulation_started and self.round_manager.get_current_phase() == "Reproduction"):
+            self.task_mgr.step()
+
+
+# Entry point for the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="run VivariumSim without a window")
+    parser.add_argument("--rounds", type=int, default=10, help="how many rounds to run")
+    parser.add_argument("--cities", type=int, default=2, help="how many cities to spawn")
+    parser.add_argument("--population", type=int, default=BaseApp.initial_population_size, help="how many critters each city starts with")
+    parser.add_argument("--time-limit", type=float, default=None, help="the phase time limit in seconds")
+    parser.add_argument("--tick", type=float, default=HeadlessApp.fixed_dt, help="the fixed simulation tick length in seconds")
+    parser.add_argument("--buckets", type=int, default=BaseApp.think_bucket_count, help="how many buckets critter decisions are spread over, each critter re-plans once every this many ticks")
+    parser.add_argument("--kinematic", action="store_true", help="no rigid bodies or physics steps, critters slide along the terrain. much faster for big populations")
+    parser.add_argument("--physics-step", type=float, default=BaseApp.physics_step, help="the fixed physics step in seconds")
+    parser.add_argument("--max-substeps", type=int, default=BaseApp.physics_max_substeps, help="the most physics steps one frame may take, the rest of a slow frame is dropped")
+    parser.add_argument("--contact-stats", action="store_true", help="print Bullet's contact pair, awake body and physics step counts every round")
+    parser.add_argument("--seed", type=int, default=None, help="seed for python's random module")
+    parser.add_argument("--checkpoint", default=None, help="save the world to this .npz file between rounds")
+    parser.add_argument("--checkpoint-every", type=int, default=BaseApp.checkpoint_every, help="how many rounds run between checkpoints")
+    parser.add_argument("--resume", default=None, help="load the world from this checkpoint, or the newest autosave in this directory, before running. --rounds more rounds are run")
+    parser.add_argument("--autosave", default=None, help="write checkpoints into this directory on a background thread between rounds")
+    parser.add_argument("--autosave-every", type=int, default=1, help="how many rounds run between autosaves")
+    parser.add_argument("--autosave-keep", type=int, default=5, help="how many autosaves are kept, older ones are deleted")
+    parser.add_argument("--metrics", default=None, help="append a row of metrics per city every round to this .csv.gz file")
+    parser.add_argument("--print-critters", action="store_true", help="print every critter at reproduction")
+    args = parser.parse_args()
+
+    if(args.seed != None): random.seed(args.seed)
+
+    app = HeadlessApp(city_count=args.cities, population_size=args.population, fixed_dt=args.tick, bucket_count=args.buckets, kinematic=args.kinematic,
+                      physics_step=args.physics_step, max_substeps=args.max_substeps)
+    #a checkpoint brings its own time limit, one given here still wins
+    if(args.resume != None):
+        resume = Autosaver.latest(args.resume) if os.path.isdir(args.resume) else args.resume
+        if(resume == None): parser.error(f"no autosaves in {args.resume}")
+        app.load_checkpoint(resume)
+    if(args.time_limit != None): app.round_manager.phase_time_limit_seconds = args.time_limit
+    if(args.contact_stats): app.contact_stats = ContactStats()
+    app.checkpoint_path = args.checkpoint
+    app.checkpoint_every = args.checkpoint_every
+    if(args.autosave != None): app.autosaver = Autosaver(args.autosave, keep=args.autosave_keep, every=args.autosave_every)
+    if(args.metrics != None): app.metrics = MetricsLogger(args.metrics, DEFAULT_SCHEMA.names)
+    app.print_critters = args.print_critters
+    app.run_rounds(args.rounds)
+    #so the last round gets its checkpoint too
+    if(app.checkpoint_path != None or app.autosaver != None): app.run_to_round_boundary()
+    if(app.autosaver != None):
+        app.autosaver.close()
+        print(app.autosaver.summary())
+    if(app.metrics != None):
+        app.metrics.close()
+        print(f"{app.metrics.rows_written} metrics rows in {app.metrics.path}")
@@ -0,0 +1,323 @@
+"""
+An island model runner for the simulation. this starts one worker process per island, every worker runs
+its own `HeadlessApp` world with its own cities and food, so every core of the machine runs a vivarium.
+
+Islands evolve on their own and every `migrate_every` rounds each one sends copies of its fittest genomes
+to other islands over a topology:
+    - ring: island i sends to island i+1, the last one sends to the first.
+    - full: every island sends to every other island.
+    - random: every island sends to one other island picked at random each migration.
+Migration is synchronous, every island finishes the same round before any migrants move, so a run with
+the same seed and island count always migrates the same genomes. Immigrants replace random children of a
+random city before the next round spawns them.
+
+Classes:
+    - `IslandRunner`: starts the island workers, routes migrants between them and reports every migration.
+
+Functions:
+    - `export_genomes(count)`: the genomes of the fittest critters of this process's world.
+    - `import_genomes(app, genomes)`: turn genomes into children of this process's cities.
+    - `run_island(...)`: the worker process body.
+
+Usage:
+    python ./island.py --islands 4 --rounds 40 --migrate-every 5 --migrants 2 --topology ring
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import sys
+
+
+#genes travel as plain tuples so nothing about the Gene class has to be pickled between processes
+GENE_FIELDS = ("name", "value", "min_value", "max_value", "mutation_rate", "mutation_step", "dominance", "generation")
+
+
+def export_genomes(count):
+    """the genomes of the fittest critters of this process's world, call it after a round has been evaluated
+
+    Args:
+        count (int): how many genomes to export
+
+    Returns:
+        list: one list of gene tuples (see GENE_FIELDS) per critter, fittest first
+    """
+    from GA.Critter import Critter
+
+    critters = sorted(Critter.critters, key=lambda critter: critter.fitness, reverse=True)[:count]
+    return [[tuple(getattr(gene, field) for field in GENE_FIELDS) for gene in critter.genes] for critter in critters]
+
+
+def import_genomes(app, genomes):
+    """turn genomes into children of this process's cities, each immigrant replaces a random child of a random city
+
+    Args:
+        app (HeadlessApp): the app of this process
+        genomes (list): gene tuple lists made by export_genomes
+
+    Returns:
+        int: how many immigrants were added
+    """
+    from GA.City import City
+    from GA.Critter import Critter
+    from GA.Gene import Gene
+
+    cities = [city for city in City.cities]
+    if(len(cities) == 0):
+        return 0
+    for genome in genomes:
+        city = random.choice(cities)
+        genes = [Gene(**dict(zip(GENE_FIELDS, gene))) for gene in genome]
+        x, y = city.position[0], city.position[1]
+        immigrant = Critter(base=app, city=city, position=(x, y, 0), genes=genes)
+        if(len(city.children) > 0):
+            replaced = random.choice(city.children)
+            city.children.remove(replaced)
+            #a spawned child gives its row back when it is removed
+            if(not replaced.spawned):
+                replaced.release_row()
+        city.children.add(immigrant)
+    return len(genomes)
+
+
+def island_report():
+    """the fitness and population of this process's world
+
+    Returns:
+        dict: best and mean fitness of the spawned critters and how many children will spawn next round
+    """
+    from GA.City import City
+    from GA.Critter import Critter
+
+    fitness = [critter.fitness for critter in Critter.critters]
+    return {
+        "best": max(fitness) if len(fitness) > 0 else 0,
+        "mean": sum(fitness) / len(fitness) if len(fitness) > 0 else 0,
+        "population": sum(len(city.children) for city in City.cities),
+    }
+
+
+def run_island(index, settings, inbox, outbox):
+    """the worker process body, runs an island's world and trades migrants with the runner between epochs
+
+    Args:
+        index (int): the island's index
+        settings (dict): the HeadlessApp arguments plus seed, rounds, migrate_every, migrants, time_limit and verbose
+        inbox (Queue): migrants for this island arrive here, one list per migration
+        outbox (Queue): (index, epoch, emigrants, report) goes here after every epoch
+    """
+    if(not settings["verbose"]):
+        sys.stdout = open(os.devnull, "w")
+
+    #the world is built here, in the worker, no Panda state is ever shared between processes
+    from headless import HeadlessApp
+
+    random.seed(settings["seed"] + index)
+    app = HeadlessApp(
+        city_count=settings["cities"],
+        population_size=settings["population"],
+        bucket_count=settings["buckets"],
+        kinematic=settings["kinematic"],
+    )
+    if(settings["time_limit"] != None): app.round_manager.phase_time_limit_seconds = settings["time_limit"]
+
+    rounds_left = settings["rounds"]
+    epoch = 0
+    while(rounds_left > 0):
+        rounds = min(settings["migrate_every"], rounds_left)
+        app.run_rounds(rounds)
+        rounds_left -= rounds
+        outbox.put((index, epoch, export_genomes(settings["migrants"]), island_report()))
+        if(rounds_left > 0):
+            import_genomes(app, inbox.get())
+        epoch += 1
+
+
+class IslandRunner():
+    """
+    Starts one worker process per island and routes migrants between them.
+
+    Attributes:
+        TOPOLOGIES (tuple): the supported migration topologies.
+        island_count (int): how many islands (worker processes) to run.
+        topology (str): how migrants are routed, one of TOPOLOGIES.
+        settings (dict): what every worker is started with, see run_island.
+        rng (random.Random): picks destinations for the random topology.
+        reports (list): (epoch, [report of every island]) for every finished epoch.
+
+    Methods:
+        __init__(island_count, topology="ring", **settings): configure the runner.
+        destinations(source): the islands a source island sends its migrants to this migration.
+        route(emigrants): work out every island's immigrants from every island's emigrants.
+        collect(outbox, workers): wait for the next epoch result of any island.
+        run(): start the workers and trade migrants until every island has run all its rounds.
+    """
+    TOPOLOGIES = ("ring", "full", "random")
+
+    def __init__(self, island_count, topology="ring", seed=0, rounds=10, migrate_every=5, migrants=2,
+                 cities=2, population=10, buckets=None, kinematic=False, time_limit=None, verbose=False):
+        """configure the runner
+
+        Args:
+            island_count (int): how many islands (worker processes) to run
+            topology (str, optional): how migrants are routed, one of TOPOLOGIES. Defaults to "ring".
+            seed (int, optional): island i seeds python's random with seed + i. Defaults to 0.
+            rounds (int, optional): how many rounds every island runs. Defaults to 10.
+            migrate_every (int, optional): how many rounds run between migrations. Defaults to 5.
+            migrants (int, optional): how many of its fittest genomes an island sends each migration. Defaults to 2.
+            cities (int, optional): how many cities every island spawns. Defaults to 2.
+            population (int, optional): how many critters each city starts with. Defaults to 10.
+            buckets (int, optional): how many buckets critter decisions are spread over. Defaults to BaseApp.think_bucket_count.
+            kinematic (bool, optional): run the islands without rigid bodies. Defaults to False.
+            time_limit (float, optional): the phase time limit in seconds. Defaults to the RoundManager's.
+            verbose (bool, optional): let the workers print their round logs. Defaults to False.
+        """
+        if(topology not in self.TOPOLOGIES):
+            raise ValueError(f"unknown topology {topology}, expected one of {self.TOPOLOGIES}")
+        self.island_count = max(int(island_count), 1)
+        self.topology = topology
+        self.settings = {
+            "seed": seed,
+            "rounds": rounds,
+            "migrate_every": max(int(migrate_every), 1),
+            "migrants": migrants,
+            "cities": cities,
+            "population": population,
+            "buckets": buckets,
+            "kinematic": kinematic,
+            "time_limit": time_limit,
+            "verbose": verbose,
+        }
+        self.rng = random.Random(seed)
+        self.reports = []
+
+    def destinations(self, source):
+        """the islands a source island sends its migrants to this migration
+
+        Args:
+            source (int): the index of the sending island
+
+        Returns:
+            list: the indices of the receiving islands, never the source itself
+        """
+        if(self.island_count < 2):
+            return []
+        if(self.topology == "ring"):
+            return [(source + 1) % self.island_count]
+        if(self.topology == "full"):
+            return [i for i in range(self.island_count) if i != source]
+        return [self.rng.choice([i for i in range(self.island_count) if i != source])]
+
+    def route(self, emigrants):
+        """work out every island's immigrants from every island's emigrants
+
+        Args:
+            emigrants (list): the emigrant genomes of every island, by island index
+
+        Returns:
+            list: the immigrant genomes of every island, by island index
+        """
+        immigrants = [[] for _ in range(self.island_count)]
+        for source, genomes in enumerate(emigrants):
+            for destination in self.destinations(source):
+                immigrants[destination].extend(genomes)
+        return immigrants
+
+    def collect(self, outbox, workers):
+        """wait for the next epoch result of any island, without hanging forever if a worker died
+
+        Args:
+            outbox (Queue): the queue workers put their results on
+            workers (list): the worker processes
+
+        Returns:
+            tuple: (index, epoch, emigrants, report) of one island
+        """
+        while(True):
+            try:
+                return outbox.get(timeout=1)
+            except queue.Empty:
+                for worker in workers:
+                    if(worker.exitcode not in (None, 0)):
+                        raise RuntimeError(f"{worker.name} exited with code {worker.exitcode}")
+
+    def run(self):
+        """start the workers and trade migrants until every island has run all its rounds
+
+        Returns:
+            list: (epoch, [report of every island]) for every epoch
+        """
+        #spawn, not fork, every worker builds its own ShowBase from scratch
+        context = multiprocessing.get_context("spawn")
+        outbox = context.Queue()
+        inboxes = [context.Queue() for _ in range(self.island_count)]
+        workers = [
+            context.Process(target=run_island, args=(i, self.settings, inboxes[i], outbox), name=f"island-{i}")
+            for i in range(self.island_count)
+        ]
+        for worker in workers:
+            worker.start()
+
+        rounds = self.settings["rounds"]
+        epochs = (rounds + self.settings["migrate_every"] - 1) // self.settings["migrate_every"]
+        try:
+            for epoch in range(epochs):
+                emigrants = [None] * self.island_count
+                reports = [None] * self.island_count
+                for _ in range(self.island_count):
+                    index, _, genomes, report = self.collect(outbox, workers)
+                    emigrants[index] = genomes
+                    reports[index] = report
+                self.reports.append((epoch, reports))
+                round_count = min((epoch + 1) * self.settings["migrate_every"], rounds)
+                print(f"round {round_count}: " + ", ".join(
+                    f"island {i} best {report['best']:.3f} mean {report['mean']:.3f} pop {report['population']}"
+                    for i, report in enumerate(reports)
+                ))
+                if(epoch < epochs - 1):
+                    for i, genomes in enumerate(self.route(emigrants)):
+                        inboxes[i].put(genomes)
+        finally:
+            for worker in workers:
+                if(worker.is_alive() and worker.exitcode == None and sys.exc_info()[0] != None):
+                    worker.terminate()
+                worker.join()
+        return self.reports
+
+
+# Entry point for the script
+if __name__ == "__main__":
+    from main import BaseApp
+
+    parser = argparse.ArgumentParser(description="run VivariumSim islands in parallel, trading their fittest genomes")
+    parser.add_argument("--islands", type=int, default=os.cpu_count(), help="how many islands (worker processes) to run")
+    parser.add_argument("--rounds", type=int, default=10, help="how many rounds every island runs")
+    parser.add_argument("--migrate-every", type=int, default=5, help="how many rounds run between migrations")
+    parser.add_argument("--migrants", type=int, default=2, help="how many of its fittest genomes an island sends each migration")
+    parser.add_argument("--topology", choices=IslandRunner.TOPOLOGIES, default="ring", help="which islands receive an island's migrants")
+    parser.add_argument("--cities", type=int, default=2, help="how many cities every island spawns")
+    parser.add_argument("--population", type=int, default=BaseApp.initial_population_size, help="how many critters each city starts with")
+    parser.add_argument("--time-limit", type=float, default=None, help="the phase time limit in seconds")
+    parser.add_argument("--buckets", type=int, default=BaseApp.think_bucket_count, help="how many buckets critter decisions are spread over")
+    parser.add_argument("--kinematic", action="store_true", help="no rigid bodies or physics steps on any island")
+    parser.add_argument("--seed", type=int, default=0, help="island i seeds python's random with seed + i")
+    parser.add_argument("--verbose", action="store_true", help="let the workers print their round logs")
+    args = parser.parse_args()
+
+    runner = IslandRunner(
+        args.islands,
+        topology=args.topology,
+        seed=args.seed,
+        rounds=args.rounds,
+        migrate_every=args.migrate_every,
+        migrants=args.migrants,
+        cities=args.cities,
+        population=args.population,
+        buckets=args.buckets,
+        kinematic=args.kinematic,
+        time_limit=args.time_limit,
+        verbose=args.verbose,
+    )
+    runner.run()
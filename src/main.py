@@ -6,6 +6,7 @@ container for the app itself.
 """
 
 import random
+import gc
 from direct.showbase.ShowBase import ShowBase
 from direct.showbase.DirectObject import DirectObject
 from direct.showbase.ShowBaseGlobal import globalClock
@@ -37,9 +38,19 @@ from CORE.input import Input
 from CORE.camera import CameraController
 from CORE.Terrain import TerrainController
 from CORE.entity import Entity
+from CORE.registry import EntitySet
+from CORE.clock import SimClock
+from CORE.movement import MovementSystem
+from CORE.collision import CollisionGroups
+from CORE.physics import PhysicsStepper
 from GA.Food import Food
 from GA.City import City
 from GA.Corpse import Corpse
+from GA.FoodQuery import FoodQuery
+from GA.CritterSystem import CritterSystem
+from GA.Genome import DEFAULT_SCHEMA
+from GA.Reproduction import GenomeMatrix, ReproductionEngine
+from checkpoint import WorldCheckpoint
 from CORE.matplotlib_test import Pie_Chart_Data_Visualizer
 
 from panda3d.core import loadPrcFileData,loadPrcFile
@@ -64,6 +75,22 @@ class BaseApp(ShowBase):
     #did the simulation get started once
     simulation_started = False
     
+    #true when running without a window, shared code like the terrain reads it to skip visual work, see headless.py
+    headless = False
+    
+    #how many critters each city starts with the first round
+    initial_population_size = 10
+    
+    #fixed simulation tick length in seconds, None follows the frame time
+    fixed_dt = None
+    
+    #no rigid bodies at all, critters move analytically and snap to the terrain and the physics world is never stepped.
+    #for large headless runs, see headless.py --kinematic
+    kinematic = False
+    
+    #critters are spread over this many buckets and each re-plans once every this many ticks, higher trades decision latency for throughput
+    think_bucket_count = 4
+    
     #at one each critter has 1 food spawn for it
     food_per_critter = 0
     #the flat amount of food to spawn per round, in addition to food per critter
@@ -72,11 +99,32 @@ class BaseApp(ShowBase):
     #how fast to build terrain
     edit_power = .5
     
-    #how big to edit 
+    #how big to edit
     edit_radius = 50
-    
+
+    #how the edit fades towards the edge of the brush, see TerrainController.BRUSH_FALLOFFS
+    edit_falloff = "smooth"
+
     gravity_strength = -9.81
     
+    #bullet always steps this many seconds at a time, whatever the frame time
+    physics_step = 1/60
+    #the most physics steps one frame may take, time beyond that is dropped instead of caught up
+    physics_max_substeps = 4
+    
+    #save the world here at the end of every checkpoint_every rounds, None never saves. see checkpoint.py
+    checkpoint_path = None
+    checkpoint_every = 1
+    
+    #set to a checkpoint.Autosaver to write checkpoints on a background thread between rounds
+    autosaver = None
+    
+    #set to a GA.Logger.MetricsLogger to append a row of metrics per city every round
+    metrics = None
+    
+    #print every critter's full description at reproduction, slow and very long for big populations
+    print_critters = False
+    
     #the scale of z
     z_scale=500
     
@@ -107,6 +155,9 @@ class BaseApp(ShowBase):
         
         self.pie = None
         
+        #the clock all simulation timing reads from
+        self.init_clock()
+        
         #init our input handler class
         self.input = Input(self)
         
@@ -131,6 +182,15 @@ class BaseApp(ShowBase):
         #set up bullet grav and phys engine
         self.init_gravity()
         
+        #critters think and every entity with a goal moves, one task for all of them
+        self.init_movement()
+        
+        #per tick cached food answers for the critters that think
+        self.init_food_query()
+        
+        #vectorized selection, crossover and mutation
+        self.init_reproduction()
+        
         #init our camera controller
         self.camera_controller = CameraController(
             self,
@@ -152,6 +212,13 @@ class BaseApp(ShowBase):
         # List to track all critters
         self.critters = []
         
+        #the generation reproduction replaced, their population rows are given back when the next round starts
+        self.replaced_critters = []
+
+        #everything loaded so far lives as long as the app, keep the collector from rescanning it every time
+        #a new generation of critters is built
+        gc.freeze()
+        
     def rgba_to_name(self,rgba):
         rgb = tuple(int(c * 255) for c in rgba[:3])
         try:
@@ -201,6 +268,7 @@ class BaseApp(ShowBase):
                 self.round_manager.run_init_phase()
                 self.simulation_started = True
             else:
+                #every check is O(1) from the population counts so this runs every tick
                 #main logic for phase switches
                 #print(f"phase:{self.round_manager.current_phase_index}")
                 if(self.round_manager.is_simulation_phase_done()):
@@ -214,7 +282,7 @@ class BaseApp(ShowBase):
                     self.round_manager.next_phase()
             
             
-        return Task.again
+        return Task.cont
         
     def event_handlers_setup(self):
         """set up all event handlers for the app"""
@@ -224,7 +292,8 @@ class BaseApp(ShowBase):
         #this makes sure when we stop looking at the ui it becomes unfocused
         self.task_mgr.add(self.handle_unfocus, "handle_unfocus")
         
-        self.task_mgr.do_method_later(1, self.handle_ga_loop, "handle_main_loop")
+        #phase changes are checked every tick, right after the critters act
+        self.round_manager.start(self.task_mgr, self.handle_ga_loop)
         
         self.task_mgr.add(self.handle_stats_panel_task, "handle_stat_panel_update")
         
@@ -363,12 +432,24 @@ class BaseApp(ShowBase):
         
         self.render.setShaderAuto()
         
+    def init_clock(self):
+        """create the simulation clock and start ticking it every frame"""
+        self.sim_clock = SimClock(fixed_dt=self.fixed_dt)
+        self.sim_clock.start(self.task_mgr)
+        
     def init_gravity(self):
-        """set up our bullet phys and grav
+        """set up our bullet phys and grav, in kinematic mode the world is created empty and never stepped
         """
         #create world
         self.world = BulletWorld()
         self.world.setGravity(Vec3(0, 0, self.gravity_strength))
+        #only the group pairs that matter ever reach the narrowphase, see CORE.collision
+        CollisionGroups.setup(self.world)
+        #fixed steps no matter the frame time, see CORE.physics
+        self.physics = PhysicsStepper(step=self.physics_step, max_substeps=self.physics_max_substeps)
+        
+        if(self.kinematic):
+            return
         
         #set to update every frame. delta time is handled inside the update.
         self.taskMgr.add(self.update_grav, "Update_Grav")
@@ -377,6 +458,21 @@ class BaseApp(ShowBase):
         #IE: create our terrain collision mesh once here   
         self.terrainController.create_heightFieldMap_Collider()
         
+    def init_movement(self):
+        """create the movement system and the critter system, every frame critters think and then every entity with a goal moves in one batched step"""
+        self.movement_system = MovementSystem(self, phys=not self.kinematic, kinematic=self.kinematic)
+        #the critter system steps the movement system after the critters think, so it is the only task
+        self.critter_system = CritterSystem(self, bucket_count=self.think_bucket_count)
+        self.critter_system.start(self.task_mgr)
+        
+    def init_food_query(self):
+        """create the per tick cached food query service critters ask for food through"""
+        self.food_query = FoodQuery(self)
+        
+    def init_reproduction(self):
+        """create the reproduction engine every city breeds its children with"""
+        self.reproduction = ReproductionEngine(DEFAULT_SCHEMA)
+        
     def bullet_debugger_ON(self):
         """rip all frames if this is on... but it does show the colliders. but 1 fps. idc enough to figure out how to make it a toggle so this just turns it on."""
         # Set up debug rendering
@@ -390,9 +486,9 @@ class BaseApp(ShowBase):
         self.world.setDebugNode(debug_node)
     
     def update_grav(self,task):
-        """update the gravity phys of the world, use delta time to account for fps differences"""
-        dt = globalClock.getDt()
-        self.world.doPhysics(dt)
+        """update the gravity phys of the world, the sim clock's delta time is stepped through in fixed physics steps"""
+        dt = self.sim_clock.get_dt()
+        self.physics.advance(self.world, dt)
         #self.create_heightFieldMap_Collider()
         return task.cont
     
@@ -683,7 +779,19 @@ class BaseApp(ShowBase):
         Critter.remove_all_critters()
         Food.remove_all_food()
         Corpse.remove_all_corpse()
+        #the spawned ones were released as they were removed, this frees the eaten ones
+        for critter in self.replaced_critters:
+            critter.release_row()
+        self.replaced_critters.clear()
+        
+        #nothing of the finished round is left and nothing of this one exists yet, checkpoints are taken here
+        if(self.round_manager.round_count > 0):
+            self.round_finished()
+        
+        self.populate_round()
         
+    def populate_round(self):
+        """spawn the critters and food of a new round and send the critters out, the second half of initialize_round"""
         #spawn critters for each city
         for city in City.cities:
             self.spawn_initial_population(city)
@@ -709,8 +817,9 @@ class BaseApp(ShowBase):
 
         print(f"{len(Critter.critters)} critters reset for the new round.")
         
-    def spawn_initial_population(self, city, count=10):
+    def spawn_initial_population(self, city, count=None):
         """Spawn an initial population of critters randomly within the bounds of a city."""
+        if(count == None): count = self.initial_population_size
         x_min,x_max,y_min,y_max = city.get_bounds()
         def get_x_y():
             x = random.uniform(
@@ -772,66 +881,91 @@ class BaseApp(ShowBase):
         for critter in Critter.critters:
             critter.get_pos()
 
-        for critter in Critter.critters:
-            # Reset fitness for the round
-            critter.evaluate()
+        #fitness of every critter in one go, see Critter.evaluate
+        Critter.population.evaluate(self.round_manager.phase_time_limit_seconds)
         print("Finished evaluating critters.")
 
 
     def reproduce_round(self):
-        """Handle reproduction and replace less-fit critters."""
+        """Handle reproduction and replace less-fit critters, every city breeds all its children in one go, see GA.Reproduction."""
         print("Handling reproduction...")
         
         for city in City.cities:
-            critters = city.children
-            total_city_food = 0
-            #print(critters)
-            for critter in critters:
-                print(critter)
-                if(not critter.eaten and critter.at_city):
-                    total_city_food += critter.food_eaten
+            critters = list(city.children)
+            if(self.print_critters):
+                for critter in critters:
+                    print(critter)
+            total_city_food = Critter.population.city_sum("food_eaten", city.id, at_city_only=True)
             print(f"food for reproduction:{total_city_food}")
-            # Sort critters by fitness
-            critters.sort(key=lambda c: c.fitness, reverse=True)
             
-            print("  - Critters sorted by fitness.")
-
-            # Select the top critters for reproduction
-            top_critters = critters[:len(critters) // 2]
-            print(f"  - Top {len(top_critters)} critters selected for reproduction.")
-
-            # Generate offspring to replace the parents
-            offspring = []
-            while(total_city_food > 0):
-                for i in range(0, len(top_critters), 2):
-                    if i + 1 < len(top_critters):  # Ensure we have pairs
-                        if(total_city_food > 0):
-                            parent1 = top_critters[i]
-                            parent2 = top_critters[i + 1]
-                            child = self.create_offspring(parent1, parent2)
-                            total_city_food-=1
-                            offspring.append(child)
-                            print(f"    > Offspring created from Critter {parent1.id} and Critter {parent2.id}.")
+            #one child per started unit of food, known up front so breeding always ends
+            count = ReproductionEngine.offspring_count(total_city_food)
+            parents = GenomeMatrix.from_entities(DEFAULT_SCHEMA, critters)
+            fitness = np.array([critter.fitness for critter in critters], dtype=np.float64)
+            children, first, second = self.reproduction.breed(parents, fitness, count)
+            print(f"  - {len(children)} offspring bred from the top {len(self.reproduction.select(fitness))} critters.")
+
+            # Spawn the offspring near their parents
+            positions = np.array([critter.position for critter in critters], dtype=np.float64).reshape(-1, 3)
+            xs = (positions[first, 0] + positions[second, 0]) / 2 + self.reproduction.rng.uniform(-10, 10, len(children))
+            ys = (positions[first, 1] + positions[second, 1]) / 2 + self.reproduction.rng.uniform(-10, 10, len(children))
+            offspring = Critter.create_many(self, city, children, np.column_stack((xs, ys, np.zeros(len(children)))))
+
+            if(self.metrics != None):
+                rows = [critter.row for critter in critters]
+                columns = Critter.population.columns
+                self.metrics.record_city(
+                    self.round_manager.round_count, city.id, fitness, parents.values, total_city_food, len(children),
+                    eaten=np.count_nonzero(columns["eaten"][rows]),
+                    home=np.count_nonzero(columns["at_city"][rows] & ~columns["eaten"][rows]),
+                    phase_seconds=self.round_manager.phase_durations,
+                )
 
             # Replace the population with offspring
-            city.children = offspring
+            city.children = EntitySet(offspring)
+            #the replaced critters still act for a tick and eaten ones may still be targeted, their rows are freed by initialize_round
+            self.replaced_critters.extend(critters)
             print(f"Reproduction complete. New population size: {len(city.children)}.")
 
               
+    def round_finished(self):
+        """called by initialize_round once the finished round's critters, food and corpses are removed, the world is at a round boundary.
+        this is a tick after reproduction, the finished round's critters still act on that tick so a checkpoint taken any earlier could not be resumed exactly"""
+        if(self.checkpoint_path != None and self.round_manager.round_count % max(self.checkpoint_every, 1) == 0):
+            self.save_checkpoint(self.checkpoint_path)
+        #only copies the world here, the autosaver's thread does the slow part while the next round runs
+        if(self.autosaver != None):
+            self.autosaver.round_finished(self)
+    
+    def save_checkpoint(self, path):
+        """save the world to a compressed .npz checkpoint, only between rounds
+
+        Args:
+            path (str): the file to write
+        """
+        WorldCheckpoint.capture(self).write(path)
+        print(f"Saved checkpoint of round {self.round_manager.round_count} to {path}.")
+    
+    def load_checkpoint(self, path):
+        """replace the world with a checkpoint's, the simulation goes on from the start of the round after the one that was saved
+
+        Args:
+            path (str): the file to read
+        """
+        WorldCheckpoint.read(path).restore(self)
+        print(f"Loaded checkpoint of round {self.round_manager.round_count} from {path}.")
+              
     def create_offspring(self, parent1, parent2):
         """Create an offspring critter using two parents."""
         print(f"Creating offspring from parents {parent1.id} and {parent2.id}...")
 
-        new_genes = []
-        for gene1, gene2 in zip(parent1.genes, parent2.genes):
-            new_gene = gene1.crossover(gene2)
-            new_gene.mutate()
-            new_genes.append(new_gene)
+        parents = GenomeMatrix.from_genomes(DEFAULT_SCHEMA, [parent1.genes, parent2.genes])
+        children = self.reproduction.breed_pairs(parents, np.array([0]), np.array([1]))
 
         # Spawn the offspring near one of the parents
         x = (parent1.position[0] + parent2.position[0]) / 2 + random.uniform(-10, 10)
         y = (parent1.position[1] + parent2.position[1]) / 2 + random.uniform(-10, 10)
-        offspring = Critter(position=(x, y, 0), genes=new_genes, city=parent1.city,base=parent1.base)
+        offspring = Critter(position=(x, y, 0), genes=children.genes(0), city=parent1.city,base=parent1.base)
 
         print(f"  - Offspring created at position ({x:.2f}, {y:.2f}).")
         return offspring